@@ -3,60 +3,190 @@ from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_sqlalchemy import SQLAlchemy
 from datetime import timedelta
+import importlib
 import os
 import sys
+import threading
 
 # Initialize Flask extensions
 db = SQLAlchemy()
 jwt = JWTManager()
 
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+# API blueprints as (module, attribute, url_prefix). They are imported by name
+# so that production workers can defer loading routes and services until the
+# first request instead of paying for it at boot.
+BLUEPRINTS = [
+    ('backend.routes.auth_routes', 'auth_bp', '/api/auth'),
+    ('backend.routes.admin_routes', 'admin_bp', '/api/admin'),
+    ('backend.routes.lecturer_routes', 'lecturer_bp', '/api/lecturer'),
+    ('backend.routes.student_routes', 'student_bp', '/api/student'),
+    ('backend.routes.file_routes', 'files_bp', '/api/files'),
+    ('backend.routes.batch_routes', 'batch_bp', '/api/batch'),
+]
+
+
+def register_blueprints(app):
+    """Import and register every API blueprint on the app."""
+    for module_name, attribute, url_prefix in BLUEPRINTS:
+        blueprint = getattr(importlib.import_module(module_name), attribute)
+        app.register_blueprint(blueprint, url_prefix=url_prefix)
+
+
+class LazyBlueprintLoader:
+    """WSGI middleware that registers the API blueprints on the first request."""
+
+    def __init__(self, app):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self.loaded:
+            return
+        with self._lock:
+            if not self.loaded:
+                register_blueprints(self.app)
+                self.loaded = True
+
+    def __call__(self, environ, start_response):
+        if not self.loaded:
+            self.load()
+        return self.wsgi_app(environ, start_response)
+
+
+def preload_app(app):
+    """
+    Do all deferred start-up work now.
+
+    Meant to be called once in a prefork master (e.g. gunicorn --preload) so
+    that route modules, configured mappers and the search index are shared
+    copy-on-write by every worker instead of being built in each of them.
+    """
+    loader = app.extensions.get('blueprint_loader')
+    if loader is not None:
+        loader.load()
+
+    import backend.models  # noqa: F401
+    from sqlalchemy.exc import SQLAlchemyError
+    from sqlalchemy.orm import configure_mappers
+    configure_mappers()
+
+    with app.app_context():
+        if app.config['SEARCH_INDEX_ENABLED']:
+            from backend.utils.search import search_index
+            try:
+                search_index.refresh(db.session)
+            except SQLAlchemyError:
+                # e.g. migrations not applied yet; the first search builds it
+                app.logger.warning('Could not build the search index at boot', exc_info=True)
+            db.session.remove()
+
+        # Connections must not be shared across fork()
+        db.engine.dispose()
+
+    return app
+
+
 def create_app(test_config=None):
     # Create and configure the app
     app = Flask(__name__,
                 static_folder='../frontend',
                 static_url_path='/')
 
+    # Defaults shared by every environment
+    app.config.from_object('backend.config.Config')
+
     # Load configuration directly
     if test_config is None:
-        app.config.update(
-            SECRET_KEY='your-development-secret-key',
-            SQLALCHEMY_DATABASE_URI='sqlite:///app.db',
-            SQLALCHEMY_TRACK_MODIFICATIONS=False,
-            DEBUG=True,
-            TESTING=False,
-            JWT_SECRET_KEY='jwt-secret-key-for-token-generation'
-        )
+        if os.environ.get('FLASK_ENV') == 'production':
+            app.config.from_object('backend.config.ProductionConfig')
+        else:
+            app.config.update(
+                SECRET_KEY='your-development-secret-key',
+                SQLALCHEMY_DATABASE_URI='sqlite:///app.db',
+                SQLALCHEMY_TRACK_MODIFICATIONS=False,
+                DEBUG=True,
+                TESTING=False,
+                JWT_SECRET_KEY='jwt-secret-key-for-token-generation'
+            )
     else:
         app.config.from_mapping(test_config)
 
-    # Ensure instance folder exists
-    try:
-        os.makedirs(app.instance_path)
-    except OSError:
-        pass
-
     # Initialize extensions
     db.init_app(app)
     jwt.init_app(app)
     CORS(app)
 
+    # Password hashing pool and login throttling
+    from backend.utils.passwords import init_password_hasher
+    from backend.utils.rate_limit import init_login_rate_limiter
+    init_password_hasher(app)
+    init_login_rate_limiter(app)
+
+    # Background thumbnails of image attachments
+    from backend.utils.previews import init_previews
+    init_previews(app)
+
+    # Dashboard response cache, evicted on commit
+    if app.config['RESPONSE_CACHE_ENABLED']:
+        from backend.utils.response_cache import init_response_cache
+        init_response_cache(app)
+
+    # Typeahead index, kept current by a flush hook
+    if app.config['SEARCH_INDEX_ENABLED']:
+        from backend.utils.search import init_search
+        init_search(app)
+
+    # Alembic is only needed by the `flask db` commands, which import
+    # flask_migrate before the app is created. Serving workers skip it.
+    if not app.config['LAZY_BLUEPRINTS'] or 'flask_migrate' in sys.modules:
+        from flask_migrate import Migrate
+        Migrate(app, db, directory=MIGRATIONS_DIR)
+
     # JWT Configuration
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=1)
+    app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=7)
 
-    # Import and register blueprints using absolute imports
-    from backend.routes.auth_routes import auth_bp
-    from backend.routes.admin_routes import admin_bp
-    from backend.routes.lecturer_routes import lecturer_bp
-    from backend.routes.student_routes import student_bp
+    # Register blueprints now, or on the first request for lazy boots
+    if app.config['LAZY_BLUEPRINTS']:
+        loader = LazyBlueprintLoader(app)
+        app.extensions['blueprint_loader'] = loader
+        app.wsgi_app = loader
+    else:
+        register_blueprints(app)
 
-    app.register_blueprint(auth_bp, url_prefix='/api/auth')
-    app.register_blueprint(admin_bp, url_prefix='/api/admin')
-    app.register_blueprint(lecturer_bp, url_prefix='/api/lecturer')
-    app.register_blueprint(student_bp, url_prefix='/api/student')
+    # Client addresses from the reverse proxy, for login throttling and logs
+    if app.config['TRUSTED_PROXIES']:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        proxies = app.config['TRUSTED_PROXIES']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies)
 
-    # Create database tables
-    with app.app_context():
-        db.create_all()
+    # Request instrumentation and the /metrics endpoint
+    if app.config['METRICS_ENABLED']:
+        from backend.utils.metrics import init_metrics
+        init_metrics(app)
+
+    if app.config['QUERY_INSPECTOR_ENABLED']:
+        from backend.utils.query_inspector import init_query_inspector
+        init_query_inspector(app)
+
+    # Registered last so that it runs first among the after_request hooks
+    # and metrics record the compressed size
+    if app.config['COMPRESSION_ENABLED']:
+        from backend.utils.compression import init_compression
+        init_compression(app)
+
+    # Development bootstrap. Production schemas are managed by
+    # `flask db upgrade` instead.
+    if app.config['AUTO_CREATE_TABLES']:
+        os.makedirs(app.instance_path, exist_ok=True)
+
+        import backend.models  # noqa: F401
+        with app.app_context():
+            db.create_all()
 
     # Root route to serve frontend
     @app.route('/')
@@ -81,4 +211,4 @@ def create_app(test_config=None):
 
 if __name__ == '__main__':
     app = create_app()
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,56 @@
+"""
+Move completed teaching practice sessions to the cold archive.
+
+Reports, evaluations and notifications of every completed session that has
+not been archived yet are moved to the archive tables, together with report
+attachments. Admin endpoints keep returning them; the hot tables shrink.
+
+    python -m backend.archive                 # every completed session
+    python -m backend.archive --session 3     # one session
+    python -m backend.archive --dry-run       # only count what would move
+
+Run it with the same environment as the server (FLASK_ENV, DATABASE_URL,
+ARCHIVE_FOLDER). It is safe to interrupt and run again.
+"""
+import argparse
+import sys
+
+from backend.app import create_app
+from backend.models import TeachingPracticeSession
+from backend.utils.archive import archivable_sessions, archive_session, pending_counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--session', type=int, help='archive only this session')
+    parser.add_argument('--batch-size', type=int, help='rows moved per transaction')
+    parser.add_argument('--dry-run', action='store_true', help='count rows without moving them')
+    args = parser.parse_args(argv)
+
+    app = create_app()
+    with app.app_context():
+        if args.session is not None:
+            session = TeachingPracticeSession.query.get(args.session)
+            if not session:
+                sys.exit('Teaching practice session %d not found' % args.session)
+            if session.status != 'completed':
+                sys.exit('Teaching practice session %d is not completed' % args.session)
+            sessions = [session]
+        else:
+            sessions = archivable_sessions()
+
+        batch_size = args.batch_size or app.config['ARCHIVE_BATCH_SIZE']
+        for session in sessions:
+            if args.dry_run:
+                counts = pending_counts(session)
+            else:
+                counts = archive_session(session, batch_size)
+            print('session %d (%s): %s' % (session.id, session.title,
+                                           ', '.join('%d %s' % (n, kind) for kind, n in counts.items())))
+
+        if not sessions:
+            print('Nothing to archive')
+
+
+if __name__ == '__main__':
+    main()
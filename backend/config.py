@@ -11,12 +11,71 @@ class Config:
     
     # JWT settings
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-key')
+    REFRESH_TOKEN_REUSE_GRACE_SECONDS = 10  # concurrent refreshes from several tabs
+
+    # Password hashing
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:260000')
+    PASSWORD_HASH_WORKERS = 2  # concurrent hashes per process
+    PASSWORD_HASH_QUEUE_SIZE = 8  # waiting hashes before answering 503
+    PASSWORD_HASH_TIMEOUT = 10  # seconds
+
+    # Reverse proxies in front of the app whose X-Forwarded-For and
+    # X-Forwarded-Proto are trusted; 0 when clients connect directly
+    TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', 0))
+
+    # Login throttling: token buckets per client IP and per username
+    LOGIN_RATE_LIMIT_ENABLED = True
+    LOGIN_RATE_LIMIT_BACKEND = os.environ.get('LOGIN_RATE_LIMIT_BACKEND', 'memory')  # 'memory' or 'sqlite'
+    LOGIN_RATE_LIMIT_PATH = os.environ.get('LOGIN_RATE_LIMIT_PATH', os.path.join(os.getcwd(), 'instance', 'rate_limit.sqlite'))
+    LOGIN_RATE_LIMIT_CAPACITY = 10  # burst size
+    LOGIN_RATE_LIMIT_PER_MINUTE = 5  # sustained attempts per key
+    LOGIN_RATE_LIMIT_MAX_KEYS = 100000
     
     # File upload settings
     UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB max upload
     ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx', 'txt', 'jpg', 'jpeg', 'png'}
 
+    # Cold archive of completed sessions (python -m backend.archive)
+    ARCHIVE_FOLDER = os.environ.get('ARCHIVE_FOLDER', os.path.join(os.getcwd(), 'archive'))
+    ARCHIVE_BATCH_SIZE = 500  # rows moved per transaction
+
+    # Downscaled copies of image attachments, made in the background (needs Pillow)
+    PREVIEWS_ENABLED = True
+    PREVIEW_FORMAT = 'webp'  # 'webp' or 'jpeg'; jpeg if Pillow lacks webp support
+    PREVIEW_SIZES = {'thumbnail': 320, 'preview': 1280}  # longest side in pixels
+    PREVIEW_WORKERS = 2  # images processed at once per process
+
+    # Start-up settings
+    AUTO_CREATE_TABLES = True  # run db.create_all() when the app is created
+    LAZY_BLUEPRINTS = False  # import routes on the first request instead of at boot
+
+    # Per-user cache of dashboard responses, evicted when the data behind them is committed
+    RESPONSE_CACHE_ENABLED = True
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory')  # 'memory' or 'sqlite'
+    RESPONSE_CACHE_PATH = os.environ.get('RESPONSE_CACHE_PATH', os.path.join(os.getcwd(), 'instance', 'response_cache.sqlite'))
+    RESPONSE_CACHE_TTL = 60  # seconds; also bounds staleness across hosts
+    RESPONSE_CACHE_MAX_ENTRIES = 10000
+
+    # Typeahead search from a per-process prefix index; off searches with LIKE
+    SEARCH_INDEX_ENABLED = True
+
+    # Compression of JSON and text responses, negotiated with Accept-Encoding
+    COMPRESSION_ENABLED = True
+    COMPRESSION_CODECS = ('zstd', 'br', 'gzip')  # preference; zstd and br need optional packages
+    COMPRESSION_LEVELS = {'zstd': 3, 'br': 4, 'gzip': 6}
+    COMPRESSION_MIN_SIZE = 1024  # bytes; smaller bodies gain little
+    COMPRESSION_MIMETYPES = ('application/json', 'text/plain', 'text/html', 'text/csv')
+
+    # Monitoring
+    METRICS_ENABLED = True  # request/SQL metrics served at /metrics
+
+    # Slow-query log and N+1 detector
+    QUERY_INSPECTOR_ENABLED = os.environ.get('QUERY_INSPECTOR_ENABLED') == '1'
+    N_PLUS_ONE_THRESHOLD = 5  # identical statements per request before warning
+    SLOW_QUERY_MS = 200
+    QUERY_BUDGET = None  # max statements per request, enforced when TESTING
+
 class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
@@ -26,6 +85,8 @@ class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    QUERY_INSPECTOR_ENABLED = True
+    QUERY_BUDGET = 25
 
 
 class ProductionConfig(Config):
@@ -36,4 +97,14 @@ class ProductionConfig(Config):
     
     # In production, ensure these are set in the environment
     SECRET_KEY = os.environ.get('SECRET_KEY')
-    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY')
\ No newline at end of file
+    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY')
+
+    # Schema is managed with `flask db upgrade`; workers boot lazily
+    AUTO_CREATE_TABLES = False
+    LAZY_BLUEPRINTS = True
+
+    # Share login limits between worker processes
+    LOGIN_RATE_LIMIT_BACKEND = os.environ.get('LOGIN_RATE_LIMIT_BACKEND', 'sqlite')
+
+    # Share cached responses and their evictions between worker processes
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'sqlite')
\ No newline at end of file
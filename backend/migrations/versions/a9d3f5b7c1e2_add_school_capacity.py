@@ -0,0 +1,29 @@
+"""add school capacity
+
+Revision ID: a9d3f5b7c1e2
+Revises: c4a8e2f6b0d3
+Create Date: 2026-10-19 09:12:44.518302
+
+Students a school takes per session, read by the bulk placement solver.
+NULL means no limit.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d3f5b7c1e2'
+down_revision = 'c4a8e2f6b0d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('school') as batch_op:
+        batch_op.add_column(sa.Column('capacity', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('school') as batch_op:
+        batch_op.drop_column('capacity')
@@ -0,0 +1,132 @@
+"""compress report content
+
+Revision ID: b6e2d8f0a4c1
+Revises: f3c9a7e1b5d4
+Create Date: 2026-10-18 21:37:52.916403
+
+report.content and report_archive.content become binary columns holding
+CompressedText values. Existing rows are converted to UTF-8 bytes in place,
+then every row long enough to gain from it is compressed, a batch at a time.
+
+The stored format is copied here from backend/utils/column_types.py as it
+was at this revision, so that later changes to the column type cannot
+change what this migration writes.
+
+"""
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+try:
+    import zstandard
+except ImportError:  # only needed to downgrade rows compressed with zstd
+    zstandard = None
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e2d8f0a4c1'
+down_revision = 'f3c9a7e1b5d4'
+branch_labels = None
+depends_on = None
+
+TABLES = ('report', 'report_archive')
+BATCH_SIZE = 500
+
+MARKER = b'\x00'
+RAW = MARKER + b'r'  # plain text that happens to start with the marker byte
+ZLIB = MARKER + b'z'
+ZSTD = MARKER + b's'
+THRESHOLD = 1024  # bytes of UTF-8
+
+
+def compress_text(value):
+    """Stored form of text: zlib compressed when long enough to gain from it."""
+    data = value.encode('utf-8')
+    if len(data) >= THRESHOLD:
+        packed = ZLIB + zlib.compress(data, 6)
+        if len(packed) < len(data):
+            return packed
+    if data.startswith(MARKER):
+        return RAW + data
+    return data
+
+
+def decompress_text(data):
+    """Text from a stored value, or from a row still holding text."""
+    if isinstance(data, str):
+        return data
+    data = bytes(data)
+    marker = data[:2]
+    if marker == ZLIB:
+        data = zlib.decompress(data[2:])
+    elif marker == ZSTD:
+        if zstandard is None:
+            raise RuntimeError('The zstandard package is needed to read this value')
+        data = zstandard.ZstdDecompressor().decompress(data[2:])
+    elif marker == RAW:
+        data = data[2:]
+    return data.decode('utf-8')
+
+
+def _rewrite(connection, table, encode, type_):
+    """Re-encode content in id order, a batch at a time; encode returns None to skip a row."""
+    last_id = 0
+    while True:
+        rows = connection.execute(sa.text(
+            f'SELECT id, content FROM {table} WHERE id > :last_id ORDER BY id LIMIT :limit'),
+            {'last_id': last_id, 'limit': BATCH_SIZE}).fetchall()
+        if not rows:
+            return
+        updates = []
+        for row_id, content in rows:
+            value = encode(content)
+            if value is not None:
+                updates.append({'id': row_id, 'content': value})
+        if updates:
+            connection.execute(sa.text(f'UPDATE {table} SET content = :content WHERE id = :id')
+                               .bindparams(sa.bindparam('content', type_=type_)), updates)
+        last_id = rows[-1][0]
+
+
+def _compress(content):
+    if content is None:
+        return None
+    # Every row still holds plain text here, even one starting with the marker
+    text = content if isinstance(content, str) else bytes(content).decode('utf-8')
+    stored = compress_text(text)
+    # Rows that stay plain are left as they are
+    return stored if stored != text.encode('utf-8') else None
+
+
+def _decompress_to(as_text):
+    def decode(content):
+        if content is None or isinstance(content, str):
+            return None
+        if not as_text and not bytes(content).startswith(MARKER):
+            return None  # already plain UTF-8
+        text = decompress_text(content)
+        return text if as_text else text.encode('utf-8')
+    return decode
+
+
+def upgrade():
+    connection = op.get_bind()
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('content', existing_type=sa.Text(), type_=sa.LargeBinary(),
+                                  existing_nullable=False,
+                                  postgresql_using="convert_to(content, 'UTF8')")
+        _rewrite(connection, table, _compress, sa.LargeBinary())
+
+
+def downgrade():
+    connection = op.get_bind()
+    sqlite = connection.dialect.name == 'sqlite'
+    for table in reversed(TABLES):
+        # SQLite keeps the storage class each value was written with, so write text there
+        _rewrite(connection, table, _decompress_to(sqlite), sa.Text() if sqlite else sa.LargeBinary())
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('content', existing_type=sa.LargeBinary(), type_=sa.Text(),
+                                  existing_nullable=False,
+                                  postgresql_using="convert_from(content, 'UTF8')")
@@ -0,0 +1,29 @@
+"""add file path indexes
+
+Revision ID: c4a8e2f6b0d3
+Revises: b6e2d8f0a4c1
+Create Date: 2026-10-18 22:41:05.377920
+
+The upload garbage collector streams referenced paths in order, a batch at
+a time; these indexes make each batch a range scan.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a8e2f6b0d3'
+down_revision = 'b6e2d8f0a4c1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_report_file_path', 'report', ['file_path'], unique=False)
+    op.create_index('ix_report_archive_file_path', 'report_archive', ['file_path'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_report_archive_file_path', table_name='report_archive')
+    op.drop_index('ix_report_file_path', table_name='report')
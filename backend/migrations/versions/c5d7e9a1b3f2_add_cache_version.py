@@ -0,0 +1,30 @@
+"""add cache version
+
+Revision ID: c5d7e9a1b3f2
+Revises: a81c4e2f9d03
+Create Date: 2026-10-18 16:40:09.724415
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d7e9a1b3f2'
+down_revision = 'a81c4e2f9d03'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    cache_version = op.create_table('cache_version',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(cache_version, [{'name': 'supervision', 'version': 1}])
+
+
+def downgrade():
+    op.drop_table('cache_version')
@@ -0,0 +1,26 @@
+"""add activity indexes
+
+Revision ID: d2b8f4c6a0e1
+Revises: c5d7e9a1b3f2
+Create Date: 2026-10-18 17:25:41.302117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2b8f4c6a0e1'
+down_revision = 'c5d7e9a1b3f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_report_student_submission', 'report', ['student_id', 'submission_date'], unique=False)
+    op.create_index('ix_evaluation_student_submission', 'evaluation', ['student_id', 'submission_date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_evaluation_student_submission', table_name='evaluation')
+    op.drop_index('ix_report_student_submission', table_name='report')
@@ -0,0 +1,31 @@
+"""add school coordinates
+
+Revision ID: d7b1f9c3e5a8
+Revises: a9d3f5b7c1e2
+Create Date: 2026-10-19 11:03:27.640915
+
+Latitude and longitude of a school's address, used to plan lecturers'
+visits. Schools without them are placed by city.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7b1f9c3e5a8'
+down_revision = 'a9d3f5b7c1e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('school') as batch_op:
+        batch_op.add_column(sa.Column('latitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('longitude', sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('school') as batch_op:
+        batch_op.drop_column('longitude')
+        batch_op.drop_column('latitude')
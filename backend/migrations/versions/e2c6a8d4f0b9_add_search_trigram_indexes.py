@@ -0,0 +1,37 @@
+"""add search trigram indexes
+
+Revision ID: e2c6a8d4f0b9
+Revises: d7b1f9c3e5a8
+Create Date: 2026-10-19 14:26:51.203774
+
+Trigram indexes for the LIKE '%...%' filters of the database search
+fallback. They need PostgreSQL's pg_trgm; other databases skip them.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2c6a8d4f0b9'
+down_revision = 'd7b1f9c3e5a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Same expressions as backend.utils.search.search_database
+    op.execute("CREATE INDEX ix_user_search_trgm ON \"user\" USING gin "
+               "(lower(first_name || ' ' || last_name || ' ' || username || ' ' || email) gin_trgm_ops)")
+    op.execute("CREATE INDEX ix_school_search_trgm ON school USING gin "
+               "(lower(name || ' ' || city || ' ' || state) gin_trgm_ops)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('DROP INDEX IF EXISTS ix_school_search_trgm')
+    op.execute('DROP INDEX IF EXISTS ix_user_search_trgm')
@@ -0,0 +1,171 @@
+"""add session partitioning
+
+Revision ID: e7f1a3b5c9d2
+Revises: d2b8f4c6a0e1
+Create Date: 2026-10-18 18:52:13.640981
+
+Reports and evaluations get the session whose dates cover their submission
+or visit date, else the active session, as session_for_date() does.
+Assignments carry no dates, so each one goes to the session of the
+student's latest report or evaluation, else the active session. If records
+need the active session but there is none, one covering all of them is
+created first.
+
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7f1a3b5c9d2'
+down_revision = 'd2b8f4c6a0e1'
+branch_labels = None
+depends_on = None
+
+SESSION_FOR_DATE = (
+    'SELECT s.id FROM teaching_practice_session s '
+    'WHERE {date} >= s.start_date AND {date} <= s.end_date '
+    'ORDER BY s.start_date DESC LIMIT 1'
+)
+
+LATEST_SESSION_OF_STUDENT = (
+    'COALESCE('
+    '(SELECT r.session_id FROM report r WHERE r.student_id = old.student_id '
+    'AND r.session_id IS NOT NULL ORDER BY r.submission_date DESC LIMIT 1), '
+    '(SELECT e.session_id FROM evaluation e WHERE e.student_id = old.student_id '
+    'AND e.session_id IS NOT NULL ORDER BY e.visit_date DESC LIMIT 1), '
+    ':active_session_id)'
+)
+
+
+def _active_session_id(connection):
+    now = datetime.utcnow()
+    return connection.execute(sa.text(
+        'SELECT id FROM teaching_practice_session '
+        'WHERE status = :ongoing OR start_date <= :now '
+        'ORDER BY CASE WHEN status = :ongoing THEN 0 '
+        'WHEN start_date <= :now AND end_date >= :now THEN 1 ELSE 2 END, start_date DESC '
+        'LIMIT 1'), {'ongoing': 'ongoing', 'now': now}).scalar()
+
+
+def _fallback_session_id(connection):
+    """The active session, created if records need one and there is none."""
+    session_id = _active_session_id(connection)
+    if session_id is not None:
+        return session_id
+
+    needs_session = any(connection.execute(sa.text(query)).scalar() for query in (
+        'SELECT COUNT(*) FROM report WHERE session_id IS NULL',
+        'SELECT COUNT(*) FROM evaluation WHERE session_id IS NULL',
+        'SELECT COUNT(*) FROM student_school',
+        'SELECT COUNT(*) FROM lecturer_student',
+    ))
+    if not needs_session:
+        return None
+
+    now = datetime.utcnow()
+    earliest = connection.execute(sa.text(
+        'SELECT MIN(d) FROM (SELECT MIN(submission_date) AS d FROM report '
+        'UNION ALL SELECT MIN(visit_date) FROM evaluation) dates')).scalar()
+    if isinstance(earliest, str):
+        earliest = datetime.fromisoformat(earliest)
+    start = min(earliest or now, now)
+    connection.execute(sa.text(
+        'INSERT INTO teaching_practice_session '
+        '(title, start_date, end_date, description, status, created_at, updated_at) '
+        'VALUES (:title, :start, :end, :description, :status, :now, :now)'), {
+            'title': 'Teaching Practice',
+            'start': start,
+            'end': now + timedelta(days=90),
+            'description': 'Created to hold records from before sessions were tracked',
+            'status': 'ongoing',
+            'now': now,
+        })
+    return _active_session_id(connection)
+
+
+def _rebuild_association(connection, name, columns, with_session, fallback_session_id=None):
+    """Recreate an association table with or without session_id in its key."""
+    key_columns = list(columns)
+    table_columns = [sa.Column(column, sa.Integer(), nullable=False) for column in columns]
+    foreign_keys = [sa.ForeignKeyConstraint([column], [target])
+                    for column, target in columns.items()]
+    if with_session:
+        key_columns.insert(1, 'session_id')
+        table_columns.insert(1, sa.Column('session_id', sa.Integer(), nullable=False))
+        foreign_keys.append(sa.ForeignKeyConstraint(['session_id'], ['teaching_practice_session.id']))
+
+    op.create_table(f'{name}_new', *table_columns, *foreign_keys, sa.PrimaryKeyConstraint(*key_columns))
+
+    names = ', '.join(columns)
+    if with_session:
+        connection.execute(sa.text(
+            f'INSERT INTO {name}_new ({names}, session_id) '
+            f'SELECT {names}, {LATEST_SESSION_OF_STUDENT} FROM {name} old'),
+            {'active_session_id': fallback_session_id})
+    else:
+        connection.execute(sa.text(
+            f'INSERT INTO {name}_new ({names}) SELECT DISTINCT {names} FROM {name}'))
+
+    op.drop_table(name)
+    op.rename_table(f'{name}_new', name)
+
+
+def upgrade():
+    connection = op.get_bind()
+
+    for table in ('report', 'evaluation'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('session_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key(f'fk_{table}_session_id', 'teaching_practice_session',
+                                        ['session_id'], ['id'])
+
+    # Backfill by date range, then records outside every session go to the
+    # active one
+    connection.execute(sa.text(
+        'UPDATE report SET session_id = (%s)' % SESSION_FOR_DATE.format(date='report.submission_date')))
+    connection.execute(sa.text(
+        'UPDATE evaluation SET session_id = (%s)' % SESSION_FOR_DATE.format(date='evaluation.visit_date')))
+    fallback_session_id = _fallback_session_id(connection)
+    for table in ('report', 'evaluation'):
+        connection.execute(sa.text(f'UPDATE {table} SET session_id = :session_id WHERE session_id IS NULL'),
+                           {'session_id': fallback_session_id})
+
+    op.create_index('ix_report_session_student', 'report',
+                    ['session_id', 'student_id', 'submission_date'], unique=False)
+    op.create_index('ix_evaluation_session_student', 'evaluation',
+                    ['session_id', 'student_id', 'submission_date'], unique=False)
+
+    _rebuild_association(connection, 'student_school',
+                         {'student_id': 'user.id', 'school_id': 'school.id'}, with_session=True,
+                         fallback_session_id=fallback_session_id)
+    op.create_index('ix_student_school_school', 'student_school', ['school_id', 'session_id'], unique=False)
+
+    _rebuild_association(connection, 'lecturer_student',
+                         {'lecturer_id': 'user.id', 'student_id': 'user.id'}, with_session=True,
+                         fallback_session_id=fallback_session_id)
+    op.create_index('ix_lecturer_student_student', 'lecturer_student', ['student_id', 'session_id'], unique=False)
+
+    # Cached supervision sets are now keyed by session
+    connection.execute(sa.text(
+        "UPDATE cache_version SET version = version + 1 WHERE name = 'supervision'"))
+
+
+def downgrade():
+    connection = op.get_bind()
+
+    op.drop_index('ix_lecturer_student_student', table_name='lecturer_student')
+    _rebuild_association(connection, 'lecturer_student',
+                         {'lecturer_id': 'user.id', 'student_id': 'user.id'}, with_session=False)
+    op.drop_index('ix_student_school_school', table_name='student_school')
+    _rebuild_association(connection, 'student_school',
+                         {'student_id': 'user.id', 'school_id': 'school.id'}, with_session=False)
+
+    op.drop_index('ix_evaluation_session_student', table_name='evaluation')
+    op.drop_index('ix_report_session_student', table_name='report')
+    for table in ('evaluation', 'report'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_constraint(f'fk_{table}_session_id', type_='foreignkey')
+            batch_op.drop_column('session_id')
@@ -0,0 +1,92 @@
+"""add archive tables
+
+Revision ID: f3c9a7e1b5d4
+Revises: e7f1a3b5c9d2
+Create Date: 2026-10-18 20:14:37.208115
+
+Completed sessions are moved out of the hot tables by backend.archive. The
+archive tables mirror report, evaluation and notification without foreign
+keys; notification_archive also records the session it was moved with.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c9a7e1b5d4'
+down_revision = 'e7f1a3b5c9d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('teaching_practice_session') as batch_op:
+        batch_op.add_column(sa.Column('archived_at', sa.DateTime(), nullable=True))
+
+    op.create_table('report_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=100), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('report_type', sa.String(length=50), nullable=True),
+    sa.Column('file_path', sa.String(length=255), nullable=True),
+    sa.Column('submission_date', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('session_id', sa.Integer(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_report_archive_session_student', 'report_archive',
+                    ['session_id', 'student_id', 'submission_date'], unique=False)
+    op.create_index('ix_report_archive_student_submission', 'report_archive',
+                    ['student_id', 'submission_date'], unique=False)
+
+    op.create_table('evaluation_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('lecturer_id', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('visit_date', sa.DateTime(), nullable=False),
+    sa.Column('teaching_skills', sa.Integer(), nullable=True),
+    sa.Column('classroom_management', sa.Integer(), nullable=True),
+    sa.Column('lesson_preparation', sa.Integer(), nullable=True),
+    sa.Column('professionalism', sa.Integer(), nullable=True),
+    sa.Column('comments', sa.Text(), nullable=True),
+    sa.Column('overall_grade', sa.String(length=2), nullable=True),
+    sa.Column('submission_date', sa.DateTime(), nullable=True),
+    sa.Column('session_id', sa.Integer(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_evaluation_archive_session_student', 'evaluation_archive',
+                    ['session_id', 'student_id', 'submission_date'], unique=False)
+    op.create_index('ix_evaluation_archive_student_submission', 'evaluation_archive',
+                    ['student_id', 'submission_date'], unique=False)
+
+    op.create_table('notification_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=100), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('is_read', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.Column('session_id', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_notification_archive_user_created', 'notification_archive',
+                    ['user_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_notification_archive_user_created', table_name='notification_archive')
+    op.drop_table('notification_archive')
+    op.drop_index('ix_evaluation_archive_student_submission', table_name='evaluation_archive')
+    op.drop_index('ix_evaluation_archive_session_student', table_name='evaluation_archive')
+    op.drop_table('evaluation_archive')
+    op.drop_index('ix_report_archive_student_submission', table_name='report_archive')
+    op.drop_index('ix_report_archive_session_student', table_name='report_archive')
+    op.drop_table('report_archive')
+
+    with op.batch_alter_table('teaching_practice_session') as batch_op:
+        batch_op.drop_column('archived_at')
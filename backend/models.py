@@ -1,16 +1,23 @@
 from backend.app import db
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from backend.utils.column_types import CompressedText
+from backend.utils.passwords import hash_password, verify_password, needs_rehash
+from backend.utils.previews import VARIANTS, variant_state
 
-# Association tables for many-to-many relationships
+# Association tables for many-to-many relationships, one set of
+# assignments per teaching practice session
 student_school = db.Table('student_school',
     db.Column('student_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
-    db.Column('school_id', db.Integer, db.ForeignKey('school.id'), primary_key=True)
+    db.Column('session_id', db.Integer, db.ForeignKey('teaching_practice_session.id'), primary_key=True),
+    db.Column('school_id', db.Integer, db.ForeignKey('school.id'), primary_key=True),
+    db.Index('ix_student_school_school', 'school_id', 'session_id')
 )
 
 lecturer_student = db.Table('lecturer_student',
     db.Column('lecturer_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
-    db.Column('student_id', db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    db.Column('session_id', db.Integer, db.ForeignKey('teaching_practice_session.id'), primary_key=True),
+    db.Column('student_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
+    db.Index('ix_lecturer_student_student', 'student_id', 'session_id')
 )
 
 class User(db.Model):
@@ -26,10 +33,12 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # Role-specific relationships
+    # Role-specific relationships, across every session. Assignments are
+    # written with their session through backend.utils.sessions
     # For students
-    assigned_schools = db.relationship('School', secondary=student_school, backref=db.backref('assigned_students', lazy='dynamic'))
-    supervisors = db.relationship('User', secondary=lecturer_student, 
+    assigned_schools = db.relationship('School', secondary=student_school, viewonly=True,
+                                       backref=db.backref('assigned_students', lazy='dynamic'))
+    supervisors = db.relationship('User', secondary=lecturer_student, viewonly=True,
                                  primaryjoin=id==lecturer_student.c.student_id,
                                  secondaryjoin=id==lecturer_student.c.lecturer_id,
                                  backref=db.backref('supervised_students', lazy='dynamic'))
@@ -44,10 +53,13 @@ class User(db.Model):
     
     # Methods
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
         
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        return needs_rehash(self.password_hash)
         
     def to_dict(self):
         return {
@@ -76,6 +88,9 @@ class School(db.Model):
     contact_person = db.Column(db.String(100))
     contact_email = db.Column(db.String(120))
     contact_phone = db.Column(db.String(20))
+    capacity = db.Column(db.Integer)  # students per session, None for no limit
+    latitude = db.Column(db.Float)  # of the address, for visit planning
+    longitude = db.Column(db.Float)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -88,7 +103,10 @@ class School(db.Model):
             'state': self.state,
             'contact_person': self.contact_person,
             'contact_email': self.contact_email,
-            'contact_phone': self.contact_phone
+            'contact_phone': self.contact_phone,
+            'capacity': self.capacity,
+            'latitude': self.latitude,
+            'longitude': self.longitude
         }
 
     def __repr__(self):
@@ -100,23 +118,39 @@ class Report(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     title = db.Column(db.String(100), nullable=False)
-    content = db.Column(db.Text, nullable=False)
+    content = db.Column(CompressedText(), nullable=False)  # zlib-compressed above 1 KB
     report_type = db.Column(db.String(50))  # e.g., 'daily', 'weekly', 'lesson_plan'
     file_path = db.Column(db.String(255))  # Path to uploaded file
     submission_date = db.Column(db.DateTime, default=datetime.utcnow)
     status = db.Column(db.String(20), default='submitted')  # e.g., 'submitted', 'reviewed'
+    session_id = db.Column(db.Integer, db.ForeignKey('teaching_practice_session.id'))
     
-    def to_dict(self):
-        return {
+    # Per-student listings and the lecturer activity feed, newest first,
+    # across all sessions or within one
+    __table_args__ = (
+        db.Index('ix_report_student_submission', 'student_id', 'submission_date'),
+        db.Index('ix_report_session_student', 'session_id', 'student_id', 'submission_date'),
+        db.Index('ix_report_file_path', 'file_path'),  # upload garbage collection
+    )
+    
+    def to_dict(self, include_content=True):
+        data = {
             'id': self.id,
             'student_id': self.student_id,
             'title': self.title,
-            'content': self.content,
             'report_type': self.report_type,
             'file_path': self.file_path,
             'submission_date': self.submission_date.isoformat() if self.submission_date else None,
-            'status': self.status
+            'status': self.status,
+            'session_id': self.session_id
         }
+        # Copies that exist or that the background job is making
+        for variant in VARIANTS:
+            if variant_state(self.file_path, variant):
+                data[f'{variant}_url'] = f'/api/files/reports/{self.id}/{variant}'
+        if include_content:
+            data['content'] = self.content
+        return data
 
     def __repr__(self):
         return f'<Report {self.title}>'
@@ -135,6 +169,12 @@ class Evaluation(db.Model):
     comments = db.Column(db.Text)
     overall_grade = db.Column(db.String(2))  # e.g., 'A', 'B+', 'C'
     submission_date = db.Column(db.DateTime, default=datetime.utcnow)
+    session_id = db.Column(db.Integer, db.ForeignKey('teaching_practice_session.id'))
+    
+    __table_args__ = (
+        db.Index('ix_evaluation_student_submission', 'student_id', 'submission_date'),
+        db.Index('ix_evaluation_session_student', 'session_id', 'student_id', 'submission_date'),
+    )
     
     # Relationship with the evaluated student
     student = db.relationship('User', foreign_keys=[student_id])
@@ -151,7 +191,8 @@ class Evaluation(db.Model):
             'professionalism': self.professionalism,
             'comments': self.comments,
             'overall_grade': self.overall_grade,
-            'submission_date': self.submission_date.isoformat() if self.submission_date else None
+            'submission_date': self.submission_date.isoformat() if self.submission_date else None,
+            'session_id': self.session_id
         }
 
     def __repr__(self):
@@ -166,6 +207,7 @@ class TeachingPracticeSession(db.Model):
     end_date = db.Column(db.DateTime, nullable=False)
     description = db.Column(db.Text)
     status = db.Column(db.String(20), default='upcoming')  # 'upcoming', 'ongoing', 'completed'
+    archived_at = db.Column(db.DateTime)  # set once its records are moved to the archive tables
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -176,7 +218,8 @@ class TeachingPracticeSession(db.Model):
             'start_date': self.start_date.isoformat() if self.start_date else None,
             'end_date': self.end_date.isoformat() if self.end_date else None,
             'description': self.description,
-            'status': self.status
+            'status': self.status,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
         }
 
     def __repr__(self):
@@ -206,4 +249,58 @@ class Notification(db.Model):
         }
 
     def __repr__(self):
-        return f'<Notification {self.title}>'
\ No newline at end of file
+        return f'<Notification {self.title}>'
+
+
+class RefreshToken(db.Model):
+    """Issued refresh tokens, tracked so they can be rotated and revoked."""
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False)
+    family_id = db.Column(db.String(36), nullable=False, index=True)  # shared by every rotation of one login
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    used_at = db.Column(db.DateTime)  # set when exchanged for a new token
+    revoked_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<RefreshToken {self.jti}>'
+
+
+class CacheVersion(db.Model):
+    """Version stamps that tell every worker when a cached structure is stale."""
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<CacheVersion {self.name}={self.version}>'
+
+
+def archive_table(model, *extra):
+    """Cold copy of a model's table, without foreign keys, for completed sessions."""
+    columns = [db.Column(column.name, column.type, primary_key=column.primary_key,
+                         nullable=column.nullable)
+               for column in model.__table__.columns]
+    return db.Table(f'{model.__tablename__}_archive', *columns,
+                    db.Column('archived_at', db.DateTime, nullable=False), *extra)
+
+
+# Records of completed teaching practice sessions, moved out of the hot
+# tables by backend.archive. Rows keep their original ids.
+report_archive = archive_table(Report,
+    db.Index('ix_report_archive_session_student', 'session_id', 'student_id', 'submission_date'),
+    db.Index('ix_report_archive_student_submission', 'student_id', 'submission_date'),
+    db.Index('ix_report_archive_file_path', 'file_path')
+)
+
+evaluation_archive = archive_table(Evaluation,
+    db.Index('ix_evaluation_archive_session_student', 'session_id', 'student_id', 'submission_date'),
+    db.Index('ix_evaluation_archive_student_submission', 'student_id', 'submission_date')
+)
+
+# Notifications carry no session, so the archive records the one they were moved with
+notification_archive = archive_table(Notification,
+    db.Column('session_id', db.Integer),
+    db.Index('ix_notification_archive_user_created', 'user_id', 'created_at')
+)
@@ -0,0 +1,147 @@
+"""
+Import-time profile of application start-up.
+
+Boots the app in fresh interpreters, once the eager way (development) and
+once the lazy way (production), and reports cold start times together with
+the slowest imports recorded by ``python -X importtime``.
+
+The target is a lazy boot at most half as long as the eager one. It is not
+met: the lazy boot still imports Flask and the extensions ``create_app``
+sets up, and those imports alone take 55-60% of the eager boot. The
+report prints that floor next to the ratio.
+
+    python -m backend.profile_startup [--top 20]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BOOT_SCRIPT = """
+import time
+start = time.perf_counter()
+from backend.app import create_app
+app = create_app({config!r})
+print('create_app_ms=%.3f' % ((time.perf_counter() - start) * 1000))
+"""
+
+# What any boot pays before create_app does its own work
+FRAMEWORK_SCRIPT = """
+import time
+start = time.perf_counter()
+import flask, flask_sqlalchemy, flask_jwt_extended, flask_cors
+print('create_app_ms=%.3f' % ((time.perf_counter() - start) * 1000))
+"""
+
+TARGET_RATIO = 0.5  # lazy boot against eager
+
+
+def boot(config, importtime=False, script=BOOT_SCRIPT):
+    """
+    Boot the app in a child interpreter
+
+    Args:
+        config (dict): Configuration passed to create_app
+        importtime (bool): Whether to record import times
+        script (str): Code to time, BOOT_SCRIPT or FRAMEWORK_SCRIPT
+
+    Returns:
+        tuple: (process wall time in ms, create_app time in ms, stderr text)
+    """
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-c', script.format(config=config)]
+
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=PROJECT_ROOT, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    create_ms = 0.0
+    for line in result.stdout.splitlines():
+        if line.startswith('create_app_ms='):
+            create_ms = float(line.split('=', 1)[1])
+
+    return wall_ms, create_ms, result.stderr
+
+
+def parse_importtime(stderr):
+    """
+    Parse ``-X importtime`` output
+
+    Args:
+        stderr (str): Standard error of the profiled interpreter
+
+    Returns:
+        list: (module, self_us, cumulative_us) tuples
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        entries.append((module.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--top', type=int, default=20, help='number of imports to list')
+    parser.add_argument('--runs', type=int, default=5, help='boots per mode (median is reported)')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = {
+            'SECRET_KEY': 'profile',
+            'JWT_SECRET_KEY': 'profile',
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmp, 'profile.db'),
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        }
+        modes = [
+            ('eager', dict(base, AUTO_CREATE_TABLES=True, LAZY_BLUEPRINTS=False)),
+            ('lazy', dict(base, AUTO_CREATE_TABLES=False, LAZY_BLUEPRINTS=True)),
+        ]
+
+        results = {}
+        for name, config in modes:
+            boots = [boot(config) for _ in range(args.runs)]
+            results[name] = (median(b[0] for b in boots), median(b[1] for b in boots))
+        boots = [boot({}, script=FRAMEWORK_SCRIPT) for _ in range(args.runs)]
+        framework_ms = median(b[1] for b in boots)
+
+        _, _, stderr = boot(modes[1][1], importtime=True)
+
+    print('Cold start (median of %d)' % args.runs)
+    print('  %-6s %12s %14s' % ('mode', 'process ms', 'create_app ms'))
+    for name, (wall_ms, create_ms) in results.items():
+        print('  %-6s %12.1f %14.1f' % (name, wall_ms, create_ms))
+    eager_ms, lazy_ms = results['eager'][1], results['lazy'][1]
+    print('  framework imports %.1f ms (flask, flask_sqlalchemy, flask_jwt_extended, flask_cors)' % framework_ms)
+    if eager_ms:
+        ratio = lazy_ms / eager_ms
+        print('  lazy boot is %.0f%% of eager; target %.0f%%, %s' % (
+            ratio * 100, TARGET_RATIO * 100, 'met' if ratio <= TARGET_RATIO else 'missed'))
+        print('  the framework imports alone are %.0f%% of eager' % (framework_ms / eager_ms * 100))
+
+    entries = parse_importtime(stderr)
+    print()
+    print('Slowest imports in the lazy boot (cumulative)')
+    print('  %10s %10s  %s' % ('self us', 'cumul us', 'module'))
+    for module, self_us, cumulative_us in sorted(entries, key=lambda e: e[2], reverse=True)[:args.top]:
+        print('  %10d %10d  %s' % (self_us, cumulative_us, module))
+
+
+if __name__ == '__main__':
+    main()
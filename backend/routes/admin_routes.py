@@ -1,7 +1,21 @@
+from collections import Counter
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from backend.models import User, School, TeachingPracticeSession, db
-from services.admin_service import validate_user_update, validate_school, validate_teaching_session
+from sqlalchemy import exists
+from backend.models import (User, School, Report, Evaluation, Notification, TeachingPracticeSession,
+                            student_school, report_archive, evaluation_archive, notification_archive, db)
+from backend.services.auth_service import revoke_user_tokens
+from backend.utils.archive import hot_and_archived, row_to_dict
+from backend.utils.pagination import keyset_page, page_size
+from backend.utils.placement import plan_session_placements
+from backend.utils.response_cache import cached_response
+from backend.utils.search import DEFAULT_LIMIT, MAX_LIMIT, search_database, search_enabled, search_index
+from backend.utils.sessions import (active_session_id, assign_school, assign_schools, assign_supervisor,
+                                    default_session_id, has_sessions, requested_session_id)
+from backend.utils.supervision import supervises
+from backend.utils.validators import to_datetime
+from services.admin_service import (validate_user_update, validate_school, validate_school_update,
+                                    validate_teaching_session)
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -41,6 +55,45 @@ def get_users():
     return jsonify({'users': [user.to_dict() for user in users]}), 200
 
 
+@admin_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search_users_and_schools():
+    """
+    Typeahead search over users and schools
+
+    Query parameters:
+        q: what the user typed; every word must start a word of the result
+        type: 'user' or 'school' (default: both)
+        role: only users with this role
+        active: 'true' to skip deactivated users
+        limit: most results (default 10, at most 50)
+    """
+    current_user = admin_required()
+    if not current_user:
+        return jsonify({'error': 'Admin privileges required'}), 403
+    
+    text = request.args.get('q', '')
+    kind = request.args.get('type')
+    if kind not in (None, 'user', 'school'):
+        return jsonify({'error': "type must be 'user' or 'school'"}), 400
+    try:
+        limit = max(1, min(int(request.args.get('limit', DEFAULT_LIMIT)), MAX_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    options = {
+        'kind': kind,
+        'role': request.args.get('role'),
+        'active_only': request.args.get('active', 'false').lower() == 'true',
+        'limit': limit
+    }
+    
+    if search_enabled():
+        results = search_index.search(db.session, text, **options)
+    else:
+        results = search_database(text, **options)
+    return jsonify({'results': results}), 200
+
+
 @admin_bp.route('/users/<int:user_id>', methods=['GET'])
 @jwt_required()
 def get_user(user_id):
@@ -84,6 +137,8 @@ def update_user(user_id):
         user.last_name = data['last_name']
     if 'is_active' in data:
         user.is_active = data['is_active']
+        if not user.is_active:
+            revoke_user_tokens(user.id)
     
     try:
         db.session.commit()
@@ -112,7 +167,9 @@ def deactivate_user(user_id):
     if user.id == current_user.id:
         return jsonify({'error': 'Cannot deactivate your own account'}), 400
     
+    # Deactivated users cannot renew their tokens
     user.is_active = False
+    revoke_user_tokens(user.id)
     
     try:
         db.session.commit()
@@ -158,7 +215,10 @@ def create_school():
         state=data['state'],
         contact_person=data.get('contact_person', ''),
         contact_email=data.get('contact_email', ''),
-        contact_phone=data.get('contact_phone', '')
+        contact_phone=data.get('contact_phone', ''),
+        capacity=int(data['capacity']) if data.get('capacity') is not None else None,
+        latitude=data.get('latitude'),
+        longitude=data.get('longitude')
     )
     
     try:
@@ -187,6 +247,11 @@ def update_school(school_id):
     
     data = request.get_json()
     
+    # Validate the update data
+    validation_result = validate_school_update(data)
+    if validation_result['error']:
+        return jsonify({'error': validation_result['message']}), 400
+    
     # Update school attributes
     if 'name' in data:
         school.name = data['name']
@@ -202,6 +267,12 @@ def update_school(school_id):
         school.contact_email = data['contact_email']
     if 'contact_phone' in data:
         school.contact_phone = data['contact_phone']
+    if 'capacity' in data:
+        school.capacity = int(data['capacity']) if data['capacity'] is not None else None
+    if 'latitude' in data:
+        school.latitude = data['latitude']
+    if 'longitude' in data:
+        school.longitude = data['longitude']
     
     try:
         db.session.commit()
@@ -239,6 +310,14 @@ def delete_school(school_id):
         return jsonify({'error': str(e)}), 500
 
 
+# Helper function to read the session an assignment is for
+def assignment_session(data):
+    if data.get('session_id'):
+        session = TeachingPracticeSession.query.get(data['session_id'])
+        return session.id if session else None
+    return default_session_id()
+
+
 # Teaching Practice Session Management
 @admin_bp.route('/sessions', methods=['GET'])
 @jwt_required()
@@ -249,7 +328,10 @@ def get_sessions():
         return jsonify({'error': 'Admin privileges required'}), 403
     
     sessions = TeachingPracticeSession.query.all()
-    return jsonify({'sessions': [session.to_dict() for session in sessions]}), 200
+    return jsonify({
+        'sessions': [session.to_dict() for session in sessions],
+        'active_session_id': active_session_id()
+    }), 200
 
 
 @admin_bp.route('/sessions', methods=['POST'])
@@ -270,8 +352,8 @@ def create_session():
     # Create a new session
     new_session = TeachingPracticeSession(
         title=data['title'],
-        start_date=data['start_date'],
-        end_date=data['end_date'],
+        start_date=to_datetime(data['start_date']),
+        end_date=to_datetime(data['end_date']),
         description=data.get('description', ''),
         status=data.get('status', 'upcoming')
     )
@@ -288,11 +370,143 @@ def create_session():
         return jsonify({'error': str(e)}), 500
 
 
+# Helper function to read an optional integer filter
+def int_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be an integer')
+
+
+# Record queries. Completed sessions may have been moved to the archive
+# tables (python -m backend.archive); these read both transparently.
+@admin_bp.route('/reports', methods=['GET'])
+@jwt_required()
+def get_reports():
+    """
+    List reports, newest first, including archived ones
+
+    Query parameters:
+        session_id: a session id or 'all' (default: the active session)
+        student_id: only this student's reports
+        include_content: 'true' to include report bodies
+        limit, cursor: keyset pagination
+    """
+    current_user = admin_required()
+    if not current_user:
+        return jsonify({'error': 'Admin privileges required'}), 403
+    
+    try:
+        session_id = requested_session_id(request.args)
+        student_id = int_arg('student_id')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    include_content = request.args.get('include_content', 'false').lower() == 'true'
+    
+    def criteria(table):
+        clauses = []
+        if session_id is not None:
+            clauses.append(table.c.session_id == session_id)
+        if student_id is not None:
+            clauses.append(table.c.student_id == student_id)
+        return clauses
+    
+    reports = hot_and_archived(Report.__table__, report_archive, criteria,
+                               exclude=() if include_content else ('content',))
+    try:
+        rows, next_cursor = keyset_page(db.session.query(reports), reports.c.submission_date,
+                                        reports.c.id, request.args.get('cursor'),
+                                        page_size(request.args))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'reports': [row_to_dict(Report, row, include_content=include_content) for row in rows],
+        'cursor': next_cursor
+    }), 200
+
+
+@admin_bp.route('/evaluations', methods=['GET'])
+@jwt_required()
+def get_evaluations():
+    """
+    List evaluations, newest first, including archived ones
+
+    Query parameters:
+        session_id: a session id or 'all' (default: the active session)
+        student_id, lecturer_id: only evaluations of this student or by this lecturer
+        limit, cursor: keyset pagination
+    """
+    current_user = admin_required()
+    if not current_user:
+        return jsonify({'error': 'Admin privileges required'}), 403
+    
+    try:
+        session_id = requested_session_id(request.args)
+        student_id = int_arg('student_id')
+        lecturer_id = int_arg('lecturer_id')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    def criteria(table):
+        clauses = []
+        if session_id is not None:
+            clauses.append(table.c.session_id == session_id)
+        if student_id is not None:
+            clauses.append(table.c.student_id == student_id)
+        if lecturer_id is not None:
+            clauses.append(table.c.lecturer_id == lecturer_id)
+        return clauses
+    
+    evaluations = hot_and_archived(Evaluation.__table__, evaluation_archive, criteria)
+    try:
+        rows, next_cursor = keyset_page(db.session.query(evaluations), evaluations.c.submission_date,
+                                        evaluations.c.id, request.args.get('cursor'),
+                                        page_size(request.args))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'evaluations': [row_to_dict(Evaluation, row) for row in rows],
+        'cursor': next_cursor
+    }), 200
+
+
+@admin_bp.route('/users/<int:user_id>/notifications', methods=['GET'])
+@jwt_required()
+def get_user_notifications(user_id):
+    """List a user's notifications, newest first, including archived ones"""
+    current_user = admin_required()
+    if not current_user:
+        return jsonify({'error': 'Admin privileges required'}), 403
+    
+    user = User.query.get(user_id)
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
+    notifications = hot_and_archived(Notification.__table__, notification_archive,
+                                     lambda table: [table.c.user_id == user.id])
+    try:
+        rows, next_cursor = keyset_page(db.session.query(notifications), notifications.c.created_at,
+                                        notifications.c.id, request.args.get('cursor'),
+                                        page_size(request.args))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'notifications': [row_to_dict(Notification, row) for row in rows],
+        'cursor': next_cursor
+    }), 200
+
+
 # Student Assignment Management
 @admin_bp.route('/assign-school', methods=['POST'])
 @jwt_required()
 def assign_school_to_student():
-    """Assign a school to a student"""
+    """Assign a school to a student for a session (default: the active one)"""
     current_user = admin_required()
     if not current_user:
         return jsonify({'error': 'Admin privileges required'}), 403
@@ -309,12 +523,21 @@ def assign_school_to_student():
     if not school:
         return jsonify({'error': 'School not found'}), 404
     
+    session_id = assignment_session(data)
+    if not session_id:
+        return jsonify({'error': 'Teaching practice session not found'}), 404
+    
     # Check if the student is already assigned to this school
-    if school in student.assigned_schools:
+    already_assigned = db.session.query(exists().where(
+        student_school.c.student_id == student.id,
+        student_school.c.school_id == school.id,
+        student_school.c.session_id == session_id
+    )).scalar()
+    if already_assigned:
         return jsonify({'error': 'Student already assigned to this school'}), 400
     
     # Assign the school to the student
-    student.assigned_schools.append(school)
+    assign_school(student.id, school.id, session_id)
     
     try:
         db.session.commit()
@@ -324,10 +547,87 @@ def assign_school_to_student():
         return jsonify({'error': str(e)}), 500
 
 
+# Helper function to describe a placement plan
+def placement_summary(session_id, plan):
+    matches = Counter(match for _, _, match in plan['placements'])
+    schools = Counter(school_id for _, school_id, _ in plan['placements'])
+    return {
+        'session_id': session_id,
+        'placed': len(plan['placements']),
+        'unplaced': plan['unplaced'],
+        'cost': plan['cost'],
+        'matches': dict(matches),
+        'schools': {str(school_id): count for school_id, count in sorted(schools.items())},
+        'placements': [{'student_id': student_id, 'school_id': school_id, 'match': match}
+                       for student_id, school_id, match in plan['placements']]
+    }
+
+
+@admin_bp.route('/placements/preview', methods=['POST'])
+@jwt_required()
+def preview_placements():
+    """Plan school placements for every unplaced student without saving them"""
+    current_user = admin_required()
+    if not current_user:
+        return jsonify({'error': 'Admin privileges required'}), 403
+    
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    
+    # A fresh install has no session to place into yet. The dry run plans
+    # as if nobody were placed rather than create the session it would use.
+    if data.get('session_id') or has_sessions():
+        session_id = assignment_session(data)
+        if not session_id:
+            return jsonify({'error': 'Teaching practice session not found'}), 404
+    else:
+        session_id = None
+    
+    try:
+        plan = plan_session_placements(session_id, data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(placement_summary(session_id, plan)), 200
+
+
+@admin_bp.route('/placements', methods=['POST'])
+@jwt_required()
+def apply_placements():
+    """Place every unplaced student in a school, as the preview would"""
+    current_user = admin_required()
+    if not current_user:
+        return jsonify({'error': 'Admin privileges required'}), 403
+    
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    session_id = assignment_session(data)
+    if not session_id:
+        return jsonify({'error': 'Teaching practice session not found'}), 404
+    
+    try:
+        plan = plan_session_placements(session_id, data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    assign_schools([(student_id, school_id) for student_id, school_id, _ in plan['placements']], session_id)
+    
+    try:
+        db.session.commit()
+        summary = placement_summary(session_id, plan)
+        summary['message'] = f"{summary['placed']} students placed"
+        return jsonify(summary), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
 @admin_bp.route('/assign-lecturer', methods=['POST'])
 @jwt_required()
 def assign_lecturer_to_student():
-    """Assign a lecturer to a student"""
+    """Assign a lecturer to a student for a session (default: the active one)"""
     current_user = admin_required()
     if not current_user:
         return jsonify({'error': 'Admin privileges required'}), 403
@@ -344,12 +644,16 @@ def assign_lecturer_to_student():
     if not lecturer or lecturer.role != 'lecturer':
         return jsonify({'error': 'Lecturer not found'}), 404
     
+    session_id = assignment_session(data)
+    if not session_id:
+        return jsonify({'error': 'Teaching practice session not found'}), 404
+    
     # Check if the lecturer is already assigned to this student
-    if lecturer in student.supervisors:
+    if supervises(lecturer.id, student.id, session_id):
         return jsonify({'error': 'Lecturer already assigned to this student'}), 400
     
     # Assign the lecturer to the student
-    student.supervisors.append(lecturer)
+    assign_supervisor(lecturer.id, student.id, session_id)
     
     try:
         db.session.commit()
@@ -362,6 +666,7 @@ def assign_lecturer_to_student():
 # Dashboard and Reports
 @admin_bp.route('/dashboard', methods=['GET'])
 @jwt_required()
+@cached_response
 def get_dashboard_data():
     """Get dashboard data for admin"""
     current_user = admin_required()
@@ -1,8 +1,11 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from backend.models import User
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+from backend.models import User, RefreshToken
 from backend.app import db
-from backend.services.auth_service import validate_login, validate_registration
+from backend.services.auth_service import (validate_login, issue_tokens, rotate_refresh_token,
+                                           revoke_token_family, revoke_user_tokens)
+from services.auth_service import validate_registration
+from backend.utils.rate_limit import login_rate_limited
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -49,11 +52,14 @@ def register():
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/login', methods=['POST'])
+@login_rate_limited
 def login():
     """
     Authenticate a user and return a JWT token
     """
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'No data provided'}), 400
     
     # Validate the login data - changed to use username instead of email
     validation_result = validate_login(data.get('username'), data.get('password'))
@@ -67,14 +73,56 @@ def login():
     if not user.is_active:
         return jsonify({'error': 'Account is deactivated. Please contact the administrator'}), 403
     
-    # Create access token
-    access_token = create_access_token(identity=user.id)
+    # Create access token and a refresh token for renewing it
+    access_token, refresh_token = issue_tokens(user)
+    
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
     
     return jsonify({
         'access_token': access_token,
+        'refresh_token': refresh_token,
         'user': user.to_dict()
     }), 200
 
+@auth_bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    """
+    Exchange a refresh token for a new access token and refresh token
+    """
+    success, result = rotate_refresh_token(get_jwt()['jti'], get_jwt_identity())
+    if not success:
+        return jsonify({'error': result}), 401
+    
+    user, access_token, refresh_token = result
+    
+    return jsonify({
+        'access_token': access_token,
+        'refresh_token': refresh_token,
+        'user': user.to_dict()
+    }), 200
+
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required(refresh=True)
+def logout():
+    """
+    Revoke the presented refresh token and every token rotated from it
+    """
+    token = RefreshToken.query.filter_by(jti=get_jwt()['jti']).first()
+    if token:
+        revoke_token_family(token.family_id)
+    
+    try:
+        db.session.commit()
+        return jsonify({'message': 'Logged out successfully'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @auth_bp.route('/me', methods=['GET'])
 @jwt_required()
 def get_current_user():
@@ -93,7 +141,8 @@ def get_current_user():
 @jwt_required()
 def change_password():
     """
-    Change the current user's password
+    Change the current user's password, signing out every login and
+    returning a new token pair for this one
     """
     current_user_id = get_jwt_identity()
     user = User.query.get(current_user_id)
@@ -109,12 +158,18 @@ def change_password():
     if not user.check_password(data['current_password']):
         return jsonify({'error': 'Current password is incorrect'}), 401
     
-    # Update password
+    # Update password; refresh tokens issued before the change stop working
     user.set_password(data['new_password'])
+    revoke_user_tokens(user.id)
+    access_token, refresh_token = issue_tokens(user)
     
     try:
         db.session.commit()
-        return jsonify({'message': 'Password updated successfully'}), 200
+        return jsonify({
+            'message': 'Password updated successfully',
+            'access_token': access_token,
+            'refresh_token': refresh_token
+        }), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
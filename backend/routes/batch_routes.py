@@ -0,0 +1,93 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from backend.models import User, db
+
+batch_bp = Blueprint('batch', __name__)
+
+# Largest number of sub-requests accepted in one batch
+MAX_BATCH_REQUESTS = 20
+
+# Endpoints that answer any path and must not serve API sub-requests
+FRONTEND_ENDPOINTS = ('index', 'catch_all', 'static')
+
+
+def dispatch_get(path):
+    """
+    Run a GET request to an API path inside the current request
+
+    The sub-request shares the batch's app context, so it reuses its
+    database session and ``g``: the caller's user comes from the session's
+    identity map, and the active session and version stamps are read once
+    per batch. Request hooks (metrics, query inspection) see the batch as
+    one request.
+
+    Args:
+        path (str): Path under /api/, with an optional query string
+
+    Returns:
+        tuple: (status code, JSON body or None)
+    """
+    app = current_app._get_current_object()
+    headers = {'Authorization': request.headers.get('Authorization', '')}
+    with app.test_request_context(path, method='GET', base_url=request.host_url, headers=headers,
+                                  environ_base={'REMOTE_ADDR': request.remote_addr}):
+        try:
+            if request.routing_exception is not None:
+                raise request.routing_exception
+            if request.url_rule.endpoint in FRONTEND_ENDPOINTS:
+                return 404, {'error': 'Not found'}
+            response = app.make_response(app.dispatch_request())
+        except Exception as e:
+            # Errors with a handler (aborts, JWT errors) answer as usual
+            try:
+                response = app.make_response(app.handle_user_exception(e))
+            except Exception:
+                db.session.rollback()
+                current_app.logger.exception('Batch request to %s failed', path)
+                return 500, {'error': str(e)}
+
+        try:
+            return response.status_code, response.get_json() if response.is_json else None
+        finally:
+            response.close()
+
+
+@batch_bp.route('', methods=['POST'])
+@jwt_required()
+def run_batch():
+    """
+    Run several GET requests in one round trip
+
+    Body: {"requests": [{"path": "/api/student/dashboard"}, ...]}
+        Paths are run in order with the caller's token, and each answer
+        comes back as {"path", "status", "body"} in the same order
+    """
+    data = request.get_json() or {}
+    items = data.get('requests')
+
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'requests must be a non-empty list'}), 400
+    if len(items) > MAX_BATCH_REQUESTS:
+        return jsonify({'error': f'At most {MAX_BATCH_REQUESTS} requests can be batched'}), 400
+
+    paths = []
+    for index, item in enumerate(items):
+        path = item.get('path') if isinstance(item, dict) else None
+        if not isinstance(path, str) or not path.startswith('/api/'):
+            return jsonify({'error': f'requests[{index}].path must be a path under /api/'}), 400
+        if path.split('?', 1)[0].rstrip('/') == request.path.rstrip('/'):
+            return jsonify({'error': 'Batches cannot be nested'}), 400
+        paths.append(path)
+
+    # Holding the user keeps it in the session's identity map, so the role
+    # checks of the sub-requests find it without a query
+    current_user = User.query.get(get_jwt_identity())
+    if not current_user:
+        return jsonify({'error': 'User not found'}), 404
+
+    responses = []
+    for path in paths:
+        status, body = dispatch_get(path)
+        responses.append({'path': path, 'status': status, 'body': body})
+
+    return jsonify({'responses': responses})
@@ -0,0 +1,58 @@
+from flask import Blueprint, jsonify, send_file
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import select
+from backend.models import User, Report, report_archive, db
+from backend.utils.previews import VARIANTS, find_variant, is_image, variant_state
+from backend.utils.supervision import supervises
+
+files_bp = Blueprint('files', __name__)
+
+# Helper function to check who may see a report's attachment
+def can_view_report(user, report):
+    if not user or not user.is_active:
+        return False
+    if user.role == 'admin':
+        return True
+    if user.role == 'student':
+        return report.student_id == user.id
+    if user.role == 'lecturer':
+        return supervises(user.id, report.student_id)
+    return False
+
+
+# Helper function to find a report in the hot table or, once its session is
+# archived, in report_archive, whose rows keep their ids
+def find_report(report_id):
+    report = Report.query.get(report_id)
+    if report is not None:
+        return report
+    return db.session.execute(
+        select(report_archive.c.student_id, report_archive.c.file_path)
+        .where(report_archive.c.id == report_id)).first()
+
+
+@files_bp.route('/reports/<int:report_id>/<variant>', methods=['GET'])
+@jwt_required()
+def get_report_preview(report_id, variant):
+    """Get a downscaled copy (thumbnail or preview) of a report's image attachment"""
+    current_user = User.query.get(get_jwt_identity())
+
+    report = find_report(report_id)
+    if not report or not can_view_report(current_user, report):
+        return jsonify({'error': 'Report not found'}), 404
+
+    if variant not in VARIANTS or not is_image(report.file_path):
+        return jsonify({'error': 'No such preview'}), 404
+
+    path, mimetype = find_variant(report.file_path, variant)
+    if not path:
+        if variant_state(report.file_path, variant) != 'queued':
+            return jsonify({'error': 'No such preview'}), 404
+        # Still being made in the background
+        response = jsonify({'error': 'Preview not ready yet'})
+        response.status_code = 404
+        response.headers['Retry-After'] = '2'
+        return response
+
+    # The URL stays the same when the attachment is replaced, so revalidate
+    return send_file(path, mimetype=mimetype, conditional=True, max_age=0)
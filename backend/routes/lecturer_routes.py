@@ -1,10 +1,21 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from backend.models import User, Evaluation, Report, db
-from datetime import datetime
-from services.lecturer_service import validate_evaluation
+from sqlalchemy import and_, func, literal, or_, select, union_all
+from sqlalchemy.orm import defer
+from backend.models import User, Evaluation, Report, School, lecturer_student, student_school, db
+from backend.utils.pagination import decode_cursor, encode_cursor, keyset_page, page_size
+from backend.utils.response_cache import cached_response
+from backend.utils.sessions import requested_session_id, scoped, session_for_date
+from backend.utils.supervision import supervised_student_ids, supervises
+from backend.utils.trends import evaluation_trend, trend_parameters
+from backend.utils.validators import to_datetime
+from backend.utils.visits import plan_visits, visit_schools
+from services.lecturer_service import validate_evaluation, validate_evaluation_update, validate_evaluations
 import os
 
+DEFAULT_VISITS_PER_DAY = 6
+MAX_VISITS_PER_DAY = 50
+
 lecturer_bp = Blueprint('lecturer', __name__)
 
 # Helper function to check lecturer privileges
@@ -17,6 +28,23 @@ def lecturer_required():
     
     return current_user
 
+# Helper function selecting a lecturer's students in SQL
+def supervised_students(lecturer_id, session_id):
+    """
+    Build a subquery of the ids of the students a lecturer supervises
+    
+    Args:
+        lecturer_id (int): The lecturer's user id
+        session_id (int): Session to look in, None for all sessions
+    
+    Returns:
+        Select of lecturer_student.student_id, for use with in_()
+    """
+    return scoped(
+        select(lecturer_student.c.student_id).where(lecturer_student.c.lecturer_id == lecturer_id),
+        lecturer_student.c.session_id, session_id
+    )
+
 # Get assigned students
 @lecturer_bp.route('/students', methods=['GET'])
 @jwt_required()
@@ -26,8 +54,13 @@ def get_assigned_students():
     if not current_user:
         return jsonify({'error': 'Lecturer privileges required'}), 403
     
-    # Get all students supervised by this lecturer
-    students = current_user.supervised_students.all()
+    try:
+        session_id = requested_session_id(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Get the students supervised by this lecturer in the session
+    students = User.query.filter(User.id.in_(supervised_students(current_user.id, session_id))).all()
     
     return jsonify({
         'students': [student.to_dict() for student in students]
@@ -37,36 +70,163 @@ def get_assigned_students():
 @lecturer_bp.route('/students/<int:student_id>', methods=['GET'])
 @jwt_required()
 def get_student_details(student_id):
-    """Get details of a specific student"""
+    """
+    Get details of a specific student
+
+    Reports and evaluations are embedded one page at a time, newest first.
+    Query parameters:
+        include: comma separated parts to embed, any of schools, reports,
+            evaluations (default) and report_content
+        limit: page size of the embedded collections
+        reports_cursor, evaluations_cursor: continue from a previous page
+        session_id: session to show, 'all' for every session (default: active)
+    """
     current_user = lecturer_required()
     if not current_user:
         return jsonify({'error': 'Lecturer privileges required'}), 403
     
+    include = set(request.args.get('include', 'schools,reports,evaluations').split(','))
+    limit = page_size(request.args)
+    try:
+        session_id = requested_session_id(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     # Verify the student is assigned to this lecturer
-    student = User.query.get(student_id)
-    if not student or student.role != 'student' or current_user not in student.supervisors:
+    if not supervises(current_user.id, student_id, session_id):
         return jsonify({'error': 'Student not found or not assigned to you'}), 404
     
+    # Student and summary figures in one statement
+    own_reports = Report.student_id == User.id
+    own_evaluations = and_(Evaluation.student_id == User.id, Evaluation.lecturer_id == current_user.id)
+    if session_id is not None:
+        own_reports = and_(own_reports, Report.session_id == session_id)
+        own_evaluations = and_(own_evaluations, Evaluation.session_id == session_id)
+    row = db.session.query(
+        User,
+        select(func.count(Report.id)).where(own_reports)
+            .scalar_subquery().label('report_count'),
+        select(func.max(Report.submission_date)).where(own_reports)
+            .scalar_subquery().label('last_report_date'),
+        select(func.count(Evaluation.id)).where(own_evaluations)
+            .scalar_subquery().label('evaluation_count'),
+        select(func.max(Evaluation.visit_date)).where(own_evaluations)
+            .scalar_subquery().label('last_visit_date')
+    ).filter(User.id == student_id, User.role == 'student').first()
+    
+    if not row:
+        return jsonify({'error': 'Student not found or not assigned to you'}), 404
+    
+    student = row.User
+    response = {
+        'student': student.to_dict(),
+        'summary': {
+            'report_count': row.report_count,
+            'last_report_date': row.last_report_date.isoformat() if row.last_report_date else None,
+            'evaluation_count': row.evaluation_count,
+            'last_visit_date': row.last_visit_date.isoformat() if row.last_visit_date else None
+        }
+    }
+    
     # Get student's assigned schools
-    schools = [school.to_dict() for school in student.assigned_schools]
+    if 'schools' in include:
+        schools = scoped(
+            School.query.join(student_school, student_school.c.school_id == School.id)
+                .filter(student_school.c.student_id == student.id),
+            student_school.c.session_id, session_id
+        ).distinct()
+        response['schools'] = [school.to_dict() for school in schools]
     
-    # Get student's reports
-    reports = [report.to_dict() for report in student.reports]
+    try:
+        # Get student's reports, without their bodies unless asked for
+        if 'reports' in include:
+            include_content = 'report_content' in include
+            query = scoped(Report.query.filter_by(student_id=student.id), Report.session_id, session_id)
+            if not include_content:
+                query = query.options(defer(Report.content))
+            reports, response['reports_cursor'] = keyset_page(
+                query, Report.submission_date, Report.id,
+                request.args.get('reports_cursor'), limit
+            )
+            response['reports'] = [report.to_dict(include_content=include_content) for report in reports]
+        
+        # Get evaluations for this student by this lecturer
+        if 'evaluations' in include:
+            evaluations, response['evaluations_cursor'] = keyset_page(
+                scoped(Evaluation.query.filter_by(lecturer_id=current_user.id, student_id=student.id),
+                       Evaluation.session_id, session_id),
+                Evaluation.visit_date, Evaluation.id,
+                request.args.get('evaluations_cursor'), limit
+            )
+            response['evaluations'] = [evaluation.to_dict() for evaluation in evaluations]
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Get evaluations for this student by this lecturer
-    evaluations = Evaluation.query.filter_by(
-        lecturer_id=current_user.id, 
-        student_id=student.id
-    ).all()
-    evaluations = [evaluation.to_dict() for evaluation in evaluations]
+    return jsonify(response), 200
+
+# Score trends of a student's evaluations
+@lecturer_bp.route('/students/<int:student_id>/trend', methods=['GET'])
+@jwt_required()
+@cached_response
+def get_student_trend(student_id):
+    """
+    Get a supervised student's evaluation scores averaged over time
+
+    Evaluations by every lecturer of the student are included.
+    Query parameters:
+        bucket: visit (default), week or session
+        window: buckets in each moving average (default 3)
+        session_id: session to show, 'all' for every session (default: active)
+    """
+    current_user = lecturer_required()
+    if not current_user:
+        return jsonify({'error': 'Lecturer privileges required'}), 403
+    
+    try:
+        session_id = requested_session_id(request.args)
+        bucket, window = trend_parameters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if not supervises(current_user.id, student_id, session_id):
+        return jsonify({'error': 'Student not found or not assigned to you'}), 404
     
     return jsonify({
-        'student': student.to_dict(),
-        'schools': schools,
-        'reports': reports,
-        'evaluations': evaluations
+        'student_id': student_id,
+        'bucket': bucket,
+        'window': window,
+        'session_id': session_id,
+        'trend': evaluation_trend(student_id, bucket, session_id, window)
     }), 200
 
+# Largest number of evaluations accepted in one batch
+MAX_EVALUATION_BATCH = 100
+
+def build_evaluation(lecturer_id, data, session_id):
+    """
+    Create an Evaluation from validated request data
+    
+    Args:
+        lecturer_id (int): The evaluating lecturer's user id
+        data (dict): Evaluation data that passed validate_evaluation
+        session_id (int): Session the visit belongs to
+    
+    Returns:
+        Evaluation: The new, unsaved evaluation
+    """
+    return Evaluation(
+        lecturer_id=lecturer_id,
+        student_id=data['student_id'],
+        session_id=session_id,
+        visit_date=to_datetime(data['visit_date']),
+        teaching_skills=data['teaching_skills'],
+        classroom_management=data['classroom_management'],
+        lesson_preparation=data['lesson_preparation'],
+        professionalism=data['professionalism'],
+        comments=data.get('comments', ''),
+        overall_grade=data['overall_grade']
+    )
+
 # Submit evaluation
 @lecturer_bp.route('/evaluations', methods=['POST'])
 @jwt_required()
@@ -83,23 +243,13 @@ def submit_evaluation():
     if validation_result['error']:
         return jsonify({'error': validation_result['message']}), 400
     
-    # Verify the student is assigned to this lecturer
-    student = User.query.get(data['student_id'])
-    if not student or student.role != 'student' or current_user not in student.supervisors:
+    # Verify the student is assigned to this lecturer in the visit's session
+    session_id = session_for_date(to_datetime(data['visit_date']))
+    if not supervises(current_user.id, data['student_id'], session_id):
         return jsonify({'error': 'Student not found or not assigned to you'}), 404
     
     # Create a new evaluation
-    new_evaluation = Evaluation(
-        lecturer_id=current_user.id,
-        student_id=data['student_id'],
-        visit_date=datetime.strptime(data['visit_date'], '%Y-%m-%d') if isinstance(data['visit_date'], str) else data['visit_date'],
-        teaching_skills=data['teaching_skills'],
-        classroom_management=data['classroom_management'],
-        lesson_preparation=data['lesson_preparation'],
-        professionalism=data['professionalism'],
-        comments=data.get('comments', ''),
-        overall_grade=data['overall_grade']
-    )
+    new_evaluation = build_evaluation(current_user.id, data, session_id)
     
     try:
         db.session.add(new_evaluation)
@@ -112,6 +262,87 @@ def submit_evaluation():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+# Submit several evaluations at once
+@lecturer_bp.route('/evaluations/batch', methods=['POST'])
+@jwt_required()
+def submit_evaluations_batch():
+    """
+    Submit evaluations for several students in one transaction
+
+    Body: {"evaluations": [...], "mode": "atomic" | "partial"}
+        atomic (default): nothing is saved unless every item is valid
+        partial: valid items are saved and invalid ones reported
+    """
+    current_user = lecturer_required()
+    if not current_user:
+        return jsonify({'error': 'Lecturer privileges required'}), 403
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'No data provided'}), 400
+    items = data.get('evaluations')
+    mode = data.get('mode', 'atomic')
+    
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'evaluations must be a non-empty list'}), 400
+    if len(items) > MAX_EVALUATION_BATCH:
+        return jsonify({'error': f'At most {MAX_EVALUATION_BATCH} evaluations can be submitted at once'}), 400
+    if mode not in ('atomic', 'partial'):
+        return jsonify({'error': 'mode must be atomic or partial'}), 400
+    
+    # Validate every item; supervision checks share one load of the
+    # lecturer's students per session from the supervision index, and
+    # visits on the same day share one session lookup
+    results = []
+    new_evaluations = []
+    sessions_by_date = {}
+    for index, (item, validation_result) in enumerate(zip(items, validate_evaluations(items))):
+        if validation_result['error']:
+            results.append({'index': index, 'status': 'error', 'error': validation_result['message']})
+            continue
+        
+        visit_date = to_datetime(item['visit_date'])
+        if visit_date not in sessions_by_date:
+            sessions_by_date[visit_date] = session_for_date(visit_date)
+        session_id = sessions_by_date[visit_date]
+        
+        if not supervises(current_user.id, item['student_id'], session_id):
+            results.append({'index': index, 'status': 'error',
+                            'error': 'Student not found or not assigned to you'})
+        else:
+            new_evaluation = build_evaluation(current_user.id, item, session_id)
+            new_evaluations.append((index, new_evaluation))
+            results.append({'index': index, 'status': 'created'})
+    
+    failed = len(items) - len(new_evaluations)
+    if failed and (mode == 'atomic' or not new_evaluations):
+        for result in results:
+            if result['status'] == 'created':
+                result['status'] = 'skipped'
+        return jsonify({
+            'error': 'No evaluations were saved',
+            'created': 0,
+            'failed': failed,
+            'results': results
+        }), 400
+    
+    try:
+        db.session.add_all([evaluation for _, evaluation in new_evaluations])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+    
+    for index, evaluation in new_evaluations:
+        results[index]['evaluation'] = evaluation.to_dict()
+    
+    return jsonify({
+        'message': 'Evaluations submitted successfully',
+        'created': len(new_evaluations),
+        'failed': failed,
+        'results': results
+    }), 207 if failed else 201
+
 # Get evaluations submitted by the lecturer
 @lecturer_bp.route('/evaluations', methods=['GET'])
 @jwt_required()
@@ -121,10 +352,15 @@ def get_evaluations():
     if not current_user:
         return jsonify({'error': 'Lecturer privileges required'}), 403
     
+    try:
+        session_id = requested_session_id(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     # Optional filter by student_id
     student_id = request.args.get('student_id')
     
-    query = Evaluation.query.filter_by(lecturer_id=current_user.id)
+    query = scoped(Evaluation.query.filter_by(lecturer_id=current_user.id), Evaluation.session_id, session_id)
     
     if student_id:
         query = query.filter_by(student_id=student_id)
@@ -150,6 +386,11 @@ def update_evaluation(evaluation_id):
     
     data = request.get_json()
     
+    # Validate the update data
+    validation_result = validate_evaluation_update(data)
+    if validation_result['error']:
+        return jsonify({'error': validation_result['message']}), 400
+    
     # Update evaluation attributes
     if 'teaching_skills' in data:
         evaluation.teaching_skills = data['teaching_skills']
@@ -164,7 +405,8 @@ def update_evaluation(evaluation_id):
     if 'overall_grade' in data:
         evaluation.overall_grade = data['overall_grade']
     if 'visit_date' in data:
-        evaluation.visit_date = datetime.strptime(data['visit_date'], '%Y-%m-%d') if isinstance(data['visit_date'], str) else data['visit_date']
+        evaluation.visit_date = to_datetime(data['visit_date'])
+        evaluation.session_id = session_for_date(evaluation.visit_date)
     
     try:
         db.session.commit()
@@ -185,12 +427,16 @@ def get_student_reports(student_id):
     if not current_user:
         return jsonify({'error': 'Lecturer privileges required'}), 403
     
+    try:
+        session_id = requested_session_id(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     # Verify the student is assigned to this lecturer
-    student = User.query.get(student_id)
-    if not student or student.role != 'student' or current_user not in student.supervisors:
+    if not supervises(current_user.id, student_id, session_id):
         return jsonify({'error': 'Student not found or not assigned to you'}), 404
     
-    reports = Report.query.filter_by(student_id=student_id).all()
+    reports = scoped(Report.query.filter_by(student_id=student_id), Report.session_id, session_id).all()
     
     return jsonify({
         'reports': [report.to_dict() for report in reports]
@@ -199,24 +445,31 @@ def get_student_reports(student_id):
 # Dashboard data for lecturer
 @lecturer_bp.route('/dashboard', methods=['GET'])
 @jwt_required()
+@cached_response
 def get_dashboard_data():
     """Get dashboard data for lecturer"""
     current_user = lecturer_required()
     if not current_user:
         return jsonify({'error': 'Lecturer privileges required'}), 403
     
+    try:
+        session_id = requested_session_id(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     # Count of assigned students
-    student_count = current_user.supervised_students.count()
+    student_count = len(supervised_student_ids(current_user.id, session_id))
     
     # Recent evaluations (last 5)
-    recent_evaluations = Evaluation.query.filter_by(lecturer_id=current_user.id)\
+    recent_evaluations = scoped(Evaluation.query.filter_by(lecturer_id=current_user.id),
+                                Evaluation.session_id, session_id)\
         .order_by(Evaluation.submission_date.desc())\
         .limit(5)\
         .all()
     
     # Recent reports from supervised students (last 5)
-    student_ids = [student.id for student in current_user.supervised_students]
-    recent_reports = Report.query.filter(Report.student_id.in_(student_ids))\
+    recent_reports = scoped(Report.query, Report.session_id, session_id)\
+        .filter(Report.student_id.in_(supervised_students(current_user.id, session_id)))\
         .order_by(Report.submission_date.desc())\
         .limit(5)\
         .all()
@@ -225,4 +478,177 @@ def get_dashboard_data():
         'student_count': student_count,
         'recent_evaluations': [evaluation.to_dict() for evaluation in recent_evaluations],
         'recent_reports': [report.to_dict() for report in recent_reports]
-    }), 200
\ No newline at end of file
+    }), 200
+
+def _activity_branch(kind, model, sort_key, lecturer_id, session_id, cursor, limit):
+    """
+    Newest events of one kind for a lecturer's students, selected through lecturer_student
+
+    Args:
+        kind (str): Event type reported to clients
+        model: Report or Evaluation
+        sort_key: Tie-breaker expression, unique across both kinds
+        lecturer_id (int): The lecturer's user id
+        session_id (int): Session to look in, None for all sessions
+        cursor (tuple): (timestamp, sort_key) of the last event already sent, or None
+        limit (int): Page size
+
+    Returns:
+        Subquery with kind, id, student_id, occurred_at and sort_key columns
+    """
+    query = select(
+        literal(kind).label('kind'),
+        model.id.label('id'),
+        model.student_id.label('student_id'),
+        model.submission_date.label('occurred_at'),
+        sort_key.label('sort_key')
+    ).where(model.student_id.in_(supervised_students(lecturer_id, session_id)))
+    query = scoped(query, model.session_id, session_id)
+
+    if cursor:
+        timestamp, key = cursor
+        query = query.where(or_(
+            model.submission_date < timestamp,
+            and_(model.submission_date == timestamp, sort_key < key)
+        ))
+
+    # Each branch stops at one page so the merge never sees more than two
+    return query.order_by(model.submission_date.desc(), sort_key.desc()).limit(limit + 1).subquery()
+
+# Activity feed
+@lecturer_bp.route('/activity', methods=['GET'])
+@jwt_required()
+def get_activity_feed():
+    """
+    Get new reports and evaluations for the lecturer's students, newest first
+
+    Query parameters:
+        limit: page size
+        cursor: continue from a previous page
+        session_id: session to show, 'all' for every session (default: active)
+    """
+    current_user = lecturer_required()
+    if not current_user:
+        return jsonify({'error': 'Lecturer privileges required'}), 403
+    
+    limit = page_size(request.args)
+    cursor = request.args.get('cursor')
+    try:
+        cursor = decode_cursor(cursor) if cursor else None
+        session_id = requested_session_id(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Reports take even sort keys and evaluations odd ones so ties on
+    # submission_date still have a total order
+    reports = _activity_branch('report', Report, Report.id * 2,
+                               current_user.id, session_id, cursor, limit)
+    evaluations = _activity_branch('evaluation', Evaluation, Evaluation.id * 2 + 1,
+                                   current_user.id, session_id, cursor, limit)
+    events = union_all(select(reports), select(evaluations)).subquery()
+    rows = db.session.execute(
+        select(events)
+        .order_by(events.c.occurred_at.desc(), events.c.sort_key.desc())
+        .limit(limit + 1)
+    ).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].occurred_at, rows[-1].sort_key)
+    
+    # Load the page's reports, evaluations and students in one query each
+    report_ids = [row.id for row in rows if row.kind == 'report']
+    evaluation_ids = [row.id for row in rows if row.kind == 'evaluation']
+    student_ids = {row.student_id for row in rows}
+    
+    reports_by_id = {}
+    if report_ids:
+        reports_by_id = {report.id: report for report in Report.query
+                         .options(defer(Report.content))
+                         .filter(Report.id.in_(report_ids))}
+    evaluations_by_id = {}
+    if evaluation_ids:
+        evaluations_by_id = {evaluation.id: evaluation for evaluation in Evaluation.query
+                             .filter(Evaluation.id.in_(evaluation_ids))}
+    students_by_id = {}
+    if student_ids:
+        students_by_id = {student.id: student for student in User.query
+                          .options(defer(User.password_hash))
+                          .filter(User.id.in_(student_ids))}
+    
+    activity = []
+    for row in rows:
+        student = students_by_id[row.student_id]
+        item = {
+            'type': row.kind,
+            'occurred_at': row.occurred_at.isoformat() if row.occurred_at else None,
+            'student': {
+                'id': student.id,
+                'first_name': student.first_name,
+                'last_name': student.last_name
+            }
+        }
+        if row.kind == 'report':
+            item['report'] = reports_by_id[row.id].to_dict(include_content=False)
+        else:
+            item['evaluation'] = evaluations_by_id[row.id].to_dict()
+        activity.append(item)
+    
+    return jsonify({
+        'activity': activity,
+        'cursor': next_cursor
+    }), 200
+
+# Visit planning
+@lecturer_bp.route('/visit-plan', methods=['GET'])
+@jwt_required()
+def get_visit_plan():
+    """
+    Plan days of school visits to the lecturer's students
+
+    Query parameters:
+        per_day: student visits a day holds (default 6)
+        include_evaluated: 'true' to also plan students already evaluated
+        session_id: session to plan, 'all' for every session (default: active)
+    """
+    current_user = lecturer_required()
+    if not current_user:
+        return jsonify({'error': 'Lecturer privileges required'}), 403
+    
+    try:
+        session_id = requested_session_id(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        per_day = int(request.args.get('per_day', DEFAULT_VISITS_PER_DAY))
+    except ValueError:
+        per_day = 0
+    if per_day < 1 or per_day > MAX_VISITS_PER_DAY:
+        return jsonify({'error': f'per_day must be between 1 and {MAX_VISITS_PER_DAY}'}), 400
+    include_evaluated = request.args.get('include_evaluated', 'false').lower() == 'true'
+    
+    students, schools, by_school, unplaced = visit_schools(current_user.id, session_id, include_evaluated)
+    plan = plan_visits([(school_id, school.city, school.state, school.latitude, school.longitude,
+                         by_school[school_id]) for school_id, school in schools.items()], per_day)
+    
+    def student_summary(student):
+        return {'id': student.id, 'first_name': student.first_name, 'last_name': student.last_name}
+    
+    days = [{
+        'day': number,
+        'distance_km': round(day['distance_km'], 1),
+        'visits': sum(len(student_ids) for _, student_ids in day['stops']),
+        'stops': [{
+            'school': schools[school_id].to_dict(),
+            'students': [student_summary(students[student_id]) for student_id in student_ids]
+        } for school_id, student_ids in day['stops']]
+    } for number, day in enumerate(plan, start=1)]
+    
+    return jsonify({
+        'session_id': session_id,
+        'per_day': per_day,
+        'days': days,
+        'distance_km': round(sum(day['distance_km'] for day in plan), 1),
+        'unplaced': [student_summary(students[student_id]) for student_id in unplaced]
+    }), 200
@@ -1,6 +1,12 @@
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from backend.models import User, Report, Evaluation, db
+from sqlalchemy import func, select
+from backend.models import User, Report, Evaluation, School, lecturer_student, student_school, db
+from backend.utils.helpers import discard_upload
+from backend.utils.previews import queue_previews
+from backend.utils.response_cache import cached_response
+from backend.utils.sessions import requested_session_id, scoped, session_for_date
+from backend.utils.trends import evaluation_trend, trend_parameters
 from services.student_service import validate_report
 import os
 from werkzeug.utils import secure_filename
@@ -24,6 +30,19 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS']
 
+# Helper functions for the student's assignments in a session
+def assigned_schools(student_id, session_id):
+    return School.query.filter(School.id.in_(scoped(
+        select(student_school.c.school_id).where(student_school.c.student_id == student_id),
+        student_school.c.session_id, session_id
+    )))
+
+def assigned_supervisors(student_id, session_id):
+    return User.query.filter(User.id.in_(scoped(
+        select(lecturer_student.c.lecturer_id).where(lecturer_student.c.student_id == student_id),
+        lecturer_student.c.session_id, session_id
+    )))
+
 # Get assigned schools
 @student_bp.route('/schools', methods=['GET'])
 @jwt_required()
@@ -33,7 +52,12 @@ def get_assigned_schools():
     if not current_user:
         return jsonify({'error': 'Student privileges required'}), 403
     
-    schools = current_user.assigned_schools
+    try:
+        session_id = requested_session_id(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    schools = assigned_schools(current_user.id, session_id).all()
     
     return jsonify({
         'schools': [school.to_dict() for school in schools]
@@ -48,7 +72,12 @@ def get_supervisors():
     if not current_user:
         return jsonify({'error': 'Student privileges required'}), 403
     
-    supervisors = current_user.supervisors
+    try:
+        session_id = requested_session_id(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    supervisors = assigned_supervisors(current_user.id, session_id).all()
     
     return jsonify({
         'supervisors': [supervisor.to_dict() for supervisor in supervisors]
@@ -104,9 +133,10 @@ def submit_report():
         report_type = data['report_type']
         file_path = None
     
-    # Create a new report
+    # Create a new report in the session running now
     new_report = Report(
         student_id=current_user.id,
+        session_id=session_for_date(datetime.utcnow()),
         title=title,
         content=content,
         report_type=report_type,
@@ -116,12 +146,14 @@ def submit_report():
     try:
         db.session.add(new_report)
         db.session.commit()
+        queue_previews(new_report.file_path)
         return jsonify({
             'message': 'Report submitted successfully',
             'report': new_report.to_dict()
         }), 201
     except Exception as e:
         db.session.rollback()
+        discard_upload(file_path)
         return jsonify({'error': str(e)}), 500
 
 # Get student's reports
@@ -133,10 +165,15 @@ def get_reports():
     if not current_user:
         return jsonify({'error': 'Student privileges required'}), 403
     
+    try:
+        session_id = requested_session_id(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     # Optional filter by report_type
     report_type = request.args.get('report_type')
     
-    query = Report.query.filter_by(student_id=current_user.id)
+    query = scoped(Report.query.filter_by(student_id=current_user.id), Report.session_id, session_id)
     
     if report_type:
         query = query.filter_by(report_type=report_type)
@@ -156,7 +193,13 @@ def get_evaluations():
     if not current_user:
         return jsonify({'error': 'Student privileges required'}), 403
     
-    evaluations = Evaluation.query.filter_by(student_id=current_user.id).all()
+    try:
+        session_id = requested_session_id(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    evaluations = scoped(Evaluation.query.filter_by(student_id=current_user.id),
+                         Evaluation.session_id, session_id).all()
     
     # Include lecturer information for each evaluation
     evaluation_data = []
@@ -174,6 +217,36 @@ def get_evaluations():
         'evaluations': evaluation_data
     }), 200
 
+# Score trends of the student's evaluations
+@student_bp.route('/evaluations/trend', methods=['GET'])
+@jwt_required()
+@cached_response
+def get_evaluation_trend():
+    """
+    Get the student's evaluation scores averaged over time
+
+    Query parameters:
+        bucket: visit (default), week or session
+        window: buckets in each moving average (default 3)
+        session_id: session to show, 'all' for every session (default: active)
+    """
+    current_user = student_required()
+    if not current_user:
+        return jsonify({'error': 'Student privileges required'}), 403
+    
+    try:
+        session_id = requested_session_id(request.args)
+        bucket, window = trend_parameters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'bucket': bucket,
+        'window': window,
+        'session_id': session_id,
+        'trend': evaluation_trend(current_user.id, bucket, session_id, window)
+    }), 200
+
 # Update a report
 @student_bp.route('/reports/<int:report_id>', methods=['PUT'])
 @jwt_required()
@@ -187,6 +260,10 @@ def update_report(report_id):
     if not report or report.student_id != current_user.id:
         return jsonify({'error': 'Report not found or not created by you'}), 404
     
+    # Files replaced by this update are removed only once it is committed
+    saved_file = None
+    replaced_file = None
+    
     # Check if the request contains form data or JSON
     if request.content_type and 'multipart/form-data' in request.content_type:
         # Handle form data with file upload
@@ -200,10 +277,6 @@ def update_report(report_id):
         if 'file' in request.files:
             file = request.files['file']
             if file and allowed_file(file.filename):
-                # Remove old file if it exists
-                if report.file_path and os.path.exists(report.file_path):
-                    os.remove(report.file_path)
-                
                 # Generate a unique filename
                 filename = secure_filename(file.filename)
                 unique_filename = f"{uuid.uuid4()}_{filename}"
@@ -214,7 +287,9 @@ def update_report(report_id):
                 
                 # Save the file
                 file.save(file_path)
+                replaced_file = report.file_path
                 report.file_path = file_path
+                saved_file = file_path
     else:
         # Handle JSON data
         data = request.get_json()
@@ -228,41 +303,51 @@ def update_report(report_id):
     
     try:
         db.session.commit()
+        discard_upload(replaced_file)
+        queue_previews(saved_file)
         return jsonify({
             'message': 'Report updated successfully',
             'report': report.to_dict()
         }), 200
     except Exception as e:
         db.session.rollback()
+        discard_upload(saved_file)
         return jsonify({'error': str(e)}), 500
 
 # Dashboard data for student
 @student_bp.route('/dashboard', methods=['GET'])
 @jwt_required()
+@cached_response
 def get_dashboard_data():
     """Get dashboard data for student"""
     current_user = student_required()
     if not current_user:
         return jsonify({'error': 'Student privileges required'}), 403
     
+    try:
+        session_id = requested_session_id(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     # Count of reports by type
-    report_counts = {}
-    report_types = db.session.query(Report.report_type).filter_by(student_id=current_user.id).distinct().all()
-    for report_type in report_types:
-        count = Report.query.filter_by(student_id=current_user.id, report_type=report_type[0]).count()
-        report_counts[report_type[0]] = count
+    report_counts = dict(scoped(
+        db.session.query(Report.report_type, func.count(Report.id)).filter_by(student_id=current_user.id),
+        Report.session_id, session_id
+    ).group_by(Report.report_type).all())
     
     # Recent evaluations (last 5)
-    recent_evaluations = Evaluation.query.filter_by(student_id=current_user.id)\
+    recent_evaluations = scoped(Evaluation.query.filter_by(student_id=current_user.id),
+                                Evaluation.session_id, session_id)\
         .order_by(Evaluation.submission_date.desc())\
         .limit(5)\
         .all()
     
     # Get supervisor names
-    supervisors = [f"{supervisor.first_name} {supervisor.last_name}" for supervisor in current_user.supervisors]
+    supervisors = [f"{supervisor.first_name} {supervisor.last_name}"
+                   for supervisor in assigned_supervisors(current_user.id, session_id)]
     
     # Get school names
-    schools = [school.name for school in current_user.assigned_schools]
+    schools = [school.name for school in assigned_schools(current_user.id, session_id)]
     
     return jsonify({
         'report_counts': report_counts,
@@ -1,7 +1,10 @@
 # auth_service.py
-from flask import jsonify
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app, jsonify
+from flask_jwt_extended import create_access_token, create_refresh_token, decode_token
 from werkzeug.security import generate_password_hash, check_password_hash
-from backend.models import User, db
+from backend.models import User, RefreshToken, db
 
 def validate_login(username, password):
     """
@@ -11,6 +14,9 @@ def validate_login(username, password):
     
     # Use the check_password method instead of directly accessing password attribute
     if user and user.check_password(password):
+        # Upgrade hashes made with older parameters; the login commits it
+        if user.password_needs_rehash():
+            user.set_password(password)
         return True, user
     return False, None
 
@@ -43,4 +49,112 @@ def validate_registration(email, password, username):
         return True, new_user
     except Exception as e:
         db.session.rollback()
-        return False, str(e)
\ No newline at end of file
+        return False, str(e)
+
+def issue_tokens(user, family_id=None):
+    """
+    Create an access token and a tracked refresh token for a user.
+    The caller commits the session.
+
+    Args:
+        user (User): The authenticated user
+        family_id (str): Token family to continue when rotating, None for a new login
+
+    Returns:
+        tuple: (access_token, refresh_token)
+    """
+    refresh_token = create_refresh_token(identity=user.id)
+    claims = decode_token(refresh_token)
+
+    if family_id is None:
+        family_id = str(uuid.uuid4())
+        # A fresh login is a good moment to drop this user's expired tokens
+        RefreshToken.query.filter(
+            RefreshToken.user_id == user.id,
+            RefreshToken.expires_at < datetime.utcnow()
+        ).delete(synchronize_session=False)
+
+    db.session.add(RefreshToken(
+        jti=claims['jti'],
+        family_id=family_id,
+        user_id=user.id,
+        expires_at=datetime.utcfromtimestamp(claims['exp'])
+    ))
+
+    return create_access_token(identity=user.id), refresh_token
+
+def revoke_token_family(family_id):
+    """
+    Revoke every refresh token descended from the same login
+    """
+    RefreshToken.query.filter(
+        RefreshToken.family_id == family_id,
+        RefreshToken.revoked_at.is_(None)
+    ).update({'revoked_at': datetime.utcnow()}, synchronize_session=False)
+
+def revoke_user_tokens(user_id):
+    """
+    Revoke every refresh token of a user, signing out all their logins.
+    The caller commits the session.
+    """
+    RefreshToken.query.filter(
+        RefreshToken.user_id == user_id,
+        RefreshToken.revoked_at.is_(None)
+    ).update({'revoked_at': datetime.utcnow()}, synchronize_session=False)
+
+def rotate_refresh_token(jti, user_id):
+    """
+    Exchange a refresh token for a new access/refresh token pair.
+
+    Each refresh token can be used once. Presenting a token that was already
+    exchanged means it was copied, so the whole family is revoked and the
+    user has to log in again. A short grace period tolerates two browser
+    tabs refreshing with the same token at the same time.
+
+    Args:
+        jti (str): ID of the presented refresh token
+        user_id: Identity carried by the presented token
+
+    Returns:
+        tuple: (True, (user, access_token, refresh_token)) or (False, error message)
+    """
+    token = RefreshToken.query.filter_by(jti=jti).first()
+    if not token or token.user_id != user_id:
+        return False, 'Invalid refresh token'
+
+    if token.revoked_at is not None:
+        return False, 'Refresh token has been revoked'
+    
+    user = User.query.get(token.user_id)
+    if not user or not user.is_active:
+        revoke_token_family(token.family_id)
+        db.session.commit()
+        return False, 'Account is deactivated. Please contact the administrator'
+
+    now = datetime.utcnow()
+    grace = timedelta(seconds=current_app.config['REFRESH_TOKEN_REUSE_GRACE_SECONDS'])
+
+    # Claim the token atomically so concurrent refreshes cannot both succeed
+    claimed = RefreshToken.query.filter_by(id=token.id, used_at=None)\
+        .update({'used_at': now}, synchronize_session=False)
+
+    if not claimed:
+        db.session.rollback()
+        token = RefreshToken.query.get(token.id)
+        if token.used_at and now - token.used_at <= grace:
+            return False, 'Refresh token already used'
+        revoke_token_family(token.family_id)
+        db.session.commit()
+        current_app.logger.warning(
+            'Refresh token reuse detected for user %s, family %s revoked', token.user_id, token.family_id)
+        return False, 'Refresh token reuse detected. Please log in again'
+
+    access_token, refresh_token = issue_tokens(user, family_id=token.family_id)
+
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return False, str(e)
+
+    return True, (user, access_token, refresh_token)
\ No newline at end of file
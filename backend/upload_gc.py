@@ -0,0 +1,64 @@
+"""
+Remove uploads that no report points at.
+
+Walks ``UPLOAD_FOLDER`` and streams report attachment paths from the
+database, merge-joining the two sorted streams. Files older than the grace
+period that nothing references are listed, and with ``--delete`` removed or
+with ``--quarantine`` moved aside. Nothing is touched without one of them.
+
+    python -m backend.upload_gc                            # dry run
+    python -m backend.upload_gc --quarantine /var/tp/orphans
+    python -m backend.upload_gc --delete --grace-hours 48
+
+Run it with the same environment as the server (FLASK_ENV, DATABASE_URL).
+"""
+import argparse
+import sys
+
+from backend.app import create_app
+from backend.utils.upload_gc import DEFAULT_BATCH_SIZE, collect
+
+
+def human_size(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            break
+        size /= 1024.0
+    return '%.1f %s' % (size, unit)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument('--delete', action='store_true', help='delete orphaned files')
+    action.add_argument('--quarantine', metavar='DIR', help='move orphaned files into DIR')
+    parser.add_argument('--grace-hours', type=float, default=24,
+                        help='keep files modified more recently than this')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='referenced paths fetched per query')
+    parser.add_argument('--quiet', action='store_true', help='only print the summary')
+    args = parser.parse_args(argv)
+
+    def report(path, size):
+        if not args.quiet:
+            print('%10s  %s' % (human_size(size), path))
+
+    app = create_app()
+    with app.app_context():
+        summary = collect(app.config['UPLOAD_FOLDER'], quarantine=args.quarantine,
+                          delete=args.delete, grace_seconds=int(args.grace_hours * 3600),
+                          batch_size=args.batch_size, report=report)
+
+    if args.delete or args.quarantine:
+        print('%d orphaned files %s, %s reclaimed' % (
+            summary['orphans'], 'deleted' if args.delete else 'quarantined', human_size(summary['bytes'])))
+    else:
+        print('%d orphaned files, %s reclaimable (dry run, nothing removed)' % (
+            summary['orphans'], human_size(summary['bytes'])))
+    if summary['errors']:
+        print('%d files could not be handled' % summary['errors'], file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
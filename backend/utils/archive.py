@@ -0,0 +1,219 @@
+"""
+Cold archive for completed teaching practice sessions.
+
+Reports, evaluations and notifications of a completed session are moved, in
+batches, from the hot tables into ``report_archive``, ``evaluation_archive``
+and ``notification_archive``, which have the same columns and keep the
+original ids. Report attachments, with their previews, move from
+``UPLOAD_FOLDER`` to ``ARCHIVE_FOLDER/session_<id>/``.
+
+Each batch is copied and deleted in one transaction. Attachments are copied
+before the commit and the originals removed after it, so a failure leaves
+either the hot row with its file or the archived row with its copy; never a
+row without a file.
+
+Readers that must see archived records use ``hot_and_archived``, which
+unions the two tables behind one subquery.
+"""
+import os
+import shutil
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import and_, delete, exists, literal, select, union_all, update
+
+from backend.models import (Evaluation, Notification, Report, TeachingPracticeSession,
+                            evaluation_archive, notification_archive, report_archive, db)
+from backend.utils.previews import preview_files, remove_previews
+from backend.utils.response_cache import ALL, invalidate
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def archivable_sessions():
+    """
+    Find completed sessions whose records are still in the hot tables
+
+    Returns:
+        list: TeachingPracticeSession objects, oldest first
+    """
+    return TeachingPracticeSession.query\
+        .filter(TeachingPracticeSession.status == 'completed',
+                TeachingPracticeSession.archived_at.is_(None))\
+        .order_by(TeachingPracticeSession.start_date).all()
+
+
+def _notifications_of(session):
+    """Notifications sent during a session and during no session still running."""
+    table = Notification.__table__
+    other = TeachingPracticeSession.__table__.alias('other')
+    still_running = exists().where(and_(
+        other.c.status != 'completed',
+        other.c.start_date <= table.c.created_at,
+        other.c.end_date >= table.c.created_at
+    ))
+    return and_(table.c.created_at >= session.start_date,
+                table.c.created_at <= session.end_date,
+                ~still_running)
+
+
+def pending_counts(session):
+    """
+    Count the hot rows an archival run would move
+
+    Args:
+        session (TeachingPracticeSession): A completed session
+
+    Returns:
+        dict: Row counts per kind of record
+    """
+    def count(table, criteria):
+        return db.session.execute(select(db.func.count()).select_from(table).where(criteria)).scalar()
+
+    return {
+        'reports': count(Report.__table__, Report.__table__.c.session_id == session.id),
+        'evaluations': count(Evaluation.__table__, Evaluation.__table__.c.session_id == session.id),
+        'notifications': count(Notification.__table__, _notifications_of(session)),
+    }
+
+
+def _move_batch(table, archive, criteria, batch_size, archived_at, extra=None):
+    """Copy up to batch_size matching rows into the archive and delete them; the caller commits."""
+    ids = [row[0] for row in db.session.execute(
+        select(table.c.id).where(criteria).order_by(table.c.id).limit(batch_size))]
+    if not ids:
+        return ids
+
+    extra = extra or {}
+    names = [column.name for column in table.c]
+    values = [table.c[name] for name in names]
+    values.append(literal(archived_at, db.DateTime).label('archived_at'))
+    values.extend(literal(value).label(name) for name, value in extra.items())
+
+    db.session.execute(archive.insert().from_select(
+        names + ['archived_at'] + list(extra), select(*values).where(table.c.id.in_(ids))))
+    db.session.execute(delete(table).where(table.c.id.in_(ids)))
+    return ids
+
+
+def _copy_attachments(ids, folder):
+    """Copy archived reports' files and previews into folder and point the rows at the copies."""
+    moved = []
+    rows = db.session.execute(
+        select(report_archive.c.id, report_archive.c.file_path)
+        .where(report_archive.c.id.in_(ids), report_archive.c.file_path.isnot(None)))
+    for report_id, file_path in rows.all():
+        if not os.path.exists(file_path):
+            continue
+        os.makedirs(folder, exist_ok=True)
+        target = os.path.join(folder, os.path.basename(file_path))
+        shutil.copy2(file_path, target)
+        for preview in preview_files(file_path):
+            shutil.copy2(preview, os.path.join(folder, os.path.basename(preview)))
+        db.session.execute(update(report_archive)
+                           .where(report_archive.c.id == report_id)
+                           .values(file_path=target))
+        moved.append(file_path)
+    return moved
+
+
+def archive_session(session, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Move a completed session's records to the archive tables
+
+    Safe to run again after an interruption: it carries on with whatever
+    is still in the hot tables.
+
+    Args:
+        session (TeachingPracticeSession): A completed session
+        batch_size (int): Rows moved per transaction
+
+    Returns:
+        dict: Rows moved per kind of record, and attachments moved
+
+    Raises:
+        ValueError: If the session is not completed
+    """
+    if session.status != 'completed':
+        raise ValueError('Only completed sessions can be archived')
+
+    archived_at = datetime.utcnow()
+    folder = os.path.join(current_app.config['ARCHIVE_FOLDER'], f'session_{session.id}')
+    moved = {'reports': 0, 'evaluations': 0, 'notifications': 0, 'attachments': 0}
+
+    batches = [
+        ('reports', Report.__table__, report_archive,
+         Report.__table__.c.session_id == session.id, None),
+        ('evaluations', Evaluation.__table__, evaluation_archive,
+         Evaluation.__table__.c.session_id == session.id, None),
+        ('notifications', Notification.__table__, notification_archive,
+         _notifications_of(session), {'session_id': session.id}),
+    ]
+    for kind, table, archive, criteria, extra in batches:
+        while True:
+            files = []
+            try:
+                ids = _move_batch(table, archive, criteria, batch_size, archived_at, extra)
+                if not ids:
+                    break
+                if archive is report_archive:
+                    files = _copy_attachments(ids, folder)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+            moved[kind] += len(ids)
+            moved['attachments'] += len(files)
+            # Only now is nothing pointing at the originals any more
+            for file_path in files:
+                remove_previews(file_path)
+                try:
+                    os.remove(file_path)
+                except OSError:
+                    current_app.logger.warning('Could not remove archived upload %s', file_path)
+
+    session.archived_at = archived_at
+    invalidate(db.session, ALL)
+    db.session.commit()
+    return moved
+
+
+def hot_and_archived(table, archive, criteria, exclude=()):
+    """
+    Union a hot table with its archive, tagging each row with ``archived``
+
+    Args:
+        table: The hot table
+        archive: Its archive table
+        criteria: Function taking either table and returning filter clauses
+        exclude (tuple): Column names to leave out, e.g. large text columns
+
+    Returns:
+        Subquery with the hot table's columns plus a boolean ``archived``
+    """
+    names = [column.name for column in table.c if column.name not in exclude]
+    hot = select(*[table.c[name] for name in names], literal(False).label('archived'))\
+        .where(*criteria(table))
+    cold = select(*[archive.c[name] for name in names], literal(True).label('archived'))\
+        .where(*criteria(archive))
+    return union_all(hot, cold).subquery()
+
+
+def row_to_dict(model, row, **options):
+    """
+    Serialise a row of hot_and_archived with the model's own to_dict
+
+    Args:
+        model: The model class the hot table belongs to
+        row: A result row
+        options: Keyword arguments for to_dict
+
+    Returns:
+        dict: The model's representation plus the ``archived`` flag
+    """
+    values = dict(row._mapping)
+    archived = values.pop('archived')
+    data = model(**values).to_dict(**options)
+    data['archived'] = bool(archived)
+    return data
@@ -0,0 +1,103 @@
+"""
+Custom column types.
+
+``CompressedText`` stores text as bytes, compressed once it is longer than a
+threshold. Compressed values start with a two byte marker naming the codec;
+anything else is plain UTF-8, which is also how rows written before the
+column was compressed read back. Values are compressed when bound and
+decompressed when loaded, so models, ``to_dict()`` and streamed queries see
+ordinary strings. SQL on the column itself (``LIKE``, ``length()``) sees the
+stored bytes and should not be used.
+"""
+import zlib
+
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+try:
+    import zstandard
+except ImportError:  # optional; zlib is always available
+    zstandard = None
+
+MARKER = b'\x00'
+RAW = MARKER + b'r'  # plain text that happens to start with the marker byte
+ZLIB = MARKER + b'z'
+ZSTD = MARKER + b's'
+
+DEFAULT_THRESHOLD = 1024  # bytes of UTF-8; shorter values gain little
+
+
+def compress_text(value, threshold=DEFAULT_THRESHOLD, codec='zlib', level=None):
+    """
+    Encode text for storage
+
+    Args:
+        value (str): Text to store
+        threshold (int): Smallest UTF-8 size worth compressing
+        codec (str): 'zlib', or 'zstd' when the zstandard package is installed
+        level (int): Compression level, None for the codec's default
+
+    Returns:
+        bytes: Stored form, compressed only if that makes it smaller
+    """
+    data = value.encode('utf-8')
+    if len(data) >= threshold:
+        if codec == 'zstd' and zstandard is not None:
+            packed = ZSTD + zstandard.ZstdCompressor(level=level or 3).compress(data)
+        else:
+            packed = ZLIB + zlib.compress(data, 6 if level is None else level)
+        if len(packed) < len(data):
+            return packed
+    if data.startswith(MARKER):
+        return RAW + data
+    return data
+
+
+def decompress_text(data):
+    """
+    Decode a stored value
+
+    Args:
+        data: bytes, memoryview or str (rows written before compression)
+
+    Returns:
+        str: The original text
+
+    Raises:
+        RuntimeError: If the value is zstd compressed and zstandard is missing
+    """
+    if isinstance(data, str):
+        return data
+    data = bytes(data)
+    marker = data[:2]
+    if marker == ZLIB:
+        data = zlib.decompress(data[2:])
+    elif marker == ZSTD:
+        if zstandard is None:
+            raise RuntimeError('The zstandard package is needed to read this value')
+        data = zstandard.ZstdDecompressor().decompress(data[2:])
+    elif marker == RAW:
+        data = data[2:]
+    return data.decode('utf-8')
+
+
+class CompressedText(TypeDecorator):
+    """Text column stored as bytes, compressed above a size threshold."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, codec='zlib', level=None, **kwargs):
+        super().__init__(**kwargs)
+        self.threshold = threshold
+        self.codec = codec
+        self.level = level
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value, self.threshold, self.codec, self.level)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_text(value)
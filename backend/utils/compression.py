@@ -0,0 +1,208 @@
+"""
+Negotiated compression of API responses.
+
+An ``after_request`` hook compresses JSON and text responses with the best
+codec the client lists in ``Accept-Encoding``: zstd and brotli when the
+optional ``zstandard`` and ``brotli`` packages are installed, gzip always.
+``COMPRESSION_CODECS`` sets the preference between codecs the client
+rates equally.
+
+Buffered responses are compressed whole once they reach
+``COMPRESSION_MIN_SIZE`` bytes, and only kept compressed when that makes
+them smaller. Streamed responses are compressed chunk by chunk, each chunk
+flushed so that the client sees it as soon as the view yields it. Files
+from ``send_file`` (attachments, previews, the frontend) pass through.
+
+zstd compression contexts are costly to set up and are reused per thread.
+Python's zlib and brotli bindings cannot reset a compressor, so gzip and
+brotli start a fresh one for each response. ``python -m
+benchmarks.compression`` compares the CPU cost and bytes saved per codec
+and level.
+"""
+import threading
+import zlib
+
+from flask import request
+
+try:
+    import zstandard
+except ImportError:  # optional; gzip is always available
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+GZIP_WBITS = 16 + zlib.MAX_WBITS  # gzip header and trailer
+
+_local = threading.local()
+
+
+def _zstd_compressor(level):
+    # ZstdCompressor is not thread safe, so each thread keeps its own
+    compressors = _local.__dict__.setdefault('zstd', {})
+    if level not in compressors:
+        compressors[level] = zstandard.ZstdCompressor(level=level)
+    return compressors[level]
+
+
+def _gzip(data, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _gzip_stream(chunks, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def _brotli(data, level):
+    return brotli.compress(data, quality=level)
+
+
+def _brotli_stream(chunks, level):
+    compressor = brotli.Compressor(quality=level)
+    for chunk in chunks:
+        yield compressor.process(chunk) + compressor.flush()
+    yield compressor.finish()
+
+
+def _zstd(data, level):
+    return _zstd_compressor(level).compress(data)
+
+
+def _zstd_stream(chunks, level):
+    # A stream outlives the call that starts it, so it gets its own context
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+    yield compressor.flush()
+
+
+# Content-Encoding -> (whole-body function, streaming function)
+CODECS = {'gzip': (_gzip, _gzip_stream)}
+if brotli is not None:
+    CODECS['br'] = (_brotli, _brotli_stream)
+if zstandard is not None:
+    CODECS['zstd'] = (_zstd, _zstd_stream)
+
+
+def available_codecs(preferred):
+    """Names from preferred whose packages are installed, in order."""
+    return [name for name in preferred if name in CODECS]
+
+
+def compress(data, codec, level):
+    """
+    Compress a whole body
+
+    Args:
+        data (bytes): Body to compress
+        codec (str): 'gzip', 'br' or 'zstd'
+        level (int): Compression level
+
+    Returns:
+        bytes: The compressed body
+    """
+    return CODECS[codec][0](data, level)
+
+
+def compress_stream(chunks, codec, level):
+    """
+    Compress a body as it is produced
+
+    Args:
+        chunks: Iterable of bytes or str chunks
+        codec (str): 'gzip', 'br' or 'zstd'
+        level (int): Compression level
+
+    Yields:
+        bytes: Compressed data, flushed after every chunk
+    """
+    encoded = (chunk.encode('utf-8') if isinstance(chunk, str) else chunk for chunk in chunks)
+    try:
+        yield from CODECS[codec][1](encoded, level)
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def negotiate(accept_encodings, codecs):
+    """
+    Choose the codec for a request
+
+    Args:
+        accept_encodings: The request's parsed Accept-Encoding header
+        codecs (list): Usable codecs, most preferred first
+
+    Returns:
+        str: The codec, or None to send the body as is
+    """
+    best, best_quality = None, 0
+    for name in codecs:
+        quality = accept_encodings.quality(name)
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+class ResponseCompressor:
+    """``after_request`` hook compressing eligible responses."""
+
+    def __init__(self, codecs, levels, min_size, mimetypes):
+        self.codecs = codecs
+        self.levels = levels
+        self.min_size = min_size
+        self.mimetypes = set(mimetypes)
+
+    def __call__(self, response):
+        if response.mimetype not in self.mimetypes or response.direct_passthrough or \
+                response.status_code < 200 or response.status_code in (204, 206, 304) or \
+                'Content-Encoding' in response.headers or \
+                'no-transform' in response.headers.get('Cache-Control', ''):
+            return response
+
+        # The body depends on Accept-Encoding from here on, even when it is
+        # sent as is, so shared caches must key on it
+        response.vary.add('Accept-Encoding')
+        if request.method == 'HEAD':
+            return response
+        codec = negotiate(request.accept_encodings, self.codecs)
+        if codec is None:
+            return response
+        level = self.levels[codec]
+
+        if response.is_streamed:
+            response.response = compress_stream(response.response, codec, level)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            packed = compress(data, codec, level)
+            if len(packed) >= len(data):
+                return response
+            response.set_data(packed)
+        response.headers['Content-Encoding'] = codec
+        return response
+
+
+def init_compression(app):
+    """
+    Compress the app's responses for clients that accept it
+
+    Args:
+        app: The Flask app
+    """
+    codecs = available_codecs(app.config['COMPRESSION_CODECS'])
+    if not codecs:
+        return
+    app.after_request(ResponseCompressor(
+        codecs,
+        app.config['COMPRESSION_LEVELS'],
+        app.config['COMPRESSION_MIN_SIZE'],
+        app.config['COMPRESSION_MIMETYPES'],
+    ))
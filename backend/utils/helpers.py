@@ -3,6 +3,7 @@ from datetime import datetime
 from flask import current_app
 import uuid
 from werkzeug.utils import secure_filename
+from backend.utils.previews import remove_previews
 
 def allowed_file(filename):
     """
@@ -99,4 +100,24 @@ def grade_to_numeric(grade):
         'D+': 1.3, 'D': 1.0, 'F': 0.0
     }
     
-    return grade_map.get(grade, 0.0)
\ No newline at end of file
+    return grade_map.get(grade, 0.0)
+
+def discard_upload(file_path):
+    """
+    Delete an uploaded file and its previews, if they exist
+    
+    Never raises, so it is safe to call after a commit or while handling
+    a failed one.
+    
+    Args:
+        file_path (str): The path of the upload, or None
+    """
+    if not file_path:
+        return
+    remove_previews(file_path)
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        current_app.logger.warning(f"Could not remove upload {file_path}: {str(e)}")
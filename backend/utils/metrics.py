@@ -0,0 +1,116 @@
+"""
+Per-request Prometheus metrics.
+
+Records latency, status codes, response sizes and the number and duration of
+SQL statements for every request, labelled by blueprint and endpoint, and
+serves them at ``/metrics``.
+
+When ``PROMETHEUS_MULTIPROC_DIR`` is set (it must be set before the workers
+start) each process writes its samples to that directory and ``/metrics``
+aggregates them, so any worker can answer a scrape.
+"""
+import os
+import time
+
+from flask import Response, g, request
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter,
+                               Histogram, generate_latest, multiprocess)
+
+from backend.utils.sql_timing import add_statement_consumer
+
+LABELS = ['blueprint', 'endpoint']
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time spent handling a request',
+    LABELS + ['method'],
+    buckets=(.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10),
+)
+REQUESTS = Counter(
+    'http_requests_total', 'Requests handled, by status code',
+    LABELS + ['method', 'status'],
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes', 'Size of response bodies',
+    LABELS,
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+SQL_STATEMENTS = Histogram(
+    'http_request_sql_statements', 'SQL statements executed per request',
+    LABELS,
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+SQL_DURATION = Histogram(
+    'http_request_sql_duration_seconds', 'Time spent executing SQL per request',
+    LABELS,
+    buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5),
+)
+
+RESPONSE_CACHE_LOOKUPS = Counter(
+    'response_cache_lookups_total', 'Cached response lookups, by result (hit or miss)',
+    ['endpoint', 'result'],
+)
+RESPONSE_CACHE_EVICTIONS = Counter(
+    'response_cache_evictions_total', 'Cache groups (users or endpoints) evicted after commits',
+)
+
+# Endpoints that are not recorded
+IGNORED_ENDPOINTS = {'metrics', 'static'}
+
+
+def _count_statement(statement, parameters, elapsed):
+    stats = g.get('_sql_stats')
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += elapsed
+
+
+def _start_timer():
+    g._request_started = time.perf_counter()
+    g._sql_stats = [0, 0.0]
+
+
+def _record_request(response):
+    started = g.pop('_request_started', None)
+    if started is None or request.endpoint in IGNORED_ENDPOINTS:
+        return response
+
+    elapsed = time.perf_counter() - started
+    blueprint = request.blueprint or ''
+    endpoint = request.endpoint or 'unmatched'
+
+    REQUEST_LATENCY.labels(blueprint, endpoint, request.method).observe(elapsed)
+    REQUESTS.labels(blueprint, endpoint, request.method, response.status_code).inc()
+
+    # Streamed responses have no known length
+    if response.content_length is not None:
+        RESPONSE_SIZE.labels(blueprint, endpoint).observe(response.content_length)
+
+    statements, sql_seconds = g.pop('_sql_stats', (0, 0.0))
+    SQL_STATEMENTS.labels(blueprint, endpoint).observe(statements)
+    SQL_DURATION.labels(blueprint, endpoint).observe(sql_seconds)
+
+    return response
+
+
+def metrics_view():
+    """Expose metrics in the Prometheus text format."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app):
+    """
+    Install request instrumentation and the /metrics endpoint
+
+    Args:
+        app: The Flask app
+    """
+    add_statement_consumer(_count_statement)
+
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -0,0 +1,104 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Pages are ordered newest first by a timestamp column with the primary key
+as tie-breaker. The cursor handed to clients is an opaque token holding the
+(timestamp, id) of the last row of the previous page, so fetching page N
+costs the same as fetching page 1.
+"""
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(timestamp, row_id):
+    """
+    Build an opaque cursor from the last row of a page
+
+    Args:
+        timestamp (datetime): Ordering timestamp of the row
+        row_id (int): Primary key of the row
+
+    Returns:
+        str: URL-safe cursor token
+    """
+    payload = json.dumps([timestamp.isoformat() if timestamp else None, row_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Read a cursor produced by encode_cursor
+
+    Args:
+        cursor (str): Cursor token
+
+    Returns:
+        tuple: (timestamp, row_id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(timestamp) if timestamp else None), int(row_id)
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+
+def page_size(args, default=DEFAULT_PAGE_SIZE):
+    """
+    Read and clamp the ``limit`` query parameter
+
+    Args:
+        args: Request query arguments
+
+    Returns:
+        int: Page size between 1 and MAX_PAGE_SIZE
+    """
+    try:
+        limit = int(args.get('limit', default))
+    except (TypeError, ValueError):
+        limit = default
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def keyset_page(query, timestamp_column, id_column, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Fetch one page of a query, newest first
+
+    Args:
+        query: SQLAlchemy query to paginate
+        timestamp_column: Column the page is ordered by
+        id_column: Primary key column used as tie-breaker
+        cursor (str): Cursor from the previous page, or None for the first page
+        limit (int): Page size
+
+    Returns:
+        tuple: (rows, next_cursor), next_cursor is None on the last page
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            timestamp_column < timestamp,
+            and_(timestamp_column == timestamp, id_column < row_id)
+        ))
+
+    rows = query.order_by(timestamp_column.desc(), id_column.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, timestamp_column.key), getattr(last, id_column.key))
+
+    return rows, next_cursor
@@ -0,0 +1,148 @@
+"""
+Password hashing on a bounded worker pool.
+
+Key derivation is deliberately slow. Running it on a small per-process pool
+caps how many derivations compete for CPU at once, so a burst of logins
+cannot starve the threads serving other routes (hashlib releases the GIL
+while deriving). When the pool and its queue are full, callers get
+``PasswordHasherBusy`` straight away, which the app turns into a 503.
+
+The cost is set by ``PASSWORD_HASH_METHOD`` (e.g. ``pbkdf2:sha256:600000``).
+Hashes made with other parameters still verify, and ``needs_rehash`` tells
+the login flow to upgrade them.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, has_app_context, jsonify
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many password hashes are already queued."""
+
+
+def normalize_method(method):
+    """Spell out the iteration count Werkzeug would store for a pbkdf2 method."""
+    if method.startswith('pbkdf2') and method.count(':') == 1:
+        return f'{method}:{DEFAULT_PBKDF2_ITERATIONS}'
+    return method
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords on a bounded thread pool."""
+
+    def __init__(self, method, workers=2, queue_size=8, timeout=10):
+        self.method = normalize_method(method)
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        # Created on first use so that no threads exist before a prefork
+        # server forks its workers
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='password-hash')
+        return self._pool
+
+    def _run(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            future = self._executor().submit(function, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result(timeout=self.timeout)
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        return password_hash.split('$', 1)[0] != self.method
+
+
+def _hasher():
+    if has_app_context():
+        return current_app.extensions.get('password_hasher')
+    return None
+
+
+def hash_password(password):
+    """
+    Hash a password with the configured method
+
+    Args:
+        password (str): The plain text password
+
+    Returns:
+        str: The salted hash
+    """
+    hasher = _hasher()
+    if hasher is None:
+        return generate_password_hash(password)
+    return hasher.hash(password)
+
+
+def verify_password(password_hash, password):
+    """
+    Check a password against a stored hash
+
+    Args:
+        password_hash (str): The stored hash
+        password (str): The plain text password
+
+    Returns:
+        bool: True if the password matches
+    """
+    hasher = _hasher()
+    if hasher is None:
+        return check_password_hash(password_hash, password)
+    return hasher.verify(password_hash, password)
+
+
+def needs_rehash(password_hash):
+    """
+    Check whether a hash was made with other parameters than the configured ones
+
+    Args:
+        password_hash (str): The stored hash
+
+    Returns:
+        bool: True if the hash should be regenerated
+    """
+    hasher = _hasher()
+    if hasher is None:
+        return False
+    return hasher.needs_rehash(password_hash)
+
+
+def init_password_hasher(app):
+    """
+    Create the app's password hasher and map overload to 503 responses
+
+    Args:
+        app: The Flask app
+    """
+    app.extensions['password_hasher'] = PasswordHasher(
+        app.config['PASSWORD_HASH_METHOD'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        queue_size=app.config['PASSWORD_HASH_QUEUE_SIZE'],
+        timeout=app.config['PASSWORD_HASH_TIMEOUT'],
+    )
+
+    @app.errorhandler(PasswordHasherBusy)
+    def password_hasher_busy(e):
+        response = jsonify({'error': 'Server is busy, please try again shortly'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        return response
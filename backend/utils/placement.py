@@ -0,0 +1,383 @@
+"""
+Bulk placement of students in schools.
+
+``plan_placements`` places a whole cohort at once, filling as many seats
+as it can at the least total cost, where a placement costs:
+
+* ``SAME_CITY`` in the city the student asked for
+* ``SAME_STATE`` elsewhere in their state
+* ``ELSEWHERE`` anywhere else, unless the student only accepts their state
+
+A student without preferences costs nothing anywhere. Costs depend only on
+where a school is, so students with the same preferences are
+interchangeable, and so are schools in the same city. The solver therefore
+runs min-cost flow over those groups rather than over a students x schools
+matrix::
+
+    source -> preference group -> city | state | anywhere -> city -> sink
+
+which has the same optimum and, for 10k students in 1k schools, a few
+thousand edges. Each city's students are then dealt to its schools, the
+school with the fewest new placements first, without going over any
+school's free seats.
+"""
+import heapq
+from collections import defaultdict
+
+from sqlalchemy import func, select
+
+from backend.models import School, User, student_school, db
+
+SAME_CITY = 0
+SAME_STATE = 1
+ELSEWHERE = 3
+
+INFINITY = float('inf')
+
+
+class MinCostFlow:
+    """
+    Primal-dual min-cost flow: Dijkstra with node potentials finds the
+    cheapest paths, then a blocking flow saturates all of them at once.
+    Costs here are a handful of small integers, so a few rounds suffice.
+    """
+
+    def __init__(self, node_count):
+        self.node_count = node_count
+        self._edges = []  # [target, residual capacity, cost]; edge i ^ 1 is the reverse of i
+        self._graph = [[] for _ in range(node_count)]
+
+    def add_edge(self, source, target, capacity, cost):
+        """Add an edge and return its index; costs must be non-negative integers."""
+        self._graph[source].append(len(self._edges))
+        self._edges.append([target, capacity, cost])
+        self._graph[target].append(len(self._edges))
+        self._edges.append([source, 0, -cost])
+        return len(self._edges) - 2
+
+    def flow(self, edge):
+        """Flow on an edge after solve()."""
+        return self._edges[edge ^ 1][1]
+
+    def _distances(self, source, potential):
+        edges, graph = self._edges, self._graph
+        distance = [INFINITY] * self.node_count
+        distance[source] = 0
+        queue = [(0, source)]
+        while queue:
+            reached, node = heapq.heappop(queue)
+            if reached > distance[node]:
+                continue
+            for index in graph[node]:
+                target, capacity, cost = edges[index]
+                if capacity > 0:
+                    candidate = reached + cost + potential[node] - potential[target]
+                    if candidate < distance[target]:
+                        distance[target] = candidate
+                        heapq.heappush(queue, (candidate, target))
+        return distance
+
+    def _blocking_flow(self, source, sink, admissible):
+        """Dinic's algorithm over the edges for which admissible(node, index) holds."""
+        edges, graph = self._edges, self._graph
+        total = 0
+        while True:
+            level = {source: 0}
+            frontier = [source]
+            while frontier and sink not in level:
+                following = []
+                for node in frontier:
+                    for index in graph[node]:
+                        target = edges[index][0]
+                        if target not in level and edges[index][1] > 0 and admissible(node, index):
+                            level[target] = level[node] + 1
+                            following.append(target)
+                frontier = following
+            if sink not in level:
+                return total
+
+            pointer = dict.fromkeys(level, 0)
+
+            def push(node, limit):
+                if node == sink:
+                    return limit
+                adjacency = graph[node]
+                while pointer[node] < len(adjacency):
+                    index = adjacency[pointer[node]]
+                    target, capacity, _ = edges[index]
+                    if capacity > 0 and level.get(target) == level[node] + 1 and admissible(node, index):
+                        pushed = push(target, min(limit, capacity))
+                        if pushed:
+                            edges[index][1] -= pushed
+                            edges[index ^ 1][1] += pushed
+                            return pushed
+                    pointer[node] += 1
+                return 0
+
+            while True:
+                pushed = push(source, INFINITY)
+                if not pushed:
+                    break
+                total += pushed
+
+    def solve(self, source, sink):
+        """
+        Send as much flow as possible from source to sink at the least cost
+
+        Returns:
+            tuple: (flow, cost)
+        """
+        edges = self._edges
+        potential = [0] * self.node_count
+        total_flow = 0
+        while True:
+            distance = self._distances(source, potential)
+            if distance[sink] == INFINITY:
+                break
+            for node in range(self.node_count):
+                if distance[node] < INFINITY:
+                    potential[node] += distance[node]
+
+            # Only edges on some cheapest path: reached ends, zero reduced cost
+            def admissible(node, index):
+                target, _, cost = edges[index]
+                return distance[target] < INFINITY and cost + potential[node] == potential[target]
+
+            total_flow += self._blocking_flow(source, sink, admissible)
+
+        total_cost = sum(self.flow(index) * edges[index][2] for index in range(0, len(edges), 2))
+        return total_flow, total_cost
+
+
+def _place(name):
+    """Compare place names without case or surrounding space."""
+    return name.strip().casefold() if name else None
+
+
+def _deal(members, shares):
+    """Split a list into consecutive runs of the given (key, count) sizes."""
+    start = 0
+    for key, count in shares:
+        yield key, members[start:start + count]
+        start += count
+
+
+def plan_placements(students, schools):
+    """
+    Place students in schools at the least total cost
+
+    Args:
+        students (list): (student_id, city, state, same_state_only) tuples;
+            city and state may be None for no preference
+        schools (list): (school_id, city, state, free_seats) tuples; free_seats
+            None for no limit
+
+    Returns:
+        dict: 'placements' as (student_id, school_id, match) tuples, where
+        match is 'city', 'state', 'elsewhere' or 'any', the 'unplaced'
+        student ids and the total 'cost'
+    """
+    seats_needed = len(students)
+
+    # Schools in the same city are interchangeable
+    locations = defaultdict(list)
+    for school_id, city, state, free in schools:
+        free = seats_needed if free is None else min(free, seats_needed)
+        if free > 0:
+            locations[(_place(city), _place(state))].append((school_id, free))
+
+    # So are students with the same preferences
+    groups = defaultdict(list)
+    for student_id, city, state, same_state_only in sorted(students):
+        state = _place(state)
+        groups[(_place(city) if state else None, state, bool(same_state_only and state))].append(student_id)
+
+    location_keys = sorted(locations)
+    group_keys = sorted(groups, key=lambda key: tuple('' if part is None else part for part in key))
+    state_keys = sorted({state for _, state in location_keys})
+
+    # Nodes: source, sink, anywhere, then states, cities and preference groups
+    source, sink, anywhere = 0, 1, 2
+    state_node = {state: 3 + i for i, state in enumerate(state_keys)}
+    location_node = {key: 3 + len(state_keys) + i for i, key in enumerate(location_keys)}
+    group_node = {key: 3 + len(state_keys) + len(location_keys) + i for i, key in enumerate(group_keys)}
+    network = MinCostFlow(3 + len(state_keys) + len(location_keys) + len(group_keys))
+
+    # (hub, location, edge) for the zero cost edges out of anywhere and the states
+    hub_edges = []
+    for key in location_keys:
+        node = location_node[key]
+        network.add_edge(node, sink, sum(free for _, free in locations[key]), 0)
+        hub_edges.append((anywhere, key, network.add_edge(anywhere, node, seats_needed, 0)))
+        hub_edges.append((state_node[key[1]], key, network.add_edge(state_node[key[1]], node, seats_needed, 0)))
+
+    # (group, hub or location, match, edge) for the edges out of each group
+    group_edges = []
+    for key in group_keys:
+        city, state, same_state_only = key
+        node = group_node[key]
+        network.add_edge(source, node, len(groups[key]), 0)
+        if state is None:
+            group_edges.append((key, anywhere, 'any', network.add_edge(node, anywhere, seats_needed, 0)))
+            continue
+        if city is not None and (city, state) in location_node:
+            group_edges.append((key, (city, state), 'city',
+                                network.add_edge(node, location_node[(city, state)], seats_needed, SAME_CITY)))
+        if state in state_node:
+            group_edges.append((key, state_node[state], 'state',
+                                network.add_edge(node, state_node[state], seats_needed,
+                                                 SAME_STATE if city is not None else SAME_CITY)))
+        if not same_state_only:
+            group_edges.append((key, anywhere, 'elsewhere', network.add_edge(node, anywhere, seats_needed, ELSEWHERE)))
+
+    _, cost = network.solve(source, sink)
+
+    # Split the flow into (group, location, match, count) shares. Flow into
+    # a hub may leave by any of its edges, since they all cost nothing
+    shares = defaultdict(list)
+    into_hub = defaultdict(list)
+    for key, target, match, edge in group_edges:
+        flow = network.flow(edge)
+        if flow and match == 'city':
+            shares[key].append(((target, match), flow))
+        elif flow:
+            into_hub[target].append([key, match, flow])
+    for hub, location, edge in hub_edges:
+        flow = network.flow(edge)
+        pending = into_hub[hub]
+        while flow:
+            key, match, available = pending[-1]
+            taken = min(flow, available)
+            shares[key].append(((location, match), taken))
+            flow -= taken
+            pending[-1][2] -= taken
+            if pending[-1][2] == 0:
+                pending.pop()
+
+    # Deal each city's students to its schools, evening out new placements
+    arrivals = defaultdict(list)
+    unplaced = []
+    for key in group_keys:
+        members = groups[key]
+        placed_count = 0
+        for (location, match), chunk in _deal(members, shares[key]):
+            arrivals[location].extend((student_id, match) for student_id in chunk)
+            placed_count += len(chunk)
+        unplaced.extend(members[placed_count:])
+
+    placements = []
+    for location, arriving in arrivals.items():
+        free = {school_id: seats for school_id, seats in locations[location]}
+        queue = [(0, school_id) for school_id in sorted(free)]
+        for student_id, match in arriving:
+            placed, school_id = heapq.heappop(queue)
+            placements.append((student_id, school_id, match))
+            if placed + 1 < free[school_id]:
+                heapq.heappush(queue, (placed + 1, school_id))
+
+    placements.sort()
+    return {'placements': placements, 'unplaced': sorted(unplaced), 'cost': cost}
+
+
+def read_preferences(raw):
+    """
+    Check per-student preferences from a request
+
+    Args:
+        raw (dict): Student id -> {'city', 'state', 'same_state_only'}
+
+    Returns:
+        dict: int student id -> (city, state, same_state_only)
+
+    Raises:
+        ValueError: If an entry is malformed
+    """
+    if not isinstance(raw, dict):
+        raise ValueError('preferences must map student ids to preferences')
+    preferences = {}
+    for student_id, preference in raw.items():
+        try:
+            student_id = int(student_id)
+        except (TypeError, ValueError):
+            raise ValueError(f'preferences: {student_id} is not a student id')
+        if not isinstance(preference, dict):
+            raise ValueError(f'preferences: entry for student {student_id} must be an object')
+        city, state = preference.get('city'), preference.get('state')
+        if city and not state:
+            raise ValueError(f'preferences: student {student_id} names a city without its state')
+        preferences[student_id] = (city, state, bool(preference.get('same_state_only')))
+    return preferences
+
+
+def read_capacities(raw):
+    """
+    Check per-school capacity overrides from a request
+
+    Args:
+        raw (dict): School id -> seats for the session
+
+    Returns:
+        dict: int school id -> int seats
+
+    Raises:
+        ValueError: If an entry is malformed
+    """
+    if not isinstance(raw, dict):
+        raise ValueError('capacities must map school ids to seats')
+    try:
+        capacities = {int(school_id): int(seats) for school_id, seats in raw.items()}
+    except (TypeError, ValueError):
+        raise ValueError('capacities must map school ids to whole numbers')
+    if any(seats < 0 for seats in capacities.values()):
+        raise ValueError('capacities cannot be negative')
+    return capacities
+
+
+def plan_session_placements(session_id, data):
+    """
+    Plan placements for the active students not yet placed in a session
+
+    Args:
+        session_id (int): Session to place students for, None before any
+            session exists
+        data (dict): Request body with optional 'student_ids', 'preferences',
+            'capacities' (school id -> seats) and 'default_capacity' for
+            schools without a capacity
+
+    Returns:
+        dict: The plan, as from plan_placements()
+
+    Raises:
+        ValueError: If the request is malformed
+    """
+    preferences = read_preferences(data.get('preferences') or {})
+    capacities = read_capacities(data.get('capacities') or {})
+    default_capacity = data.get('default_capacity')
+    if default_capacity is not None:
+        if not isinstance(default_capacity, int) or default_capacity < 0:
+            raise ValueError('default_capacity must be a whole number')
+    requested = data.get('student_ids')
+    if requested is not None:
+        if not isinstance(requested, list) or not all(isinstance(i, int) for i in requested):
+            raise ValueError('student_ids must be a list of ids')
+        requested = set(requested)
+
+    placed = select(student_school.c.student_id).where(student_school.c.session_id == session_id)
+    student_ids = db.session.execute(
+        select(User.id).where(User.role == 'student', User.is_active.is_(True), User.id.not_in(placed))
+    ).scalars()
+    students = [(student_id, *preferences.get(student_id, (None, None, False)))
+                for student_id in student_ids if requested is None or student_id in requested]
+
+    taken = dict(db.session.execute(
+        select(student_school.c.school_id, func.count())
+        .where(student_school.c.session_id == session_id)
+        .group_by(student_school.c.school_id)).all())
+    schools = []
+    for school_id, city, state, capacity in db.session.execute(
+            select(School.id, School.city, School.state, School.capacity)):
+        capacity = capacities.get(school_id, default_capacity if capacity is None else capacity)
+        free = None if capacity is None else max(capacity - taken.get(school_id, 0), 0)
+        schools.append((school_id, city, state, free))
+
+    return plan_placements(students, schools)
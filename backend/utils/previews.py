@@ -0,0 +1,262 @@
+"""
+Thumbnails and previews of image attachments.
+
+When a report is saved with an image attachment, the routes hand its path
+to ``queue_previews`` after the commit and answer straight away. A small
+per-process thread pool then writes one downscaled copy per entry of
+``PREVIEW_SIZES`` beside the original::
+
+    uploads/<uuid>_board.jpg
+    uploads/<uuid>_board.jpg.thumbnail.webp
+    uploads/<uuid>_board.jpg.preview.webp
+
+Copies are written to a temporary name and renamed into place, so a copy
+that exists is complete. ``Report.to_dict()`` links a copy through
+``/api/files/reports/<id>/<variant>`` once it exists or while it is being
+made; in the meantime the endpoint answers 404 with ``Retry-After``. Pillow
+is imported by the pool threads only; without it, or with
+``PREVIEWS_ENABLED`` off, nothing is queued and nothing is linked.
+"""
+import importlib.util
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {'jpg', 'jpeg', 'png'}
+FORMATS = {'webp': ('WEBP', 'image/webp'), 'jpeg': ('JPEG', 'image/jpeg')}
+VARIANTS = ('thumbnail', 'preview')
+
+# Uploads this recent may still be in another worker's queue
+PENDING_SECONDS = 60
+
+
+def is_image(file_path):
+    """
+    Check whether an attachment gets previews
+
+    Args:
+        file_path (str): Path of the attachment, or None
+
+    Returns:
+        bool: True for image extensions
+    """
+    return bool(file_path) and '.' in file_path and \
+        file_path.rsplit('.', 1)[1].lower() in IMAGE_EXTENSIONS
+
+
+def variant_path(file_path, variant, extension):
+    """Path of one downscaled copy of an attachment."""
+    return f'{file_path}.{variant}.{extension}'
+
+
+def find_variant(file_path, variant):
+    """
+    Find a finished copy of an attachment in any supported format
+
+    Args:
+        file_path (str): Path of the original
+        variant (str): 'thumbnail' or 'preview'
+
+    Returns:
+        tuple: (path, mimetype), or (None, None) if there is none yet
+    """
+    for extension, (_, mimetype) in FORMATS.items():
+        path = variant_path(file_path, variant, extension)
+        if os.path.exists(path):
+            return path, mimetype
+    return None, None
+
+
+def preview_files(file_path):
+    """
+    List the copies that exist for an attachment
+
+    Args:
+        file_path (str): Path of the original
+
+    Returns:
+        list: Paths of existing thumbnails and previews
+    """
+    if not is_image(file_path):
+        return []
+    return [path for path in (variant_path(file_path, variant, extension)
+                              for variant in VARIANTS for extension in FORMATS)
+            if os.path.exists(path)]
+
+
+class PreviewGenerator:
+    """Downscales images on a thread pool."""
+
+    def __init__(self, sizes, image_format='webp', workers=2, quality=80):
+        self.sizes = dict(sizes)
+        self.image_format = image_format
+        self.workers = workers
+        self.quality = quality
+        self._pool = None
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        # Created on first use so that no threads exist before a prefork
+        # server forks its workers
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='preview')
+        return self._pool
+
+    def submit(self, file_path):
+        with self._lock:
+            self._pending.add(file_path)
+        try:
+            return self._executor().submit(self._generate_logged, file_path)
+        except RuntimeError:
+            self._pending.discard(file_path)
+            raise
+
+    def is_pending(self, file_path):
+        """Whether this process has queued or is making copies of file_path."""
+        return file_path in self._pending
+
+    def _generate_logged(self, file_path):
+        try:
+            self.generate(file_path)
+        except Exception:
+            logger.exception('Could not make previews of %s', file_path)
+        finally:
+            with self._lock:
+                self._pending.discard(file_path)
+
+    def _output_format(self):
+        from PIL import features
+
+        if self.image_format == 'webp' and not features.check('webp'):
+            return 'jpeg'
+        return self.image_format
+
+    def generate(self, file_path):
+        """
+        Write every configured copy of an image
+
+        Args:
+            file_path (str): Path of the original
+
+        Returns:
+            list: Paths written
+        """
+        from PIL import Image, ImageOps
+
+        extension = self._output_format()
+        pil_format = FORMATS[extension][0]
+        written = []
+        with Image.open(file_path) as original:
+            # Let the JPEG decoder skip detail no copy needs
+            largest = max(self.sizes.values())
+            original.draft('RGB', (largest, largest))
+            image = ImageOps.exif_transpose(original)
+            if pil_format == 'JPEG' or image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGB' if pil_format == 'JPEG' else 'RGBA')
+
+            # Largest first, each copy scaled down from the previous one
+            for variant, size in sorted(self.sizes.items(), key=lambda item: -item[1]):
+                image.thumbnail((size, size), Image.LANCZOS)
+                target = variant_path(file_path, variant, extension)
+                partial = f'{target}.part'
+                image.save(partial, pil_format, quality=self.quality)
+                os.replace(partial, target)
+                written.append(target)
+        return written
+
+
+def variant_state(file_path, variant):
+    """
+    Tell whether a copy of an attachment can be served
+
+    Args:
+        file_path (str): Path of the original, or None
+        variant (str): 'thumbnail' or 'preview'
+
+    Returns:
+        str: 'ready' if the copy exists, 'queued' if it is being made, or
+        None if no copy is coming
+    """
+    if not is_image(file_path) or not has_app_context():
+        return None
+    generator = current_app.extensions.get('preview_generator')
+    if generator is None or variant not in generator.sizes:
+        return None
+    if find_variant(file_path, variant)[0]:
+        return 'ready'
+    if generator.is_pending(file_path):
+        return 'queued'
+    # Another worker may have taken the upload
+    try:
+        if time.time() - os.path.getmtime(file_path) < PENDING_SECONDS:
+            return 'queued'
+    except OSError:
+        pass
+    return None
+
+
+def queue_previews(file_path):
+    """
+    Make previews of an attachment in the background, if it is an image
+
+    Args:
+        file_path (str): Path of a saved attachment
+
+    Returns:
+        bool: True if work was queued
+    """
+    if not is_image(file_path) or not has_app_context():
+        return False
+    generator = current_app.extensions.get('preview_generator')
+    if generator is None:
+        return False
+    try:
+        generator.submit(file_path)
+    except RuntimeError:
+        # The pool is shutting down with the process
+        logger.warning('Previews of %s were not queued', file_path)
+        return False
+    return True
+
+
+def remove_previews(file_path):
+    """
+    Delete the copies of an attachment
+
+    Args:
+        file_path (str): Path of the original
+    """
+    for path in preview_files(file_path):
+        try:
+            os.remove(path)
+        except OSError:
+            logger.warning('Could not remove preview %s', path)
+
+
+def init_previews(app):
+    """
+    Create the app's preview generator when previews are enabled and Pillow is installed
+
+    Args:
+        app: The Flask app
+    """
+    if not app.config['PREVIEWS_ENABLED']:
+        return
+    if importlib.util.find_spec('PIL') is None:
+        app.logger.warning('Pillow is not installed; image previews are disabled')
+        return
+    app.extensions['preview_generator'] = PreviewGenerator(
+        app.config['PREVIEW_SIZES'],
+        image_format=app.config['PREVIEW_FORMAT'],
+        workers=app.config['PREVIEW_WORKERS'],
+    )
@@ -0,0 +1,132 @@
+"""
+Slow-query log and N+1 detector.
+
+Opt-in with ``QUERY_INSPECTOR_ENABLED``. Every SQL statement executed while
+handling a request is reduced to a fingerprint (literals and IN lists
+collapsed). At the end of the request, fingerprints repeated more than
+``N_PLUS_ONE_THRESHOLD`` times are logged as suspected N+1 patterns, and
+statements slower than ``SLOW_QUERY_MS`` are logged as they happen, with
+their parameters and the route code that issued them.
+
+In testing mode ``QUERY_BUDGET`` caps the number of statements a request
+may execute; requests over budget fail with a 500 so tests catch them.
+"""
+import re
+import sys
+from collections import Counter
+
+from flask import current_app, g, jsonify, request
+
+from backend.utils.sql_timing import add_statement_consumer
+
+# Modules whose frames are reported as the origin of a statement
+ROUTE_MODULE_PREFIXES = ('backend.routes.', 'services.', 'backend.services.')
+
+_WHITESPACE = re.compile(r'\s+')
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*(?:\?|%\(\w+\)s|%s|:\w+)\s*,?)+\)', re.IGNORECASE)
+_POSTCOMPILE = re.compile(r'\(\[POSTCOMPILE_\w+\]\)')
+
+
+def fingerprint(statement):
+    """
+    Reduce a SQL statement to a shape shared by all its executions
+
+    Args:
+        statement (str): SQL text as sent to the driver
+
+    Returns:
+        str: Normalized statement
+    """
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    statement = _STRING_LITERAL.sub('?', statement)
+    statement = _NUMBER_LITERAL.sub('?', statement)
+    statement = _POSTCOMPILE.sub('(?)', statement)
+    return _IN_LIST.sub('IN (?)', statement)
+
+
+def route_frame():
+    """Describe the innermost route or service frame on the current stack."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if module.startswith(ROUTE_MODULE_PREFIXES):
+            return f'{module}.{frame.f_code.co_name} line {frame.f_lineno}'
+        frame = frame.f_back
+    return 'unknown'
+
+
+class QueryInspector:
+    """Per-request statement bookkeeping for one app."""
+
+    def __init__(self, app):
+        self.threshold = app.config['N_PLUS_ONE_THRESHOLD']
+        self.slow_seconds = app.config['SLOW_QUERY_MS'] / 1000.0
+        self.budget = app.config['QUERY_BUDGET'] if app.testing else None
+
+        app.extensions['query_inspector'] = self
+        app.before_request(self.start_request)
+        app.after_request(self.finish_request)
+
+        add_statement_consumer(_record_statement)
+
+    def start_request(self):
+        g._query_counts = Counter()
+        g._query_origins = {}
+
+    def record(self, statement, parameters, elapsed):
+        counts = g.get('_query_counts')
+        if counts is None:
+            return
+
+        key = fingerprint(statement)
+        counts[key] += 1
+        if counts[key] == self.threshold + 1:
+            g._query_origins[key] = route_frame()
+
+        if elapsed >= self.slow_seconds:
+            current_app.logger.warning(
+                'Slow query (%.1f ms) in %s at %s: %s; parameters=%r',
+                elapsed * 1000, request.endpoint, route_frame(), statement, parameters)
+
+    def finish_request(self, response):
+        counts = g.pop('_query_counts', None)
+        origins = g.pop('_query_origins', {})
+        if not counts:
+            return response
+
+        for key, count in counts.items():
+            if count > self.threshold:
+                current_app.logger.warning(
+                    'Possible N+1 in %s: %d executions of %s (from %s)',
+                    request.endpoint, count, key, origins.get(key, 'unknown'))
+
+        total = sum(counts.values())
+        if self.budget is not None and total > self.budget:
+            current_app.logger.error(
+                'Query budget exceeded in %s: %d statements, budget %d',
+                request.endpoint, total, self.budget)
+            response = jsonify({
+                'error': f'Query budget exceeded: {total} statements, budget {self.budget}',
+                'queries': counts.most_common(5),
+            })
+            response.status_code = 500
+
+        return response
+
+
+def _record_statement(statement, parameters, elapsed):
+    inspector = current_app.extensions.get('query_inspector')
+    if inspector is not None:
+        inspector.record(statement, parameters, elapsed)
+
+
+def init_query_inspector(app):
+    """
+    Install the slow-query log and N+1 detector on an app
+
+    Args:
+        app: The Flask app
+    """
+    return QueryInspector(app)
@@ -0,0 +1,212 @@
+"""
+Token-bucket rate limiting.
+
+Each key (e.g. ``ip:10.0.0.1`` or ``user:alice``) owns a bucket holding up
+to ``capacity`` tokens that refills at ``refill_rate`` tokens per second.
+A request spends one token; an empty bucket rejects it and reports how long
+until a token is available.
+
+Two backends are provided. ``MemoryBucketStore`` keeps buckets in an LRU
+bounded by ``max_keys`` and suits a single process. ``SQLiteBucketStore``
+keeps them in a small SQLite file so that all workers on a host share the
+same limits.
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, jsonify, request
+
+
+class MemoryBucketStore:
+    """In-process buckets with LRU eviction."""
+
+    def __init__(self, capacity, refill_rate, max_keys=100000):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, now=None):
+        """
+        Take one token from a bucket
+
+        Args:
+            key (str): Bucket key
+            now (float): Current monotonic time, for tests
+
+        Returns:
+            float: 0 if allowed, otherwise seconds until a token is available
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.refill_rate)
+
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / self.refill_rate
+
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+        return wait
+
+
+class SQLiteBucketStore:
+    """Buckets shared by every process on the host through a SQLite file."""
+
+    def __init__(self, path, capacity, refill_rate, max_keys=100000):
+        self.path = path
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.max_keys = max_keys
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS bucket ('
+                'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS bucket_updated ON bucket (updated)')
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or getattr(self._local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def consume(self, key, now=None):
+        # Wall-clock time, since monotonic clocks differ between processes
+        now = time.time() if now is None else now
+        connection = self._connect()
+
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT tokens, updated FROM bucket WHERE key = ?', (key,)).fetchone()
+            tokens, updated = row if row else (self.capacity, now)
+            tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.refill_rate)
+
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / self.refill_rate
+
+            connection.execute('INSERT OR REPLACE INTO bucket (key, tokens, updated) VALUES (?, ?, ?)',
+                               (key, tokens, now))
+
+            # Drop the least recently used buckets once in a while
+            if row is None and hash(key) % 100 == 0:
+                connection.execute(
+                    'DELETE FROM bucket WHERE key IN ('
+                    'SELECT key FROM bucket ORDER BY updated DESC LIMIT -1 OFFSET ?)', (self.max_keys,))
+
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+        return wait
+
+
+class RateLimiter:
+    """Applies one token bucket per key from a shared store."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def check(self, *keys):
+        """
+        Spend a token from each key's bucket, in order
+
+        The first bucket to refuse ends the check, so the buckets after it
+        keep their tokens: a client whose own IP bucket is empty cannot
+        drain the bucket of the username it is trying.
+
+        Args:
+            *keys (str): Bucket keys that must all allow the request, the
+                one under the client's control first
+
+        Returns:
+            float: 0 if allowed, otherwise seconds to wait before retrying
+        """
+        for key in keys:
+            if key:
+                wait = self.store.consume(key)
+                if wait:
+                    return wait
+        return 0.0
+
+
+def create_rate_limiter(config, prefix):
+    """
+    Build a rate limiter from ``<prefix>_*`` config settings
+
+    Args:
+        config (dict): App configuration
+        prefix (str): Setting prefix, e.g. 'LOGIN_RATE_LIMIT'
+
+    Returns:
+        RateLimiter: The configured limiter
+    """
+    capacity = config[f'{prefix}_CAPACITY']
+    refill_rate = config[f'{prefix}_PER_MINUTE'] / 60.0
+    max_keys = config[f'{prefix}_MAX_KEYS']
+
+    if config[f'{prefix}_BACKEND'] == 'sqlite':
+        store = SQLiteBucketStore(config[f'{prefix}_PATH'], capacity, refill_rate, max_keys)
+    else:
+        store = MemoryBucketStore(capacity, refill_rate, max_keys)
+
+    return RateLimiter(store)
+
+
+def login_rate_limited(view):
+    """
+    Throttle a login view per client IP and per username.
+
+    Runs before the view, so rejected attempts cost no database query and no
+    password hash.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        limiter = current_app.extensions.get('login_rate_limiter')
+        if limiter is not None:
+            data = request.get_json(silent=True)
+            username = data.get('username') if isinstance(data, dict) else None
+            wait = limiter.check(
+                f'ip:{request.remote_addr}',
+                f'user:{str(username).lower()}' if username else None,
+            )
+            if wait:
+                response = jsonify({'error': 'Too many login attempts. Please try again later'})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(math.ceil(wait))
+                return response
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def init_login_rate_limiter(app):
+    """
+    Create the login rate limiter if LOGIN_RATE_LIMIT_ENABLED is set
+
+    Args:
+        app: The Flask app
+    """
+    if app.config['LOGIN_RATE_LIMIT_ENABLED']:
+        app.extensions['login_rate_limiter'] = create_rate_limiter(app.config, 'LOGIN_RATE_LIMIT')
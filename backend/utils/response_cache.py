@@ -0,0 +1,414 @@
+"""
+Per-user response cache for read-heavy views.
+
+``cached_response`` stores a view's successful responses under the endpoint,
+the user from the access token and the query string, for ``RESPONSE_CACHE_TTL``
+seconds. Every entry belongs to two groups, its user and its endpoint, and
+writes evict groups:
+
+* reports: the student and their supervisors
+* evaluations: the student and the lecturer, and every lecturer's trends
+* assignments (``assign_school``, ``assign_supervisor``): the users involved
+* users and schools: the admin dashboard, and for names, roles and
+  activation also the user and the student dashboards that show them
+* teaching practice sessions: everything, since the active session may move
+
+Groups touched by a flush are collected on the session and evicted once the
+transaction commits; nothing is evicted for a rollback. A response computed
+while a commit evicted one of its groups is not stored, so a slow reader
+cannot put back what a writer just invalidated.
+
+``MemoryResponseStore`` is an LRU private to each process. With several
+workers, ``SQLiteResponseStore`` shares entries and evictions between every
+process on the host through a SQLite file. Across hosts, entries live at
+most ``RESPONSE_CACHE_TTL`` seconds after a change.
+
+Evicting everything also bumps the 'response_cache' version stamp in the
+writer's transaction. Every process compares it with the stamp its cache
+last saw before a lookup and empties its store when it moved, so changes
+made outside the workers, such as ``python -m backend.archive``, reach every
+store on its next request.
+"""
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, current_app, has_app_context, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from backend.utils.versioning import bump_version, current_version
+
+ALL = '*'
+VERSION_NAME = 'response_cache'
+PENDING_KEY = 'response_cache_evict'
+
+ADMIN_DASHBOARD = 'admin.get_dashboard_data'
+STUDENT_DASHBOARD = 'student.get_dashboard_data'
+STUDENT_TREND = 'lecturer.get_student_trend'
+
+# User attributes that cached responses show
+DISPLAYED_USER_FIELDS = ('first_name', 'last_name', 'role', 'is_active')
+
+
+def user_group(user_id):
+    return f'user:{user_id}'
+
+
+def endpoint_group(endpoint):
+    return f'endpoint:{endpoint}'
+
+
+class MemoryResponseStore:
+    """In-process responses with LRU eviction and an index from group to keys."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._groups = {}
+        self._evicted = {}
+        self._lock = threading.Lock()
+
+    def now(self):
+        return time.monotonic()
+
+    def _drop(self, key):
+        groups, _, _ = self._entries.pop(key)
+        for group in groups:
+            keys = self._groups.get(group)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._groups[group]
+
+    def get(self, key):
+        now = self.now()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def set(self, key, groups, value, ttl, started):
+        now = self.now()
+        with self._lock:
+            if any(self._evicted.get(group, 0) >= started for group in groups + (ALL,)):
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (groups, now + ttl, value)
+            for group in groups:
+                self._groups.setdefault(group, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def evict(self, groups):
+        now = self.now()
+        with self._lock:
+            if ALL in groups:
+                self._entries.clear()
+                self._groups.clear()
+            else:
+                for group in groups:
+                    for key in list(self._groups.get(group, ())):
+                        self._drop(key)
+            for group in groups:
+                self._evicted[group] = now
+            if len(self._evicted) > self.max_entries:
+                # Forget the marks; responses in flight are simply not stored
+                self._evicted = {ALL: now}
+
+
+class SQLiteResponseStore:
+    """Responses shared by every process on the host through a SQLite file."""
+
+    def __init__(self, path, max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS response ('
+                'key TEXT PRIMARY KEY, user_group TEXT NOT NULL, endpoint_group TEXT NOT NULL, '
+                'expires REAL NOT NULL, status INTEGER NOT NULL, mimetype TEXT, body BLOB NOT NULL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS response_user ON response (user_group)')
+            connection.execute('CREATE INDEX IF NOT EXISTS response_endpoint ON response (endpoint_group)')
+            connection.execute('CREATE INDEX IF NOT EXISTS response_expires ON response (expires)')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS evicted (grp TEXT PRIMARY KEY, at REAL NOT NULL)')
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or getattr(self._local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def now(self):
+        # Wall-clock time, since monotonic clocks differ between processes
+        return time.time()
+
+    def get(self, key):
+        row = self._connect().execute(
+            'SELECT status, mimetype, body FROM response WHERE key = ? AND expires > ?',
+            (key, self.now())).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], bytes(row[2])
+
+    def set(self, key, groups, value, ttl, started):
+        user, endpoint = groups
+        status, mimetype, body = value
+        now = self.now()
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            evicted = connection.execute(
+                'SELECT 1 FROM evicted WHERE grp IN (?, ?, ?) AND at >= ? LIMIT 1',
+                (user, endpoint, ALL, started)).fetchone()
+            if not evicted:
+                connection.execute(
+                    'INSERT OR REPLACE INTO response '
+                    '(key, user_group, endpoint_group, expires, status, mimetype, body) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (key, user, endpoint, now + ttl, status, mimetype, body))
+
+                # Drop expired and least recently stored entries once in a while
+                if random.random() < 0.01:
+                    connection.execute('DELETE FROM response WHERE expires <= ?', (now,))
+                    connection.execute(
+                        'DELETE FROM response WHERE key IN ('
+                        'SELECT key FROM response ORDER BY expires DESC LIMIT -1 OFFSET ?)',
+                        (self.max_entries,))
+                    connection.execute('DELETE FROM evicted WHERE at < ?', (now - ttl,))
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+    def evict(self, groups):
+        groups = list(groups)
+        now = self.now()
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            if ALL in groups:
+                connection.execute('DELETE FROM response')
+            else:
+                marks = ', '.join('?' for _ in groups)
+                connection.execute(
+                    f'DELETE FROM response WHERE user_group IN ({marks}) OR endpoint_group IN ({marks})',
+                    groups + groups)
+            connection.executemany('INSERT OR REPLACE INTO evicted (grp, at) VALUES (?, ?)',
+                                   [(group, now) for group in groups])
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+
+class ResponseCache:
+    """Looks responses up in a store and records hits and misses."""
+
+    def __init__(self, store, ttl, record_metrics=False):
+        self.store = store
+        self.ttl = ttl
+        self.record_metrics = record_metrics
+        self._version = None
+
+    def _count(self, endpoint, result):
+        if self.record_metrics:
+            from backend.utils.metrics import RESPONSE_CACHE_LOOKUPS
+            RESPONSE_CACHE_LOOKUPS.labels(endpoint, result).inc()
+
+    def lookup(self, endpoint, key):
+        value = self.store.get(key)
+        self._count(endpoint, 'hit' if value is not None else 'miss')
+        return value
+
+    def sync(self, session):
+        """Empty the store if another process evicted everything since the last request."""
+        version = current_version(VERSION_NAME, session)
+        if self._version is not None and version != self._version:
+            self.evict({ALL})
+        self._version = version
+
+    def evict(self, groups):
+        if groups:
+            self.store.evict(groups)
+            if self.record_metrics:
+                from backend.utils.metrics import RESPONSE_CACHE_EVICTIONS
+                RESPONSE_CACHE_EVICTIONS.inc(len(groups))
+
+
+def _cache():
+    if has_app_context():
+        return current_app.extensions.get('response_cache')
+    return None
+
+
+def cached_response(view):
+    """
+    Serve a view's 200 responses from the cache for the current user.
+
+    Goes below ``@jwt_required()``. Responses vary by endpoint, user, path
+    and query string only; other inputs must not change what the view returns.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        cache = _cache()
+        if cache is None:
+            return view(*args, **kwargs)
+
+        # Imported here so that creating the app does not load the models
+        from backend.models import db
+
+        cache.sync(db.session)
+        user_id = get_jwt_identity()
+        endpoint = request.endpoint
+        key = f'{endpoint}:{user_id}:{request.path}?{request.query_string.decode("latin-1")}'
+
+        value = cache.lookup(endpoint, key)
+        if value is not None:
+            status, mimetype, body = value
+            response = Response(body, status=status, mimetype=mimetype)
+            response.headers['X-Cache'] = 'HIT'
+            return response
+
+        started = cache.store.now()
+        response = current_app.make_response(view(*args, **kwargs))
+        if response.status_code == 200 and not response.direct_passthrough:
+            cache.store.set(key, (user_group(user_id), endpoint_group(endpoint)),
+                            (response.status_code, response.mimetype, response.get_data()),
+                            cache.ttl, started)
+            response.headers['X-Cache'] = 'MISS'
+        return response
+    return wrapper
+
+
+def invalidate(session, *groups):
+    """
+    Evict cache groups once the session's transaction commits
+
+    For writes that bypass the ORM, such as Core inserts into association
+    tables.
+
+    Evicting ALL also bumps the shared stamp, so that the stores of other
+    processes are emptied too.
+
+    Args:
+        session: The session doing the write
+        *groups (str): Groups from user_group(), endpoint_group() or ALL
+    """
+    if ALL in groups:
+        bump_version(VERSION_NAME, session.connection())
+    session.info.setdefault(PENDING_KEY, set()).update(groups)
+
+
+def _changed(obj, fields):
+    state = inspect(obj)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+
+def _collect(session, flush_context):
+    """Work out which groups a flush makes stale."""
+    # Imported here so that creating the app does not load the models
+    from backend.models import (Evaluation, Report, School, TeachingPracticeSession, User,
+                                lecturer_student)
+
+    groups = set()
+    report_students = set()
+    for obj, is_update in [(obj, False) for obj in session.new] + \
+                          [(obj, True) for obj in session.dirty] + \
+                          [(obj, False) for obj in session.deleted]:
+        if isinstance(obj, TeachingPracticeSession):
+            groups.add(ALL)
+        elif isinstance(obj, Report):
+            groups.add(user_group(obj.student_id))
+            report_students.add(obj.student_id)
+        elif isinstance(obj, Evaluation):
+            # Trends show the student's evaluations by every lecturer
+            groups.update((user_group(obj.student_id), user_group(obj.lecturer_id),
+                           endpoint_group(STUDENT_TREND)))
+        elif isinstance(obj, User):
+            # Logins rehash passwords; only what dashboards show matters
+            if not is_update or _changed(obj, DISPLAYED_USER_FIELDS):
+                groups.update((endpoint_group(ADMIN_DASHBOARD), user_group(obj.id)))
+            if is_update and _changed(obj, DISPLAYED_USER_FIELDS):
+                groups.add(endpoint_group(STUDENT_DASHBOARD))
+        elif isinstance(obj, School):
+            groups.update((endpoint_group(ADMIN_DASHBOARD), endpoint_group(STUDENT_DASHBOARD)))
+
+    if report_students:
+        lecturers = session.connection().execute(
+            select(lecturer_student.c.lecturer_id).distinct()
+            .where(lecturer_student.c.student_id.in_(report_students)))
+        groups.update(user_group(row[0]) for row in lecturers)
+
+    if groups:
+        invalidate(session, *groups)
+
+
+def _evict_committed(session):
+    groups = session.info.pop(PENDING_KEY, None)
+    cache = _cache()
+    if groups and cache is not None:
+        try:
+            cache.evict(groups)
+        except Exception:
+            # The commit stands; stale entries expire with their TTL
+            current_app.logger.exception('Could not evict cached responses')
+
+
+def _discard_pending(session):
+    session.info.pop(PENDING_KEY, None)
+
+
+def create_response_cache(config):
+    """
+    Build the response cache from ``RESPONSE_CACHE_*`` settings
+
+    Args:
+        config (dict): App configuration
+
+    Returns:
+        ResponseCache: The configured cache
+    """
+    max_entries = config['RESPONSE_CACHE_MAX_ENTRIES']
+    if config['RESPONSE_CACHE_BACKEND'] == 'sqlite':
+        store = SQLiteResponseStore(config['RESPONSE_CACHE_PATH'], max_entries)
+    else:
+        store = MemoryResponseStore(max_entries)
+    return ResponseCache(store, config['RESPONSE_CACHE_TTL'], record_metrics=config['METRICS_ENABLED'])
+
+
+def init_response_cache(app):
+    """
+    Create the response cache if RESPONSE_CACHE_ENABLED is set and hook it to commits
+
+    Args:
+        app: The Flask app
+    """
+    if not app.config['RESPONSE_CACHE_ENABLED']:
+        return
+    app.extensions['response_cache'] = create_response_cache(app.config)
+
+    if not event.contains(Session, 'after_flush', _collect):
+        event.listen(Session, 'after_flush', _collect)
+        event.listen(Session, 'after_commit', _evict_committed)
+        event.listen(Session, 'after_rollback', _discard_pending)
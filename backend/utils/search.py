@@ -0,0 +1,353 @@
+"""
+Typeahead search over users and schools.
+
+Each worker keeps a prefix index: per kind, a sorted list of ``(token,
+weight, kind, id)`` entries, one per distinct word of a user's name,
+username and email or a school's name and place. A query token is looked
+up with one bisect per kind searched, and every other token of the query
+must prefix a token of the same user or school. Results are ranked by
+whole-word matches first, then by field (names before usernames before
+emails), then by the shortest label. At most ``MAX_SCAN`` candidates of
+each kind are read; users skipped by the ``role`` and ``active`` filters
+do not count against it.
+
+Writes keep the index current through two version stamps, bumped from a
+flush hook in the writer's transaction. ``search`` moves on every insert
+or update of a searched field, and the index then re-reads only the rows
+whose ``updated_at`` is past its watermark. ``search_deletes:<kind>`` moves
+when a user or school is deleted, and that kind is then read again in full.
+
+Searches read an immutable ``Snapshot`` and take no lock. A refresh
+copies the current snapshot, applies the changes to the copy and swaps it
+in, so searches running meanwhile finish on the old one. ``preload_app``
+builds the index in the prefork master (about 4 seconds for 100,000 users),
+and workers inherit it; otherwise the first search in each worker builds it.
+
+With ``SEARCH_INDEX_ENABLED`` off, ``search_database`` runs the same
+query as ``LIKE`` filters. On PostgreSQL the trigram indexes from the
+migrations serve these filters.
+"""
+import bisect
+import heapq
+import re
+import threading
+from datetime import timedelta
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, inspect, literal_column, select
+from sqlalchemy.orm import Session
+
+from backend.utils.versioning import bump_version, current_version
+
+VERSION_NAME = 'search'
+DELETES_VERSION_NAME = 'search_deletes'
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+MAX_SCAN = 2000  # candidates read per kind for one query; short prefixes stop here
+
+# Rows committed this long before the watermark are read again, in case
+# they were written by a worker whose clock is behind
+WATERMARK_MARGIN = timedelta(minutes=1)
+
+NAME, HANDLE, CONTACT = 0, 1, 2  # field weights, best first
+
+USER_FIELDS = ('first_name', 'last_name', 'username', 'email', 'role', 'is_active')
+SCHOOL_FIELDS = ('name', 'city', 'state')
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens."""
+    return TOKEN_PATTERN.findall(text.casefold()) if text else []
+
+
+def _user_tokens(row):
+    # token -> best weight; later updates win
+    tokens = dict.fromkeys(tokenize(row.email), CONTACT)
+    tokens.update(dict.fromkeys(tokenize(row.username), HANDLE))
+    tokens.update(dict.fromkeys(tokenize(f'{row.first_name} {row.last_name}'), NAME))
+    return tokens
+
+
+def _school_tokens(row):
+    tokens = dict.fromkeys(tokenize(f'{row.city} {row.state}'), HANDLE)
+    tokens.update(dict.fromkeys(tokenize(row.name), NAME))
+    return tokens
+
+
+def _user_label(row):
+    return f'{row.first_name} {row.last_name}'
+
+
+def _school_label(row):
+    return row.name
+
+
+def _user_record(row):
+    return {
+        'type': 'user',
+        'id': row.id,
+        'username': row.username,
+        'email': row.email,
+        'first_name': row.first_name,
+        'last_name': row.last_name,
+        'role': row.role,
+        'is_active': bool(row.is_active),
+        'label': _user_label(row),
+    }
+
+
+def _school_record(row):
+    return {
+        'type': 'school',
+        'id': row.id,
+        'name': row.name,
+        'city': row.city,
+        'state': row.state,
+        'label': _school_label(row),
+    }
+
+
+KIND_FUNCTIONS = {
+    'user': (_user_tokens, _user_label, _user_record),
+    'school': (_school_tokens, _school_label, _school_record),
+}
+
+
+def _kind_query(kind):
+    # Imported here so that creating the app does not load the models
+    from backend.models import School, User
+
+    if kind == 'user':
+        return User, select(User.id, User.username, User.email, User.first_name, User.last_name,
+                            User.role, User.is_active, User.updated_at)
+    return School, select(School.id, School.name, School.city, School.state, School.updated_at)
+
+
+def deletes_version_name(kind):
+    return f'{DELETES_VERSION_NAME}:{kind}'
+
+
+class Snapshot:
+    """One immutable state of the index; never changed once published."""
+
+    def __init__(self, entries, rows, versions, watermarks):
+        self.entries = entries  # kind -> sorted (token, weight, kind, id)
+        self.rows = rows  # (kind, id) -> (row, {token: weight}, label)
+        self.versions = versions
+        self.watermarks = watermarks
+
+
+EMPTY = Snapshot({kind: [] for kind in KIND_FUNCTIONS}, {}, None, {})
+
+
+class SearchIndex:
+    """Per-process prefix index of users and schools."""
+
+    def __init__(self):
+        self._snapshot = EMPTY
+        self._lock = threading.Lock()  # taken by refreshes only
+
+    def _load(self, kind, session, entries, rows, watermarks, since=None):
+        """Read a kind into the new snapshot's entries and rows, which no search sees yet."""
+        model, query = _kind_query(kind)
+        if since is not None:
+            query = query.where(model.updated_at >= since - WATERMARK_MARGIN)
+        loaded = session.execute(query).all()
+        make_tokens, make_label, _ = KIND_FUNCTIONS[kind]
+
+        if since is None:
+            # Full load: rebuild this kind's entries with one sort
+            kind_entries = []
+            for key in [key for key in rows if key[0] == kind]:
+                del rows[key]
+            for row in loaded:
+                tokens = make_tokens(row)
+                rows[(kind, row.id)] = (row, tokens, make_label(row))
+                kind_entries.extend([(token, weight, kind, row.id) for token, weight in tokens.items()])
+            kind_entries.sort()
+        else:
+            kind_entries = list(entries[kind])
+            for row in loaded:
+                key = (kind, row.id)
+                if key in rows:
+                    old_row, old_tokens, _ = rows[key]
+                    if old_row == row:
+                        continue
+                    for token, weight in old_tokens.items():
+                        del kind_entries[bisect.bisect_left(kind_entries, (token, weight) + key)]
+                tokens = make_tokens(row)
+                rows[key] = (row, tokens, make_label(row))
+                for token, weight in tokens.items():
+                    bisect.insort(kind_entries, (token, weight) + key)
+        entries[kind] = kind_entries
+
+        stamps = [row.updated_at for row in loaded if row.updated_at is not None]
+        if since is not None:
+            stamps.append(since)
+        if stamps:
+            watermarks[kind] = max(stamps)
+
+    def refresh(self, session):
+        """
+        Bring the index up to date with the version stamps
+
+        A new snapshot is built aside and then swapped in, so searches
+        keep reading the previous one meanwhile.
+
+        Returns:
+            Snapshot: The current snapshot
+        """
+        versions = {name: current_version(name, session) for name in
+                    (VERSION_NAME, deletes_version_name('user'), deletes_version_name('school'))}
+        snapshot = self._snapshot
+        if versions == snapshot.versions:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if versions == snapshot.versions:
+                return snapshot
+            entries, rows, watermarks = dict(snapshot.entries), dict(snapshot.rows), dict(snapshot.watermarks)
+            for kind in KIND_FUNCTIONS:
+                name = deletes_version_name(kind)
+                full = snapshot.versions is None or versions[name] != snapshot.versions[name] or \
+                    watermarks.get(kind) is None
+                self._load(kind, session, entries, rows, watermarks, None if full else watermarks[kind])
+            self._snapshot = Snapshot(entries, rows, versions, watermarks)
+            return self._snapshot
+
+    def search(self, session, text, kind=None, role=None, active_only=False, limit=DEFAULT_LIMIT):
+        """
+        Find users and schools whose words start with every word of text
+
+        Args:
+            session: Session to read version stamps and changes with
+            text (str): What the user typed
+            kind (str): 'user' or 'school', None for both
+            role (str): Only users with this role
+            active_only (bool): Skip deactivated users
+            limit (int): Most results to return
+
+        Returns:
+            list: Result dicts, best first
+        """
+        terms = sorted(set(tokenize(text)), key=len, reverse=True)
+        if not terms:
+            return []
+        snapshot = self.refresh(session)
+        rows = snapshot.rows
+
+        # Look the longest term up; check the others against each candidate
+        anchor, others = terms[0], terms[1:]
+        best = {}
+        whole_words = 0
+        for entry_kind in [kind] if kind else KIND_FUNCTIONS:
+            entries = snapshot.entries[entry_kind]
+            filtered = entry_kind == 'user' and (role or active_only)
+            scanned = 0
+            for index in range(bisect.bisect_left(entries, (anchor,)), len(entries)):
+                token, weight, _, entry_id = entries[index]
+                if not token.startswith(anchor) or scanned >= MAX_SCAN:
+                    break
+                exact = token == anchor
+                if not exact and whole_words >= limit:
+                    # Whole-word matches outrank every prefix match
+                    break
+                key = (entry_kind, entry_id)
+                rank = (0 if exact else 1, weight)
+                if key in best:
+                    best[key] = min(best[key], rank)
+                    continue
+                row, tokens, _ = rows[key]
+                if filtered and ((role and row.role != role) or (active_only and not row.is_active)):
+                    continue
+                scanned += 1
+                if not others or all(any(word.startswith(term) for word in tokens) for term in others):
+                    best[key] = rank
+                    whole_words += exact
+
+        top = heapq.nsmallest(limit, best, key=lambda key: (best[key], len(rows[key][2]), rows[key][2], key))
+        return [KIND_FUNCTIONS[key[0]][2](rows[key][0]) for key in top]
+
+
+search_index = SearchIndex()
+
+
+def search_database(text, kind=None, role=None, active_only=False, limit=DEFAULT_LIMIT):
+    """
+    Run a search with LIKE filters instead of the in-memory index
+
+    Args:
+        text (str): What the user typed
+        kind (str): 'user' or 'school', None for both
+        role (str): Only users with this role
+        active_only (bool): Skip deactivated users
+        limit (int): Most results of each kind to return
+
+    Returns:
+        list: Result dicts, users then schools
+    """
+    from backend.models import School, User
+
+    terms = set(tokenize(text))
+    if not terms:
+        return []
+    results = []
+    # Same expressions as the trigram indexes; the spaces are inlined
+    # rather than bound so that PostgreSQL can match them
+    space = literal_column("' '")
+    if kind in (None, 'user'):
+        haystack = func.lower(User.first_name + space + User.last_name + space + User.username + space + User.email)
+        query = User.query.filter(*[haystack.like(f'%{term}%') for term in terms])
+        if role:
+            query = query.filter(User.role == role)
+        if active_only:
+            query = query.filter(User.is_active.is_(True))
+        users = query.order_by(User.last_name, User.first_name, User.id).limit(limit)
+        results.extend(_user_record(user) for user in users)
+    if kind in (None, 'school'):
+        haystack = func.lower(School.name + space + School.city + space + School.state)
+        schools = School.query.filter(*[haystack.like(f'%{term}%') for term in terms])\
+            .order_by(School.name, School.id).limit(limit)
+        results.extend(_school_record(school) for school in schools)
+    return results
+
+
+def _changed(obj, fields):
+    state = inspect(obj)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+
+def _bump_on_change(session, flush_context):
+    """Move the search stamps when a flush touched searched fields."""
+    from backend.models import School, User
+
+    searched = {User: USER_FIELDS, School: SCHOOL_FIELDS}
+    deleted = any(type(obj) in searched for obj in session.deleted)
+    changed = deleted or any(type(obj) in searched for obj in session.new) or \
+        any(type(obj) in searched and _changed(obj, searched[type(obj)]) for obj in session.dirty)
+    if changed:
+        connection = session.connection()
+        bump_version(VERSION_NAME, connection)
+        for kind in {type(obj).__name__.lower() for obj in session.deleted if type(obj) in searched}:
+            bump_version(deletes_version_name(kind), connection)
+
+
+def search_enabled():
+    """Whether searches use the in-memory index."""
+    return has_app_context() and current_app.config['SEARCH_INDEX_ENABLED']
+
+
+def init_search(app):
+    """
+    Keep the search index's version stamps moving with writes
+
+    Args:
+        app: The Flask app
+    """
+    if not app.config['SEARCH_INDEX_ENABLED']:
+        return
+    if not event.contains(Session, 'after_flush', _bump_on_change):
+        event.listen(Session, 'after_flush', _bump_on_change)
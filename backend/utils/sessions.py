@@ -0,0 +1,190 @@
+"""
+Teaching practice session scoping.
+
+Reports, evaluations and assignments belong to a teaching practice session.
+Routes show the active session unless the client asks for another one with
+``?session_id=<id>``, or for every session with ``?session_id=all``. A
+scope of None means "all sessions"; it is also what routes get when no
+session exists yet, so a fresh install behaves as before.
+"""
+from datetime import datetime, timedelta
+
+from flask import g, has_request_context
+from sqlalchemy import and_, case, insert, or_
+
+from backend.models import TeachingPracticeSession, lecturer_student, student_school, db
+from backend.utils.response_cache import STUDENT_DASHBOARD, endpoint_group, invalidate, user_group
+from backend.utils.supervision import bump_supervision_version
+
+ALL_SESSIONS = 'all'
+DEFAULT_SESSION_DAYS = 90  # length of the session made for a fresh install
+
+
+def active_session_id():
+    """
+    Get the session routes default to, once per request
+
+    The ongoing session wins, then the one whose dates cover today, then
+    the one that started most recently.
+
+    Returns:
+        int: Session id, or None if there are no sessions
+    """
+    if has_request_context() and '_active_session_id' in g:
+        return g._active_session_id
+
+    now = datetime.utcnow()
+    covers_today = and_(TeachingPracticeSession.start_date <= now,
+                        TeachingPracticeSession.end_date >= now)
+    session_id = db.session.query(TeachingPracticeSession.id)\
+        .filter(or_(TeachingPracticeSession.status == 'ongoing',
+                    TeachingPracticeSession.start_date <= now))\
+        .order_by(case((TeachingPracticeSession.status == 'ongoing', 0),
+                       (covers_today, 1), else_=2),
+                  TeachingPracticeSession.start_date.desc())\
+        .limit(1).scalar()
+
+    if has_request_context():
+        g._active_session_id = session_id
+    return session_id
+
+
+def has_sessions():
+    """Whether any teaching practice session exists yet."""
+    return db.session.query(TeachingPracticeSession.id).first() is not None
+
+
+def default_session_id():
+    """
+    Get the session new assignments go to when none is named
+
+    On an install without any session, a default session starting today is
+    added to the caller's transaction first, like the one the session
+    partitioning migration creates for older data.
+
+    Returns:
+        int: The active session, or None if sessions exist but none is active
+    """
+    session_id = active_session_id()
+    if session_id is not None or has_sessions():
+        return session_id
+
+    now = datetime.utcnow()
+    session = TeachingPracticeSession(
+        title='Teaching Practice',
+        start_date=now,
+        end_date=now + timedelta(days=DEFAULT_SESSION_DAYS),
+        description='Created for the first assignment',
+        status='ongoing'
+    )
+    db.session.add(session)
+    db.session.flush()
+
+    if has_request_context():
+        g._active_session_id = session.id
+    return session.id
+
+
+def session_for_date(when):
+    """
+    Find the session a dated record belongs to
+
+    Args:
+        when (datetime): Submission or visit date
+
+    Returns:
+        int: The latest session covering the date, else the active session
+    """
+    session_id = db.session.query(TeachingPracticeSession.id)\
+        .filter(TeachingPracticeSession.start_date <= when,
+                TeachingPracticeSession.end_date >= when)\
+        .order_by(TeachingPracticeSession.start_date.desc())\
+        .limit(1).scalar()
+    return session_id if session_id is not None else active_session_id()
+
+
+def requested_session_id(args):
+    """
+    Read the ``session_id`` query parameter
+
+    Args:
+        args: Request query arguments
+
+    Returns:
+        int: Session to scope to, None for all sessions
+
+    Raises:
+        ValueError: If the parameter is neither an id nor 'all'
+    """
+    value = args.get('session_id')
+    if not value:
+        return active_session_id()
+    if value == ALL_SESSIONS:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError('session_id must be a session id or all')
+
+
+def scoped(query, column, session_id):
+    """
+    Restrict a query to one session
+
+    Args:
+        query: SQLAlchemy query or select
+        column: The session_id column to filter on
+        session_id (int): Session, or None to leave the query unscoped
+
+    Returns:
+        The filtered query
+    """
+    if session_id is None:
+        return query
+    return query.filter(column == session_id)
+
+
+def assign_school(student_id, school_id, session_id):
+    """
+    Add a student_school row; the caller commits
+
+    Args:
+        student_id (int): The student's user id
+        school_id (int): The school's id
+        session_id (int): Session the placement is for
+    """
+    db.session.execute(insert(student_school).values(
+        student_id=student_id, school_id=school_id, session_id=session_id))
+    invalidate(db.session, user_group(student_id))
+
+
+def assign_schools(placements, session_id):
+    """
+    Add many student_school rows in one executemany; the caller commits
+
+    Args:
+        placements (list): (student_id, school_id) pairs
+        session_id (int): Session the placements are for
+    """
+    if not placements:
+        return
+    db.session.execute(insert(student_school), [
+        {'student_id': student_id, 'school_id': school_id, 'session_id': session_id}
+        for student_id, school_id in placements
+    ])
+    invalidate(db.session, endpoint_group(STUDENT_DASHBOARD))
+
+
+def assign_supervisor(lecturer_id, student_id, session_id):
+    """
+    Add a lecturer_student row and invalidate supervision caches; the caller commits
+
+    Args:
+        lecturer_id (int): The lecturer's user id
+        student_id (int): The student's user id
+        session_id (int): Session the supervision is for
+    """
+    db.session.execute(insert(lecturer_student).values(
+        lecturer_id=lecturer_id, student_id=student_id, session_id=session_id))
+    bump_supervision_version(db.session)
+    invalidate(db.session, user_group(lecturer_id), user_group(student_id))
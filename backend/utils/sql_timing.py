@@ -0,0 +1,42 @@
+"""
+One cursor-timing hook for every SQL instrumentation.
+
+Metrics and the query inspector both need the duration of each statement
+run during a request. Rather than each registering its own global Engine
+listeners, they add a consumer here: the statement is timed once and every
+consumer is called with ``(statement, parameters, elapsed)``. Statements
+outside a request are not reported.
+"""
+import time
+
+from flask import has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_consumers = []
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_start'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context():
+        return
+    elapsed = time.perf_counter() - conn.info['query_start']
+    for consumer in _consumers:
+        consumer(statement, parameters, elapsed)
+
+
+def add_statement_consumer(consumer):
+    """
+    Call a function with every statement executed during a request
+
+    Args:
+        consumer: Function taking (statement, parameters, elapsed seconds)
+    """
+    if consumer not in _consumers:
+        _consumers.append(consumer)
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
@@ -0,0 +1,106 @@
+"""
+Supervision index.
+
+Answers "does lecturer L supervise student S" from a per-process map of
+(lecturer id, session id) to a frozenset of student ids, built from
+``lecturer_student`` on first use. A session id of None covers every
+session. The map is dropped whenever the 'supervision' version stamp moves;
+every write to the association table bumps it in the same transaction (see
+``backend.utils.sessions.assign_supervisor``), so every worker sees the
+change on its next request.
+"""
+import threading
+
+from sqlalchemy import select
+
+from backend.models import lecturer_student, db
+from backend.utils.versioning import bump_version, current_version
+
+VERSION_NAME = 'supervision'
+
+
+class SupervisionIndex:
+    """Per-process cache of (lecturer, session) -> supervised student ids."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._version = None
+        self._students = {}
+        self._lock = threading.Lock()
+
+    def students_of(self, lecturer_id, session_id=None):
+        """
+        Get the ids of the students a lecturer supervises
+
+        Args:
+            lecturer_id (int): The lecturer's user id
+            session_id (int): Session to look in, None for all sessions
+
+        Returns:
+            frozenset: Student ids
+        """
+        key = (lecturer_id, session_id)
+        version = current_version(VERSION_NAME, db.session)
+        with self._lock:
+            if version != self._version:
+                self._students = {}
+                self._version = version
+            students = self._students.get(key)
+
+        if students is None:
+            query = select(lecturer_student.c.student_id)\
+                .where(lecturer_student.c.lecturer_id == lecturer_id)
+            if session_id is not None:
+                query = query.where(lecturer_student.c.session_id == session_id)
+            students = frozenset(row[0] for row in db.session.execute(query))
+            with self._lock:
+                if self._version == version:
+                    if len(self._students) >= self.max_entries:
+                        self._students.clear()
+                    self._students[key] = students
+
+        return students
+
+    def supervises(self, lecturer_id, student_id, session_id=None):
+        try:
+            student_id = int(student_id)
+        except (TypeError, ValueError):
+            return False
+        return student_id in self.students_of(lecturer_id, session_id)
+
+
+supervision_index = SupervisionIndex()
+
+
+def supervises(lecturer_id, student_id, session_id=None):
+    """
+    Check whether a lecturer supervises a student
+
+    Args:
+        lecturer_id (int): The lecturer's user id
+        student_id (int): The student's user id
+        session_id (int): Session to look in, None for any session
+
+    Returns:
+        bool: True if the pair is in lecturer_student
+    """
+    return supervision_index.supervises(lecturer_id, student_id, session_id)
+
+
+def supervised_student_ids(lecturer_id, session_id=None):
+    """
+    Get the ids of every student a lecturer supervises
+
+    Args:
+        lecturer_id (int): The lecturer's user id
+        session_id (int): Session to look in, None for all sessions
+
+    Returns:
+        frozenset: Student ids
+    """
+    return supervision_index.students_of(lecturer_id, session_id)
+
+
+def bump_supervision_version(session):
+    """Invalidate every worker's index; call after writes to lecturer_student."""
+    bump_version(VERSION_NAME, session)
@@ -0,0 +1,128 @@
+"""
+Evaluation score trends.
+
+``evaluation_trend`` averages a student's scores per bucket in one grouped
+statement: per visit, per week (starting on Monday) or per teaching
+practice session. Each bucket then gets a trailing moving average over the
+last ``window`` buckets and its change from the bucket before, for every
+criterion and for the mean of the four. Archived evaluations are not
+included, as in the other student and lecturer endpoints.
+"""
+from sqlalchemy import func
+
+from backend.models import Evaluation, db
+from backend.utils.sessions import scoped
+
+CRITERIA = ('teaching_skills', 'classroom_management', 'lesson_preparation', 'professionalism')
+BUCKETS = ('visit', 'week', 'session')
+
+DEFAULT_WINDOW = 3
+MAX_WINDOW = 10
+
+
+def _week_start(column):
+    # Monday of the column's week, as the database spells it
+    if db.engine.dialect.name == 'postgresql':
+        return func.date_trunc('week', column)
+    return func.date(column, 'weekday 0', '-6 days')
+
+
+def _bucket_key(bucket):
+    if bucket == 'week':
+        return _week_start(Evaluation.visit_date)
+    if bucket == 'session':
+        return Evaluation.session_id
+    return Evaluation.id
+
+
+def _label(key):
+    # Week starts come back as dates, datetimes or strings by dialect
+    if hasattr(key, 'date'):
+        key = key.date()
+    return key.isoformat() if hasattr(key, 'isoformat') else key
+
+
+def _mean(values):
+    values = [value for value in values if value is not None]
+    return sum(values) / len(values) if values else None
+
+
+def _round(value):
+    return round(value, 2) if value is not None else None
+
+
+def trend_parameters(args):
+    """
+    Read the ``bucket`` and ``window`` query parameters
+
+    Args:
+        args: Request query arguments
+
+    Returns:
+        tuple: (bucket, window)
+
+    Raises:
+        ValueError: If either parameter is out of range
+    """
+    bucket = args.get('bucket', 'visit')
+    if bucket not in BUCKETS:
+        raise ValueError(f'bucket must be one of: {", ".join(BUCKETS)}')
+    try:
+        window = int(args.get('window', DEFAULT_WINDOW))
+    except ValueError:
+        window = 0
+    if window < 1 or window > MAX_WINDOW:
+        raise ValueError(f'window must be between 1 and {MAX_WINDOW}')
+    return bucket, window
+
+
+def evaluation_trend(student_id, bucket='visit', session_id=None, window=DEFAULT_WINDOW):
+    """
+    Average a student's evaluation scores over time
+
+    Args:
+        student_id (int): The student's user id
+        bucket (str): 'visit', 'week' or 'session'
+        session_id (int): Session to look in, None for every session
+        window (int): Buckets in each moving average
+
+    Returns:
+        list: One dict per bucket, oldest first, with the bucket's label,
+        first and last visit, number of evaluations, and per criterion plus
+        'overall' its mean score, moving average and delta
+    """
+    key = _bucket_key(bucket).label('bucket')
+    query = db.session.query(
+        key,
+        func.count(Evaluation.id).label('evaluations'),
+        func.min(Evaluation.visit_date).label('first_visit'),
+        func.max(Evaluation.visit_date).label('last_visit'),
+        *[func.avg(getattr(Evaluation, criterion)).label(criterion) for criterion in CRITERIA]
+    ).filter(Evaluation.student_id == student_id)
+    rows = scoped(query, Evaluation.session_id, session_id)\
+        .group_by(key).order_by(func.min(Evaluation.visit_date), key).all()
+
+    series = {name: [] for name in CRITERIA + ('overall',)}
+    points = []
+    for row in rows:
+        scores = {criterion: getattr(row, criterion) for criterion in CRITERIA}
+        scores = {name: float(value) if value is not None else None for name, value in scores.items()}
+        scores['overall'] = _mean(scores.values())
+
+        point = {
+            'bucket': _label(row.bucket),
+            'first_visit': row.first_visit.isoformat(),
+            'last_visit': row.last_visit.isoformat(),
+            'evaluations': row.evaluations,
+        }
+        for name, value in scores.items():
+            history = series[name]
+            previous = history[-1] if history else None
+            history.append(value)
+            point[name] = {
+                'mean': _round(value),
+                'moving_average': _round(_mean(history[-window:])),
+                'delta': _round(value - previous) if None not in (value, previous) else None,
+            }
+        points.append(point)
+    return points
@@ -0,0 +1,167 @@
+"""
+Reconcile ``UPLOAD_FOLDER`` with the attachments reports point at.
+
+Files are found by walking the upload tree with ``os.scandir``; referenced
+paths are read from ``report.file_path`` and ``report_archive.file_path``
+in keyset batches. Both come out sorted in the same (code point) order, so
+one pass merge-joins them: memory holds one directory listing and one batch
+of paths, never the whole tree or table.
+
+Previews (``<file>.thumbnail.webp`` and the like) belong to their original
+and go with it. Files modified within the grace period are left alone,
+since an upload is saved before the report that points at it is committed.
+"""
+import heapq
+import os
+import shutil
+import time
+
+from sqlalchemy import select
+
+from backend.models import Report, report_archive, db
+from backend.utils.previews import VARIANTS, FORMATS
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_GRACE_SECONDS = 24 * 3600
+
+PREVIEW_SUFFIXES = tuple(f'.{variant}.{extension}' for variant in VARIANTS for extension in FORMATS)
+
+# Collations that order text by code point, as Python does
+BINARY_COLLATIONS = {'postgresql': 'C', 'mysql': 'utf8mb4_bin'}
+
+
+def walk_sorted(root, skip=()):
+    """
+    Yield every file below a directory in path order
+
+    Directory entries are sorted with a separator after directory names, so
+    the full paths come out in plain string order.
+
+    Args:
+        root (str): Directory to walk
+        skip (tuple): Directories not to enter
+
+    Yields:
+        os.DirEntry: Regular files, symlinks not followed
+    """
+    try:
+        with os.scandir(root) as iterator:
+            entries = sorted(iterator, key=lambda entry: entry.name + os.sep
+                             if entry.is_dir(follow_symlinks=False) else entry.name)
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            if entry.path not in skip:
+                yield from walk_sorted(entry.path, skip)
+        elif entry.is_file(follow_symlinks=False):
+            yield entry
+
+
+def referenced_paths(column, prefix, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Stream the distinct paths in a column that start with prefix, in path order
+
+    Args:
+        column: A file_path column
+        prefix (str): Directory the paths must be under, ending in a separator
+        batch_size (int): Paths fetched per query
+
+    Yields:
+        str: Paths, sorted by code point
+    """
+    collation = BINARY_COLLATIONS.get(db.engine.dialect.name)
+    ordered = column.collate(collation) if collation else column
+    last = prefix
+    while True:
+        paths = db.session.execute(
+            select(ordered).distinct().where(ordered > last).order_by(ordered).limit(batch_size)
+        ).scalars().all()
+        for path in paths:
+            if not path.startswith(prefix):
+                return
+            yield path
+        if len(paths) < batch_size:
+            return
+        last = paths[-1]
+
+
+def find_orphans(root, grace_seconds=DEFAULT_GRACE_SECONDS, batch_size=DEFAULT_BATCH_SIZE, skip=()):
+    """
+    Yield files below root that no report points at
+
+    Args:
+        root (str): The upload folder
+        grace_seconds (int): Files modified more recently are not reported
+        batch_size (int): Paths fetched per query
+        skip (tuple): Directories not to walk, e.g. a quarantine inside root
+
+    Yields:
+        os.DirEntry: Orphaned files, previews of orphans included
+    """
+    root = os.path.abspath(root)
+    prefix = root.rstrip(os.sep) + os.sep
+    cutoff = time.time() - grace_seconds
+
+    references = heapq.merge(referenced_paths(Report.__table__.c.file_path, prefix, batch_size),
+                             referenced_paths(report_archive.c.file_path, prefix, batch_size))
+    reference = next(references, None)
+    orphan = None
+
+    for entry in walk_sorted(root, skip):
+        path = entry.path
+        is_preview = path.endswith(PREVIEW_SUFFIXES)
+        if is_preview:
+            # Previews sort right after their original and share its fate
+            original = path[:path.rindex('.', 0, path.rindex('.'))]
+            if original != orphan and os.path.exists(original):
+                continue
+        else:
+            while reference is not None and reference < path:
+                reference = next(references, None)
+            if reference == path:
+                continue
+        if entry.stat(follow_symlinks=False).st_mtime > cutoff:
+            continue
+        if not is_preview:
+            orphan = path
+        yield entry
+
+
+def collect(root, quarantine=None, delete=False, grace_seconds=DEFAULT_GRACE_SECONDS,
+            batch_size=DEFAULT_BATCH_SIZE, report=None):
+    """
+    Find orphaned uploads and delete or quarantine them
+
+    Args:
+        root (str): The upload folder
+        quarantine (str): Move orphans here, keeping their relative paths
+        delete (bool): Delete orphans; with neither option only count them
+        grace_seconds (int): Files modified more recently are kept
+        batch_size (int): Paths fetched per query
+        report: Called with (path, size) for every orphan handled
+
+    Returns:
+        dict: Orphans found and bytes they took (and reclaimed, unless a dry run)
+    """
+    root = os.path.abspath(root)
+    skip = (os.path.abspath(quarantine),) if quarantine else ()
+    summary = {'orphans': 0, 'bytes': 0, 'errors': 0}
+
+    for entry in find_orphans(root, grace_seconds, batch_size, skip):
+        try:
+            size = entry.stat(follow_symlinks=False).st_size
+            if quarantine:
+                target = os.path.join(os.path.abspath(quarantine), os.path.relpath(entry.path, root))
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(entry.path, target)
+            elif delete:
+                os.remove(entry.path)
+        except OSError:
+            summary['errors'] += 1
+            continue
+        summary['orphans'] += 1
+        summary['bytes'] += size
+        if report is not None:
+            report(entry.path, size)
+    return summary
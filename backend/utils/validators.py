@@ -0,0 +1,343 @@
+"""
+Declarative payload validation.
+
+A ``Schema`` is an ordered list of rules compiled once at import: patterns
+are compiled, choice lists frozen and messages formatted up front. Rules run
+in the order they are declared and the first failure wins, except that
+uniqueness rules, which need the database, run after every other rule and
+only for payloads that passed them.
+
+``Schema.validate`` takes one payload and ``Schema.validate_many`` a list.
+Uniqueness rules are not checked row by row: the values of every payload
+are gathered first and looked up with one ``IN`` query per field, and
+repeats inside the batch are reported as taken too.
+
+    USER_SCHEMA = Schema(
+        Required('username', 'email'),
+        Pattern('email', EMAIL_PATTERN, 'Invalid email format'),
+        Unique('email', User.email, 'Email already exists'),
+    )
+    result = USER_SCHEMA.validate(data)   # {'error': bool, 'message': str}
+"""
+import re
+from datetime import datetime
+
+from backend.app import db
+
+EMAIL_PATTERN = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+PHONE_PATTERN = r'^\+?[0-9]{10,15}$'
+DATE_FORMAT = '%Y-%m-%d'
+
+# Largest number of values bound into one uniqueness query
+UNIQUE_CHUNK_SIZE = 500
+
+
+def to_datetime(value, date_format=DATE_FORMAT):
+    """
+    Parse a date string, passing other values through
+
+    Args:
+        value: A date string or a datetime
+        date_format (str): strptime format for strings
+
+    Returns:
+        datetime: The parsed value
+
+    Raises:
+        ValueError: If a string does not match the format
+    """
+    if isinstance(value, str):
+        return datetime.strptime(value, date_format)
+    return value
+
+
+class Rule:
+    """Base class for schema rules; check() returns an error message or None."""
+
+    unique = False
+
+    def check(self, data, taken):
+        raise NotImplementedError
+
+
+class Required(Rule):
+    """Fields must be present and, unless allow_empty, truthy."""
+
+    def __init__(self, *fields, allow_empty=False, message='{field} is required'):
+        self.fields = tuple((field, message.format(field=field)) for field in fields)
+        self.allow_empty = allow_empty
+
+    def check(self, data, taken):
+        for field, message in self.fields:
+            if field not in data or (not self.allow_empty and not data[field]):
+                return message
+        return None
+
+
+class NotEmpty(Rule):
+    """A field may be left out, but not sent empty."""
+
+    def __init__(self, field, message):
+        self.field = field
+        self.message = message
+
+    def check(self, data, taken):
+        if self.field in data and not data[self.field]:
+            return self.message
+        return None
+
+
+class Pattern(Rule):
+    """A non-empty value must match a regular expression."""
+
+    def __init__(self, field, pattern, message):
+        self.field = field
+        self.match = re.compile(pattern).match
+        self.message = message
+
+    def check(self, data, taken):
+        value = data.get(self.field)
+        if value and (not isinstance(value, str) or not self.match(value)):
+            return self.message
+        return None
+
+
+class Length(Rule):
+    """A present value must have between min_length and max_length items."""
+
+    def __init__(self, field, message, min_length=0, max_length=None):
+        self.field = field
+        self.message = message
+        self.min_length = min_length
+        self.max_length = max_length
+
+    def check(self, data, taken):
+        if self.field not in data:
+            return None
+        try:
+            length = len(data[self.field])
+        except TypeError:
+            return self.message
+        if length < self.min_length or (self.max_length is not None and length > self.max_length):
+            return self.message
+        return None
+
+
+class OneOf(Rule):
+    """A present value must be one of a fixed set of strings."""
+
+    def __init__(self, field, choices, message='{field} must be one of: {choices}'):
+        self.field = field
+        self.choices = frozenset(choices)
+        self.message = message.format(field=field, choices=', '.join(choices))
+
+    def check(self, data, taken):
+        if self.field in data:
+            value = data[self.field]
+            if not isinstance(value, str) or value not in self.choices:
+                return self.message
+        return None
+
+
+class IntegerRange(Rule):
+    """
+    A present value must be an integer (or integer string) within bounds.
+
+    With strict, only JSON integers pass: no strings, floats or booleans.
+    With nullable, None is accepted too.
+    """
+
+    def __init__(self, field, minimum, maximum,
+                 message='{field} must be between {minimum} and {maximum}',
+                 type_message='{field} must be a number', strict=False, nullable=False):
+        self.field = field
+        self.minimum = minimum
+        self.maximum = maximum
+        self.message = message.format(field=field, minimum=minimum, maximum=maximum)
+        self.type_message = type_message.format(field=field)
+        self.strict = strict
+        self.nullable = nullable
+
+    def check(self, data, taken):
+        if self.field not in data:
+            return None
+        value = data[self.field]
+        if value is None and self.nullable:
+            return None
+        if self.strict and (isinstance(value, bool) or not isinstance(value, int)):
+            return self.type_message
+        try:
+            value = int(value)
+        except (ValueError, TypeError):
+            return self.type_message
+        if value < self.minimum or value > self.maximum:
+            return self.message
+        return None
+
+
+class NumberRange(Rule):
+    """A present, non-null value must be a number within bounds."""
+
+    def __init__(self, field, minimum, maximum,
+                 message='{field} must be between {minimum} and {maximum}',
+                 type_message='{field} must be a number'):
+        self.field = field
+        self.minimum = minimum
+        self.maximum = maximum
+        self.message = message.format(field=field, minimum=minimum, maximum=maximum)
+        self.type_message = type_message.format(field=field)
+
+    def check(self, data, taken):
+        value = data.get(self.field)
+        if value is None:
+            return None
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return self.type_message
+        if value < self.minimum or value > self.maximum:
+            return self.message
+        return None
+
+
+class Date(Rule):
+    """A present value must be a datetime or a string in the given strptime format."""
+
+    def __init__(self, field, message, date_format=DATE_FORMAT):
+        self.field = field
+        self.message = message
+        self.date_format = date_format
+
+    def check(self, data, taken):
+        if self.field not in data:
+            return None
+        value = data[self.field]
+        if isinstance(value, datetime):
+            return None
+        if not isinstance(value, str):
+            return self.message
+        try:
+            datetime.strptime(value, self.date_format)
+        except ValueError:
+            return self.message
+        return None
+
+
+class Check(Rule):
+    """Any other condition on the whole payload; predicate returns True when valid."""
+
+    def __init__(self, predicate, message):
+        self.predicate = predicate
+        self.message = message
+
+    def check(self, data, taken):
+        if not self.predicate(data):
+            return self.message
+        return None
+
+
+class Unique(Rule):
+    """A non-empty value must not exist yet in a column, nor repeat in the batch."""
+
+    unique = True
+
+    def __init__(self, field, column, message):
+        self.field = field
+        self.column = column
+        self.message = message
+
+    def values(self, items):
+        """Collect the hashable, non-empty values of this field from payloads."""
+        values = set()
+        for data in items:
+            value = data.get(self.field)
+            if value and isinstance(value, (str, int)):
+                values.add(value)
+        return values
+
+    def existing(self, values):
+        """Return the subset of values already stored, one query per chunk."""
+        values = sorted(values, key=str)
+        found = set()
+        for start in range(0, len(values), UNIQUE_CHUNK_SIZE):
+            chunk = values[start:start + UNIQUE_CHUNK_SIZE]
+            rows = db.session.query(self.column).filter(self.column.in_(chunk))
+            found.update(row[0] for row in rows)
+        return found
+
+    def check(self, data, taken):
+        value = data.get(self.field)
+        if not value or not isinstance(value, (str, int)):
+            return None
+        seen = taken[self]
+        if value in seen:
+            return self.message
+        # Later payloads of the same batch may not reuse the value
+        seen.add(value)
+        return None
+
+
+class Schema:
+    """An ordered, precompiled set of validation rules."""
+
+    def __init__(self, *rules):
+        self.rules = tuple(rules)
+        # Rules that query the database run last
+        self.checks = tuple(rule.check for rule in self.rules if not rule.unique)
+        self.unique_rules = tuple(rule for rule in self.rules if rule.unique)
+        self.unique_checks = tuple(rule.check for rule in self.unique_rules)
+
+    def _taken(self, items):
+        # One lookup per unique field for the whole batch
+        taken = {}
+        for rule in self.unique_rules:
+            values = rule.values(items)
+            taken[rule] = rule.existing(values) if values else set()
+        return taken
+
+    @staticmethod
+    def _first_error(checks, data, taken):
+        for check in checks:
+            message = check(data, taken)
+            if message is not None:
+                return {'error': True, 'message': message}
+        return None
+
+    def validate(self, data):
+        """
+        Validate one payload
+
+        Args:
+            data (dict): Request payload
+
+        Returns:
+            dict: Validation result with error flag and message
+        """
+        if not data or not isinstance(data, dict):
+            return {'error': True, 'message': 'No data provided'}
+        result = self._first_error(self.checks, data, None)
+        if result is None and self.unique_rules:
+            result = self._first_error(self.unique_checks, data, self._taken((data,)))
+        return result or {'error': False, 'message': 'Data is valid'}
+
+    def validate_many(self, items):
+        """
+        Validate a list of payloads with batched uniqueness checks
+
+        Args:
+            items (list): Request payloads
+
+        Returns:
+            list: One validation result per payload, in order
+        """
+        results = []
+        for data in items:
+            if not data or not isinstance(data, dict):
+                results.append({'error': True, 'message': 'No data provided'})
+            else:
+                results.append(self._first_error(self.checks, data, None))
+
+        passed = [index for index, result in enumerate(results) if result is None]
+        if self.unique_rules and passed:
+            taken = self._taken([items[index] for index in passed])
+            for index in passed:
+                results[index] = self._first_error(self.unique_checks, items[index], taken)
+        return [result or {'error': False, 'message': 'Data is valid'} for result in results]
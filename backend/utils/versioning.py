@@ -0,0 +1,61 @@
+"""
+Shared version stamps for in-process caches.
+
+Each worker keeps its own caches, so they cannot be invalidated in memory
+from another process. Instead, writers bump a row in ``cache_version`` in
+the same transaction as the data change, and readers compare the stamp
+with the one their cache was built at. Stamps are read at most once per
+request.
+"""
+from datetime import datetime
+
+from flask import g, has_request_context
+from sqlalchemy import insert, select, update
+
+
+def _stamps():
+    # Imported here so that the app can wire up stamped caches at boot
+    # without loading the models
+    from backend.models import CacheVersion
+
+    return CacheVersion.__table__
+
+
+def current_version(name, session):
+    """
+    Read a version stamp, once per request
+
+    Args:
+        name (str): Stamp name, e.g. 'supervision'
+        session: Session or connection to read with
+
+    Returns:
+        int: The current version, 0 if never bumped
+    """
+    cache = g.setdefault('_cache_versions', {}) if has_request_context() else {}
+    if name not in cache:
+        table = _stamps()
+        version = session.execute(select(table.c.version).where(table.c.name == name)).scalar()
+        cache[name] = version or 0
+    return cache[name]
+
+
+def bump_version(name, session):
+    """
+    Increment a version stamp inside the caller's transaction
+
+    Args:
+        name (str): Stamp name
+        session: Session or connection to write with
+    """
+    table = _stamps()
+    now = datetime.utcnow()
+    result = session.execute(
+        update(table).where(table.c.name == name)
+        .values(version=table.c.version + 1, updated_at=now)
+    )
+    if not result.rowcount:
+        session.execute(insert(table).values(name=name, version=1, updated_at=now))
+
+    if has_request_context():
+        g.setdefault('_cache_versions', {}).pop(name, None)
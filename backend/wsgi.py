@@ -0,0 +1,16 @@
+"""
+WSGI entry point for production servers.
+
+    FLASK_ENV=production PRELOAD_APP=1 gunicorn --preload backend.wsgi:app
+
+With PRELOAD_APP set, the deferred start-up work is done once at import
+time, which under ``--preload`` happens in the master before workers fork.
+"""
+import os
+
+from backend.app import create_app, preload_app
+
+app = create_app()
+
+if os.environ.get('PRELOAD_APP'):
+    preload_app(app)
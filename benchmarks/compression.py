@@ -0,0 +1,119 @@
+"""
+Response compression cost.
+
+Builds JSON bodies shaped like the report list, student detail and
+evaluation list responses, compresses them with every installed codec at
+a few levels, and reports the CPU time per response against the bytes it
+saves. Streamed compression, flushed every ``--chunk`` bytes, is timed too,
+and for zstd a reused context is compared with a fresh one per response.
+
+    python -m benchmarks.compression --rows 50 500
+"""
+import argparse
+import json
+import random
+import time
+
+from backend.utils import compression
+
+LEVELS = {'gzip': (1, 6, 9), 'br': (1, 4, 6), 'zstd': (1, 3, 9)}
+
+PHRASES = ['Taught fractions to form two.', 'Pupils worked in groups on the exercise.',
+           'Used the chalkboard to explain long division.', 'Marked the homework and gave feedback.',
+           'The class was noisy after the break.', 'Revised the previous lesson before starting.']
+
+
+def report_list(rows, rng):
+    """A /api/student/reports style body."""
+    return {'reports': [{
+        'id': index, 'student_id': 1 + index % 40, 'session_id': 3,
+        'title': f'Weekly report {index}', 'report_type': rng.choice(['daily', 'weekly', 'lesson_plan']),
+        'content': ' '.join(rng.choice(PHRASES) for _ in range(rng.randint(5, 40))),
+        'submission_date': f'2026-10-{1 + index % 28:02d}T09:{index % 60:02d}:00',
+        'status': rng.choice(['submitted', 'reviewed']), 'file_path': None,
+    } for index in range(rows)]}
+
+
+def evaluation_list(rows, rng):
+    """A /api/student/evaluations style body."""
+    return {'evaluations': [{
+        'id': index, 'student_id': 1 + index % 40, 'lecturer_id': 2, 'session_id': 3,
+        'visit_date': f'2026-10-{1 + index % 28:02d}T10:00:00',
+        'teaching_skills': rng.randint(4, 10), 'classroom_management': rng.randint(4, 10),
+        'lesson_preparation': rng.randint(4, 10), 'professionalism': rng.randint(4, 10),
+        'overall_grade': rng.choice(['A', 'B+', 'B', 'C']),
+        'comments': ' '.join(rng.choice(PHRASES) for _ in range(rng.randint(1, 6))),
+        'lecturer_name': 'Ada Lecturer',
+    } for index in range(rows)]}
+
+
+def student_detail(rows, rng):
+    """A /api/lecturer/students/<id> style body."""
+    body = {'student': {'id': 1, 'username': 'student', 'email': 'student@example.com',
+                        'first_name': 'Sam', 'last_name': 'Student', 'role': 'student'},
+            'schools': [{'id': 4, 'name': 'Unity College', 'city': 'Lagos', 'state': 'Lagos'}],
+            'summary': {'reports': rows, 'evaluations': rows // 4}}
+    body.update(report_list(rows // 2, rng))
+    body.update(evaluation_list(rows // 4, rng))
+    return body
+
+
+def seconds_per_call(function, duration):
+    """Call function() repeatedly and return the mean cost."""
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < duration or not count:
+        function()
+        count += 1
+    return (time.perf_counter() - started) / count
+
+
+def stream(data, codec, level, chunk):
+    chunks = (data[start:start + chunk] for start in range(0, len(data), chunk))
+    return b''.join(compression.compress_stream(chunks, codec, level))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure response compression cost')
+    parser.add_argument('--rows', type=int, nargs='+', default=[50, 500], help='rows per response')
+    parser.add_argument('--chunk', type=int, default=4096, help='bytes per streamed chunk')
+    parser.add_argument('--duration', type=float, default=0.5, help='seconds per measurement')
+    args = parser.parse_args(argv)
+
+    rng = random.Random(7)
+    codecs = list(compression.CODECS)
+    print('codecs installed: %s' % ', '.join(codecs))
+
+    for rows in args.rows:
+        for name, build in [('reports', report_list), ('evaluations', evaluation_list),
+                            ('student detail', student_detail)]:
+            data = json.dumps(build(rows, rng)).encode('utf-8')
+            print('\n%s, %d rows: %d bytes' % (name, rows, len(data)))
+            print('%-16s %10s %8s %10s %12s %12s' % ('codec', 'us/resp', 'MB/s', 'ratio', 'saved KB', 'KB saved/ms'))
+            for codec in codecs:
+                for level in LEVELS[codec]:
+                    packed = compression.compress(data, codec, level)
+                    seconds = seconds_per_call(lambda: compression.compress(data, codec, level), args.duration)
+                    saved = len(data) - len(packed)
+                    print('%-16s %10.1f %8.1f %10.2f %12.1f %12.1f' % (
+                        f'{codec} {level}', seconds * 1e6, len(data) / seconds / 1e6,
+                        len(data) / len(packed), saved / 1024, saved / 1024 / (seconds * 1e3)))
+
+                level = LEVELS[codec][1]
+                packed = stream(data, codec, level, args.chunk)
+                seconds = seconds_per_call(lambda: stream(data, codec, level, args.chunk), args.duration)
+                saved = len(data) - len(packed)
+                print('%-16s %10.1f %8.1f %10.2f %12.1f %12.1f' % (
+                    f'{codec} {level} stream', seconds * 1e6, len(data) / seconds / 1e6,
+                    len(data) / len(packed), saved / 1024, saved / 1024 / (seconds * 1e3)))
+
+            if compression.zstandard is not None:
+                level = LEVELS['zstd'][1]
+                reused = seconds_per_call(lambda: compression.compress(data, 'zstd', level), args.duration)
+                fresh = seconds_per_call(
+                    lambda: compression.zstandard.ZstdCompressor(level=level).compress(data), args.duration)
+                print('zstd context reused %.1f us, fresh %.1f us' % (reused * 1e6, fresh * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,496 @@
+"""
+Endpoint benchmark runner.
+
+Calls every API endpoint registered on the app and records latency
+percentiles and the number of SQL statements per request. Results can be
+saved as a baseline and later runs compared against it.
+
+In-process, through the Flask test client:
+
+    python -m benchmarks.endpoints --database sqlite:///bench.db --rows 10000
+
+Against a running server over HTTP:
+
+    python -m benchmarks.endpoints --url http://localhost:8000 --database sqlite:///bench.db
+
+The database is only read to pick users and ids for the URL parameters in
+HTTP mode; requests go through the server and log in with the seeded
+password.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from flask import url_for
+from sqlalchemy import event, func
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Which seeded identity calls each blueprint
+ROLE_BY_BLUEPRINT = {
+    'auth': 'student',
+    'admin': 'admin',
+    'lecturer': 'lecturer',
+    'student': 'student',
+    'files': 'student',
+    'batch': 'student',
+}
+
+# Endpoints called by a different role than the rest of their blueprint
+ROLE_BY_ENDPOINT = {
+    'auth.register': 'admin',
+}
+
+# Endpoints that take a refresh token instead of an access token. Every call
+# logs in first, outside the timing, since a refresh token is spent by one
+# call. Against a server, turn LOGIN_RATE_LIMIT_ENABLED off or logins are refused
+REFRESH_TOKEN_ENDPOINTS = {'auth.refresh', 'auth.logout'}
+
+# Endpoints that cannot be repeated safely against a shared data set
+SKIPPED_ENDPOINTS = {
+    'admin.deactivate_user',
+    'admin.delete_school',
+}
+
+# Students evaluated per call of the batch evaluation endpoint
+EVALUATION_BATCH_SIZE = 10
+
+_counter = itertools.count(1)
+
+
+def _unique():
+    return next(_counter)
+
+
+def _evaluation(student_id):
+    return {
+        'student_id': student_id,
+        'visit_date': date.today().isoformat(),
+        'teaching_skills': 7,
+        'classroom_management': 8,
+        'lesson_preparation': 6,
+        'professionalism': 9,
+        'overall_grade': 'B+',
+        'comments': 'Benchmark evaluation',
+    }
+
+
+# Request bodies for the write endpoints, keyed by endpoint name
+PAYLOADS = {
+    'auth.login': lambda ids: {'username': ids['student_username'], 'password': ids['password']},
+    'auth.register': lambda ids: {
+        'username': f'bench_{os.getpid()}_{_unique()}',
+        'password': 'password',
+        'email': f'bench_{os.getpid()}_{_unique()}@bench.example.com',
+        'first_name': 'Bench',
+        'last_name': 'User',
+        'role': 'student',
+    },
+    'auth.change_password': lambda ids: {'current_password': ids['password'], 'new_password': ids['password']},
+    'admin.update_user': lambda ids: {'first_name': 'Bench'},
+    'admin.create_school': lambda ids: {
+        'name': f'Bench School {os.getpid()}-{_unique()}',
+        'address': '1 Bench Road',
+        'city': 'Nairobi',
+        'state': 'Nairobi',
+    },
+    'admin.update_school': lambda ids: {'contact_person': 'Bench'},
+    'admin.create_session': lambda ids: {
+        'title': 'Bench session',
+        'start_date': '2030-01-01',
+        'end_date': '2030-03-31',
+    },
+    'admin.assign_school_to_student': lambda ids: {'student_id': ids['student_id'], 'school_id': ids['school_id']},
+    # Plans every student without a school in the active session; after the
+    # first apply they are all placed and later calls time the planning alone
+    'admin.preview_placements': lambda ids: {},
+    'admin.apply_placements': lambda ids: {},
+    'admin.assign_lecturer_to_student': lambda ids: {'student_id': ids['student_id'], 'lecturer_id': ids['lecturer_id']},
+    'lecturer.submit_evaluation': lambda ids: _evaluation(ids['supervised_student_id']),
+    'lecturer.submit_evaluations_batch': lambda ids: {
+        'evaluations': [_evaluation(student_id) for student_id in ids['supervised_student_ids']],
+        'mode': 'atomic',
+    },
+    'lecturer.update_evaluation': lambda ids: {'comments': 'Benchmark update'},
+    'student.submit_report': lambda ids: {
+        'title': 'Benchmark daily report',
+        'content': 'Benchmark report content. ' * 40,
+        'report_type': 'daily',
+    },
+    'student.update_report': lambda ids: {'title': 'Benchmark daily report'},
+    # The GET calls of the student dashboard page
+    'batch.run_batch': lambda ids: {'requests': [
+        {'path': '/api/auth/me'},
+        {'path': '/api/student/dashboard'},
+        {'path': '/api/student/reports?limit=5'},
+        {'path': '/api/student/schools'},
+    ]},
+}
+
+
+def make_app(database_url):
+    """Create a production-like app bound to the benchmark database; preload it once seeded."""
+    from backend.app import create_app
+
+    return create_app({
+        'SECRET_KEY': 'benchmark',
+        'JWT_SECRET_KEY': 'benchmark',
+        'SQLALCHEMY_DATABASE_URI': database_url,
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'AUTO_CREATE_TABLES': False,
+        'LAZY_BLUEPRINTS': True,
+        'LOGIN_RATE_LIMIT_ENABLED': False,
+    })
+
+
+def pick_identities(app):
+    """
+    Choose the busiest admin, lecturer and student and ids for URL parameters
+
+    Args:
+        app: The Flask app
+
+    Returns:
+        dict: User ids, usernames and object ids used to fill in requests
+    """
+    from benchmarks.seed import SEED_PASSWORD
+    from backend.app import db
+    from backend.models import User, School, Report, Evaluation, lecturer_student
+    from backend.utils.sessions import active_session_id, scoped
+
+    with app.app_context():
+        # Routes default to the active session, so pick users from it
+        session_id = active_session_id()
+        admin = User.query.filter_by(role='admin').order_by(User.id).first()
+        lecturer_id = scoped(db.session.query(lecturer_student.c.lecturer_id),
+                             lecturer_student.c.session_id, session_id)\
+            .group_by(lecturer_student.c.lecturer_id)\
+            .order_by(func.count().desc())\
+            .limit(1).scalar()
+        student_id = scoped(db.session.query(Report.student_id), Report.session_id, session_id)\
+            .group_by(Report.student_id)\
+            .order_by(func.count().desc())\
+            .limit(1).scalar()
+        if admin is None or lecturer_id is None or student_id is None:
+            raise SystemExit('Database is empty, run python -m benchmarks.seed first')
+
+        lecturer = User.query.get(lecturer_id)
+        student = User.query.get(student_id)
+        # A day of visits for the batch evaluation endpoint
+        supervised_student_ids = [row[0] for row in scoped(
+            db.session.query(lecturer_student.c.student_id), lecturer_student.c.session_id, session_id)
+            .filter(lecturer_student.c.lecturer_id == lecturer_id)
+            .order_by(lecturer_student.c.student_id)
+            .limit(EVALUATION_BATCH_SIZE)]
+
+        ids = {
+            'password': SEED_PASSWORD,
+            'admin_id': admin.id,
+            'admin_username': admin.username,
+            'lecturer_id': lecturer.id,
+            'lecturer_username': lecturer.username,
+            'student_id': student.id,
+            'student_username': student.username,
+            'supervised_student_id': supervised_student_ids[0],
+            'supervised_student_ids': supervised_student_ids,
+            'school_id': db.session.query(func.min(School.id)).scalar(),
+            'report_id': db.session.query(func.min(Report.id)).filter(Report.student_id == student.id).scalar(),
+            'evaluation_id': db.session.query(func.min(Evaluation.id))
+                .filter(Evaluation.lecturer_id == lecturer.id).scalar(),
+            # Seeded reports have no attachments, so this times the lookup
+            # and access check of a 404
+            'variant': 'thumbnail',
+        }
+    return ids
+
+
+def url_arguments(rule, ids):
+    """Fill in the URL arguments of a rule from the chosen identities."""
+    values = {}
+    for argument in rule.arguments:
+        if argument == 'student_id':
+            values[argument] = ids['supervised_student_id'] if rule.endpoint.startswith('lecturer.') \
+                else ids['student_id']
+        elif argument == 'user_id':
+            values[argument] = ids['student_id']
+        elif argument in ids:
+            values[argument] = ids[argument]
+        else:
+            return None
+    return values
+
+
+def collect_cases(app, ids):
+    """
+    Build one request per endpoint and method
+
+    Args:
+        app: The Flask app
+        ids (dict): Identities from pick_identities
+
+    Returns:
+        tuple: (list of case dicts, list of skipped endpoint keys with the reason)
+    """
+    cases = []
+    skipped = []
+    with app.test_request_context():
+        for rule in sorted(app.url_map.iter_rules(), key=lambda r: r.rule):
+            blueprint = rule.endpoint.split('.', 1)[0]
+            if not rule.rule.startswith('/api/'):
+                continue
+            for method in sorted(rule.methods - {'HEAD', 'OPTIONS'}):
+                key = f'{method} {rule.rule}'
+                values = url_arguments(rule, ids)
+                payload = PAYLOADS.get(rule.endpoint)
+                if blueprint not in ROLE_BY_BLUEPRINT:
+                    reason = 'no role for the blueprint'
+                elif rule.endpoint in SKIPPED_ENDPOINTS:
+                    reason = 'not repeatable'
+                elif values is None:
+                    reason = 'no value for a URL argument'
+                elif method != 'GET' and payload is None and rule.endpoint not in REFRESH_TOKEN_ENDPOINTS:
+                    reason = 'no payload'
+                else:
+                    reason = None
+                if reason:
+                    skipped.append(f'{key} ({reason})')
+                    continue
+                cases.append({
+                    'key': key,
+                    'endpoint': rule.endpoint,
+                    'method': method,
+                    'path': url_for(rule.endpoint, _method=method, **values),
+                    'role': ROLE_BY_ENDPOINT.get(rule.endpoint, ROLE_BY_BLUEPRINT[blueprint]),
+                    'payload': payload,
+                    'refresh': rule.endpoint in REFRESH_TOKEN_ENDPOINTS,
+                })
+    return cases, skipped
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, queries, statuses):
+    return {
+        'requests': len(latencies),
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'queries': max(queries) if queries else None,
+        'statuses': sorted(set(statuses)),
+    }
+
+
+def run_in_process(app, cases, ids, iterations, warmup):
+    """Run every case through the Flask test client."""
+    from flask_jwt_extended import create_access_token
+    from backend.app import db
+
+    with app.app_context():
+        tokens = {role: create_access_token(identity=ids[f'{role}_id'])
+                  for role in ('admin', 'lecturer', 'student')}
+        engine = db.engine
+
+    statements = [0]
+
+    def count_statement(*args):
+        statements[0] += 1
+
+    event.listen(engine, 'before_cursor_execute', count_statement)
+    client = app.test_client()
+    results = {}
+    try:
+        for case in cases:
+            latencies, queries, statuses = [], [], []
+            for iteration in range(warmup + iterations):
+                token = tokens[case['role']]
+                if case['refresh']:
+                    token = client.post('/api/auth/login', json=_credentials(ids, case['role']))\
+                        .get_json()['refresh_token']
+                kwargs = {'headers': {'Authorization': f'Bearer {token}'}}
+                if case['payload'] is not None:
+                    kwargs['json'] = case['payload'](ids)
+                statements[0] = 0
+                started = time.perf_counter()
+                response = client.open(case['path'], method=case['method'], **kwargs)
+                elapsed = (time.perf_counter() - started) * 1000
+                if iteration >= warmup:
+                    latencies.append(elapsed)
+                    queries.append(statements[0])
+                    statuses.append(response.status_code)
+            results[case['key']] = summarize(latencies, queries, statuses)
+    finally:
+        event.remove(engine, 'before_cursor_execute', count_statement)
+    return results
+
+
+def _http(base_url, method, path, token=None, payload=None, timeout=30):
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(base_url.rstrip('/') + path, data=data, method=method)
+    request.add_header('Content-Type', 'application/json')
+    if token:
+        request.add_header('Authorization', f'Bearer {token}')
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as error:
+        return error.code, error.read()
+
+
+def _credentials(ids, role):
+    return {'username': ids[f'{role}_username'], 'password': ids['password']}
+
+
+def _http_login(base_url, ids, role):
+    status, body = _http(base_url, 'POST', '/api/auth/login', payload=_credentials(ids, role))
+    if status != 200:
+        raise SystemExit(f'Login as {ids[f"{role}_username"]} failed with HTTP {status}')
+    return json.loads(body)
+
+
+def run_http(base_url, cases, ids, iterations, warmup, concurrency):
+    """Run every case against a live server with concurrent clients."""
+    tokens = {role: _http_login(base_url, ids, role)['access_token']
+              for role in ('admin', 'lecturer', 'student')}
+
+    results = {}
+    lock = threading.Lock()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for case in cases:
+            latencies, statuses = [], []
+
+            def call(iteration, case=case, latencies=latencies, statuses=statuses):
+                payload = case['payload'](ids) if case['payload'] is not None else None
+                token = tokens[case['role']]
+                if case['refresh']:
+                    token = _http_login(base_url, ids, case['role'])['refresh_token']
+                started = time.perf_counter()
+                status, _ = _http(base_url, case['method'], case['path'], token, payload)
+                elapsed = (time.perf_counter() - started) * 1000
+                if iteration >= warmup:
+                    with lock:
+                        latencies.append(elapsed)
+                        statuses.append(status)
+
+            list(pool.map(call, range(warmup + iterations * concurrency)))
+            results[case['key']] = summarize(latencies, [], statuses)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results against a stored baseline
+
+    Args:
+        results (dict): Current results keyed by endpoint
+        baseline (dict): Baseline results keyed by endpoint
+        tolerance (float): Allowed relative p95 slowdown, e.g. 0.2 for 20%
+
+    Returns:
+        list: Regression messages, empty when nothing regressed
+    """
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        if previous['p95_ms'] and current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append('%s: p95 %.1fms -> %.1fms' % (key, previous['p95_ms'], current['p95_ms']))
+        if previous.get('queries') is not None and current.get('queries') is not None \
+                and current['queries'] > previous['queries']:
+            regressions.append('%s: queries %d -> %d' % (key, previous['queries'], current['queries']))
+    return regressions
+
+
+def print_table(results, baseline):
+    print('%-58s %6s %9s %9s %9s %7s %9s  %s' % (
+        'endpoint', 'n', 'p50 ms', 'p95 ms', 'p99 ms', 'queries', 'vs base', 'status'))
+    for key, row in results.items():
+        previous = baseline.get(key)
+        change = ''
+        if previous and previous.get('p95_ms'):
+            change = '%+.0f%%' % ((row['p95_ms'] / previous['p95_ms'] - 1) * 100)
+        print('%-58s %6d %9.2f %9.2f %9.2f %7s %9s  %s' % (
+            key[:58], row['requests'], row['p50_ms'], row['p95_ms'], row['p99_ms'],
+            '-' if row['queries'] is None else row['queries'], change,
+            ','.join(str(status) for status in row['statuses'])))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark every API endpoint')
+    parser.add_argument('--database', default='sqlite:///bench.db', help='SQLAlchemy database URL')
+    parser.add_argument('--rows', type=int, help='seed this many rows into an empty database first')
+    parser.add_argument('--url', help='benchmark a running server at this base URL instead of in-process')
+    parser.add_argument('--iterations', type=int, default=30, help='measured requests per endpoint (per client in HTTP mode)')
+    parser.add_argument('--warmup', type=int, default=3, help='unmeasured requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent clients in HTTP mode')
+    parser.add_argument('--only', help='only run endpoints whose key contains this text')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline file to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative p95 slowdown')
+    args = parser.parse_args(argv)
+
+    app = make_app(args.database)
+
+    if args.rows:
+        import backend.models  # noqa: F401
+        from backend.app import db
+        from benchmarks.seed import seed
+        with app.app_context():
+            db.create_all()
+            seed(db.engine, args.rows)
+
+    # After seeding, so that the search index is built from the seeded rows
+    from backend.app import preload_app
+    preload_app(app)
+
+    ids = pick_identities(app)
+    cases, skipped = collect_cases(app, ids)
+    if args.only:
+        cases = [case for case in cases if args.only in case['key']]
+
+    if args.url:
+        results = run_http(args.url, cases, ids, args.iterations, args.warmup, args.concurrency)
+    else:
+        results = run_in_process(app, cases, ids, args.iterations, args.warmup)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print_table(results, baseline)
+    if skipped:
+        print('\nSkipped: ' + ', '.join(skipped))
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f'\nBaseline saved to {args.baseline}')
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print('\nRegressions:')
+        for message in regressions:
+            print('  ' + message)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Password hashing throughput.
+
+Reports how many logins per second each core can verify for a range of
+pbkdf2 iteration counts, first on one thread and then with one thread per
+core through the app's hashing pool, and the cost of a full
+/api/auth/login round trip.
+
+    python -m benchmarks.password_hashing --iterations 260000 600000
+"""
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from backend.utils.passwords import PasswordHasher
+
+PASSWORD = 'correct horse battery staple'
+
+
+def verifications_per_second(verify, password_hash, threads, duration):
+    """Run verify() from several threads for a while and return the rate."""
+    count = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        done = 0
+        while time.perf_counter() < deadline:
+            verify(password_hash, PASSWORD)
+            done += 1
+        with lock:
+            count[0] += done
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for _ in range(threads):
+            pool.submit(worker)
+    return count[0] / (time.perf_counter() - started)
+
+
+def login_round_trips_per_second(method, duration):
+    """Time /api/auth/login through the test client on one thread."""
+    from backend.app import create_app, db
+    from backend.models import User
+
+    app = create_app({
+        'SECRET_KEY': 'benchmark',
+        'JWT_SECRET_KEY': 'benchmark',
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'PASSWORD_HASH_METHOD': method,
+        'METRICS_ENABLED': False,
+        'LOGIN_RATE_LIMIT_ENABLED': False,
+    })
+    with app.app_context():
+        user = User(username='bench', email='bench@example.com', first_name='Bench',
+                    last_name='User', role='student', is_active=True)
+        user.set_password(PASSWORD)
+        db.session.add(user)
+        db.session.commit()
+
+    client = app.test_client()
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < duration:
+        response = client.post('/api/auth/login', json={'username': 'bench', 'password': PASSWORD})
+        assert response.status_code == 200, response.get_json()
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure password verification throughput')
+    parser.add_argument('--iterations', type=int, nargs='+', default=[260000, 600000],
+                        help='pbkdf2 iteration counts to compare')
+    parser.add_argument('--duration', type=float, default=3.0, help='seconds per measurement')
+    args = parser.parse_args(argv)
+
+    cores = os.cpu_count() or 1
+    print('%d cores' % cores)
+    print('%-24s %14s %16s %16s %14s' % (
+        'method', 'ms per verify', 'logins/s 1 core', 'logins/s/core *', 'login req/s'))
+
+    for iterations in args.iterations:
+        method = f'pbkdf2:sha256:{iterations}'
+        password_hash = generate_password_hash(PASSWORD, method)
+
+        single = verifications_per_second(check_password_hash, password_hash, 1, args.duration)
+
+        hasher = PasswordHasher(method, workers=cores, queue_size=cores)
+        pooled = verifications_per_second(hasher.verify, password_hash, cores, args.duration)
+
+        requests = login_round_trips_per_second(method, args.duration)
+
+        print('%-24s %14.1f %16.1f %16.1f %14.1f' % (
+            method, 1000 / single, single, pooled / cores, requests))
+
+    print('\n* through the hashing pool with one thread per core')
+
+
+if __name__ == '__main__':
+    main()
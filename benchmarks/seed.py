@@ -0,0 +1,319 @@
+"""
+Synthetic data seeder for benchmarks.
+
+Generates users, schools, sessions, assignments, reports and evaluations with
+bulk Core inserts. Volumes scale from a single ``--rows`` target (1k to 1M)
+and follow a skewed distribution: a few lecturers supervise most students,
+a few schools take most placements and a few students file most reports.
+
+    python -m benchmarks.seed --database sqlite:///bench.db --rows 100000
+"""
+import argparse
+import bisect
+import itertools
+import random
+import time
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+# Every seeded user shares this password so load tests can log in
+SEED_PASSWORD = 'password'
+
+# Share of the row target given to each table
+RATIOS = {
+    'users': 0.08,
+    'schools': 0.004,
+    'reports': 0.62,
+    'evaluations': 0.15,
+}
+
+CHUNK_SIZE = 5000
+
+WORDS = (
+    'lesson learners class objectives assessment classroom teacher pupils '
+    'observation mathematics science language activity group reflection '
+    'board questions feedback homework discipline preparation materials '
+    'curriculum syllabus participation differentiated instruction plenary '
+    'starter worksheet practical demonstration evaluation progress week'
+).split()
+
+CITIES = [
+    ('Nairobi', 'Nairobi'), ('Mombasa', 'Mombasa'), ('Kisumu', 'Kisumu'),
+    ('Nakuru', 'Nakuru'), ('Eldoret', 'Uasin Gishu'), ('Thika', 'Kiambu'),
+    ('Machakos', 'Machakos'), ('Nyeri', 'Nyeri'), ('Meru', 'Meru'),
+    ('Kakamega', 'Kakamega'), ('Kericho', 'Kericho'), ('Malindi', 'Kilifi'),
+]
+
+GRADES = ['A+', 'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D+', 'D', 'F']
+
+# Approximate body size in characters for each report type
+REPORT_SIZES = {
+    'daily': 1500,
+    'lesson_plan': 3000,
+    'reflection': 4000,
+    'weekly': 12000,
+    'final': 30000,
+}
+REPORT_TYPE_WEIGHTS = [('daily', 60), ('lesson_plan', 20), ('reflection', 8), ('weekly', 10), ('final', 2)]
+
+
+class SkewedChoice:
+    """Weighted sampler with Pareto distributed weights."""
+
+    def __init__(self, rng, items, alpha=1.2):
+        self.rng = rng
+        self.items = list(items)
+        weights = [rng.paretovariate(alpha) for _ in self.items]
+        self.cumulative = list(itertools.accumulate(weights))
+
+    def __call__(self):
+        point = self.rng.random() * self.cumulative[-1]
+        return self.items[bisect.bisect_right(self.cumulative, point)]
+
+
+def volumes(rows):
+    """
+    Split a total row target across tables
+
+    Args:
+        rows (int): Approximate number of rows to generate
+
+    Returns:
+        dict: Number of rows per entity
+    """
+    counts = {name: max(1, int(rows * ratio)) for name, ratio in RATIOS.items()}
+    users = max(counts['users'], 12)
+    counts['admins'] = max(1, users // 500)
+    counts['lecturers'] = max(2, users // 12)
+    counts['students'] = users - counts['admins'] - counts['lecturers']
+    counts['schools'] = max(counts['schools'], 3)
+    return counts
+
+
+def make_text(rng, size):
+    """Build prose-like text of roughly the given size."""
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+        if rng.random() < 0.08:
+            words[-1] += '.'
+    return ' '.join(words)
+
+
+def insert_chunks(connection, table, rows):
+    """Insert an iterable of row dicts in executemany chunks."""
+    total = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            connection.execute(table.insert(), chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        connection.execute(table.insert(), chunk)
+        total += len(chunk)
+    return total
+
+
+def next_id(connection, table):
+    from sqlalchemy import func, select
+    return (connection.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+
+def seed(engine, rows, seed_value=42, years=3, log=print):
+    """
+    Populate the database behind ``engine`` with synthetic data
+
+    Args:
+        engine: SQLAlchemy engine with the schema already created
+        rows (int): Approximate number of rows to generate
+        seed_value (int): Random seed, for reproducible data sets
+        years (int): Number of yearly teaching practice sessions to spread data over
+        log (callable): Progress output
+
+    Returns:
+        dict: Number of rows inserted per table
+    """
+    from backend.models import (User, School, Report, Evaluation, TeachingPracticeSession,
+                                student_school, lecturer_student)
+    from backend.utils.supervision import bump_supervision_version
+
+    rng = random.Random(seed_value)
+    counts = volumes(rows)
+    inserted = {}
+    password_hash = generate_password_hash(SEED_PASSWORD)
+    now = datetime.utcnow()
+
+    with engine.begin() as connection:
+        started = time.perf_counter()
+
+        # Yearly sessions, the last one ongoing
+        first_session = next_id(connection, TeachingPracticeSession.__table__)
+        sessions = []
+        for offset in range(years, 0, -1):
+            start = now - timedelta(days=365 * (offset - 1) + 40)
+            sessions.append((first_session + len(sessions), start, start + timedelta(weeks=12)))
+        session_rows = [{
+            'id': session_id,
+            'title': f'Teaching Practice {start.year}',
+            'start_date': start,
+            'end_date': end,
+            'description': 'Synthetic session',
+            'status': 'ongoing' if index == len(sessions) - 1 else 'completed',
+            'created_at': start,
+            'updated_at': start,
+        } for index, (session_id, start, end) in enumerate(sessions)]
+        inserted['teaching_practice_session'] = insert_chunks(
+            connection, TeachingPracticeSession.__table__, session_rows)
+
+        # Users
+        first_id = next_id(connection, User.__table__)
+        roles = (['admin'] * counts['admins'] + ['lecturer'] * counts['lecturers']
+                 + ['student'] * counts['students'])
+        ids_by_role = {'admin': [], 'lecturer': [], 'student': []}
+
+        def user_rows():
+            for index, role in enumerate(roles):
+                user_id = first_id + index
+                ids_by_role[role].append(user_id)
+                username = f'{role}{user_id}'
+                yield {
+                    'id': user_id,
+                    'username': username,
+                    'email': f'{username}@bench.example.com',
+                    'password_hash': password_hash,
+                    'first_name': rng.choice(WORDS).title(),
+                    'last_name': rng.choice(WORDS).title(),
+                    'role': role,
+                    'is_active': rng.random() > 0.02,
+                    'created_at': now,
+                    'updated_at': now,
+                }
+
+        inserted['user'] = insert_chunks(connection, User.__table__, user_rows())
+
+        # Schools
+        first_school = next_id(connection, School.__table__)
+        school_ids = list(range(first_school, first_school + counts['schools']))
+
+        def school_rows():
+            for school_id in school_ids:
+                city, state = rng.choice(CITIES)
+                yield {
+                    'id': school_id,
+                    'name': f'{rng.choice(WORDS).title()} School {school_id}',
+                    'address': f'{rng.randint(1, 999)} {rng.choice(WORDS).title()} Road',
+                    'city': city,
+                    'state': state,
+                    'contact_person': rng.choice(WORDS).title(),
+                    'contact_email': f'school{school_id}@bench.example.com',
+                    'contact_phone': f'+2547{rng.randint(10000000, 99999999)}',
+                    'created_at': now,
+                    'updated_at': now,
+                }
+
+        inserted['school'] = insert_chunks(connection, School.__table__, school_rows())
+
+        # Each student belongs to one yearly cohort, with one school and
+        # one or two supervisors in that session
+        students = ids_by_role['student']
+        cohort = {student_id: rng.choice(sessions) for student_id in students}
+        pick_school = SkewedChoice(rng, school_ids)
+        pick_lecturer = SkewedChoice(rng, ids_by_role['lecturer'])
+
+        inserted['student_school'] = insert_chunks(
+            connection, student_school,
+            ({'student_id': student_id, 'school_id': pick_school(), 'session_id': cohort[student_id][0]}
+             for student_id in students))
+
+        supervision = []
+        for student_id in students:
+            lecturers = {pick_lecturer() for _ in range(1 if rng.random() < 0.7 else 2)}
+            supervision.extend((lecturer_id, student_id) for lecturer_id in lecturers)
+        inserted['lecturer_student'] = insert_chunks(
+            connection, lecturer_student,
+            ({'lecturer_id': lecturer_id, 'student_id': student_id, 'session_id': cohort[student_id][0]}
+             for lecturer_id, student_id in supervision))
+        bump_supervision_version(connection)
+
+        # Reports, skewed towards prolific students
+        texts = {report_type: [make_text(rng, size) for _ in range(8)]
+                 for report_type, size in REPORT_SIZES.items()}
+        type_names = [name for name, _ in REPORT_TYPE_WEIGHTS]
+        type_weights = [weight for _, weight in REPORT_TYPE_WEIGHTS]
+        pick_student = SkewedChoice(rng, students, alpha=1.5)
+
+        def random_date(student_id):
+            _, start, end = cohort[student_id]
+            return start + (end - start) * rng.random()
+
+        def report_rows():
+            for _ in range(counts['reports']):
+                report_type = rng.choices(type_names, type_weights)[0]
+                student_id = pick_student()
+                yield {
+                    'student_id': student_id,
+                    'session_id': cohort[student_id][0],
+                    'title': f'{report_type.replace("_", " ").title()} report {rng.randint(1, 84)}',
+                    'content': rng.choice(texts[report_type]),
+                    'report_type': report_type,
+                    'file_path': None,
+                    'submission_date': random_date(student_id),
+                    'status': rng.choice(['submitted', 'submitted', 'reviewed']),
+                }
+
+        inserted['report'] = insert_chunks(connection, Report.__table__, report_rows())
+
+        # Evaluations by one of the student's supervisors
+        def evaluation_rows():
+            for _ in range(counts['evaluations']):
+                lecturer_id, student_id = rng.choice(supervision)
+                visit_date = random_date(student_id)
+                yield {
+                    'lecturer_id': lecturer_id,
+                    'student_id': student_id,
+                    'session_id': cohort[student_id][0],
+                    'visit_date': visit_date,
+                    'teaching_skills': rng.randint(3, 10),
+                    'classroom_management': rng.randint(3, 10),
+                    'lesson_preparation': rng.randint(3, 10),
+                    'professionalism': rng.randint(3, 10),
+                    'comments': make_text(rng, 300),
+                    'overall_grade': rng.choice(GRADES),
+                    'submission_date': visit_date + timedelta(days=rng.randint(0, 3)),
+                }
+
+        inserted['evaluation'] = insert_chunks(connection, Evaluation.__table__, evaluation_rows())
+
+        log('Seeded %d rows in %.1fs: %s' % (
+            sum(inserted.values()), time.perf_counter() - started,
+            ', '.join(f'{table}={count}' for table, count in inserted.items())))
+
+    return inserted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Seed a database with synthetic benchmark data')
+    parser.add_argument('--database', default='sqlite:///bench.db', help='SQLAlchemy database URL')
+    parser.add_argument('--rows', type=int, default=10000, help='approximate total rows (1k to 1M)')
+    parser.add_argument('--seed', type=int, default=42, help='random seed')
+    parser.add_argument('--years', type=int, default=3, help='number of yearly sessions')
+    args = parser.parse_args(argv)
+
+    import backend.models  # noqa: F401
+    from benchmarks.endpoints import make_app
+    from backend.app import db
+
+    app = make_app(args.database)
+    with app.app_context():
+        db.create_all()
+        seed(db.engine, args.rows, seed_value=args.seed, years=args.years)
+
+
+if __name__ == '__main__':
+    main()
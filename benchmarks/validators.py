@@ -0,0 +1,147 @@
+"""
+Payload validation cost.
+
+Times the compiled schemas in ``services`` against the hand-written
+validators they replaced: microseconds per payload for schemas without
+database checks, and, for registrations, one payload at a time versus a
+whole list through ``validate_many`` together with the statements issued.
+
+    python -m benchmarks.validators --payloads 200
+"""
+import argparse
+import re
+import time
+
+from sqlalchemy import event
+
+REPORT = {'title': 'Weekly report 4', 'content': 'Taught fractions to form two. ' * 20,
+          'report_type': 'weekly'}
+EVALUATION = {'student_id': 1, 'visit_date': '2026-10-01', 'teaching_skills': 7,
+              'classroom_management': 8, 'lesson_preparation': 6, 'professionalism': 9,
+              'overall_grade': 'B+'}
+
+
+def legacy_validate_report(data):
+    """The report validator before schemas, for comparison."""
+    if not data:
+        return {'error': True, 'message': 'No data provided'}
+    for field in ['title', 'content', 'report_type']:
+        if field not in data or not data[field]:
+            return {'error': True, 'message': f'{field} is required'}
+    if len(data['title']) < 5 or len(data['title']) > 100:
+        return {'error': True, 'message': 'Title must be between 5 and 100 characters'}
+    if len(data['content']) < 10:
+        return {'error': True, 'message': 'Content must be at least 10 characters'}
+    valid_types = ['daily', 'weekly', 'lesson_plan', 'reflection', 'final']
+    if data['report_type'] not in valid_types:
+        return {'error': True, 'message': f'Report type must be one of: {", ".join(valid_types)}'}
+    return {'error': False, 'message': 'Data is valid'}
+
+
+def legacy_validate_registration(data):
+    """The registration validator before schemas, for comparison."""
+    from backend.models import User
+
+    if not data:
+        return {'error': True, 'message': 'No data provided'}
+    for field in ['username', 'password', 'email', 'first_name', 'last_name', 'role']:
+        if field not in data or not data[field]:
+            return {'error': True, 'message': f'{field} is required'}
+    if not re.match(r'^[a-zA-Z0-9_]{3,20}$', data['username']):
+        return {'error': True, 'message': 'Username must be 3-20 characters and contain only letters, numbers, and underscores'}
+    if User.query.filter_by(username=data['username']).first():
+        return {'error': True, 'message': 'Username already exists'}
+    if not re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', data['email']):
+        return {'error': True, 'message': 'Invalid email format'}
+    if User.query.filter_by(email=data['email']).first():
+        return {'error': True, 'message': 'Email already exists'}
+    if len(data['password']) < 6:
+        return {'error': True, 'message': 'Password must be at least 6 characters long'}
+    if data['role'] not in ['admin', 'lecturer', 'student']:
+        return {'error': True, 'message': 'Role must be one of: admin, lecturer, student'}
+    return {'error': False, 'message': 'Data is valid'}
+
+
+def microseconds_per_call(function, payload, duration):
+    """Call function(payload) repeatedly and return the mean cost."""
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < duration:
+        for _ in range(100):
+            function(payload)
+        count += 100
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def registrations(count, existing):
+    """Registration payloads, every tenth one reusing an existing username."""
+    payloads = []
+    for index in range(count):
+        username = f'user{index % existing}' if index % 10 == 0 else f'new_user{index}'
+        payloads.append({'username': username, 'password': 'secret123',
+                         'email': f'{username}.{index}@example.com', 'first_name': 'New',
+                         'last_name': 'User', 'role': 'student'})
+    return payloads
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure payload validation cost')
+    parser.add_argument('--payloads', type=int, default=200, help='registrations per batch')
+    parser.add_argument('--users', type=int, default=1000, help='users already in the database')
+    parser.add_argument('--duration', type=float, default=1.0, help='seconds per measurement')
+    args = parser.parse_args(argv)
+
+    from backend.app import create_app, db
+    from backend.models import User
+    from services.auth_service import validate_registration, validate_registrations
+    from services.lecturer_service import validate_evaluation
+    from services.student_service import validate_report
+
+    app = create_app({
+        'SECRET_KEY': 'benchmark',
+        'JWT_SECRET_KEY': 'benchmark',
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'METRICS_ENABLED': False,
+    })
+
+    print('%-32s %12s' % ('validator', 'us/payload'))
+    for name, function, payload in [
+        ('report (hand-written)', legacy_validate_report, REPORT),
+        ('report (schema)', validate_report, REPORT),
+        ('evaluation (schema)', validate_evaluation, EVALUATION),
+    ]:
+        print('%-32s %12.2f' % (name, microseconds_per_call(function, payload, args.duration)))
+
+    with app.app_context():
+        db.session.execute(User.__table__.insert(), [{
+            'username': f'user{index}', 'email': f'user{index}@example.com',
+            'password_hash': 'x', 'first_name': 'Bench', 'last_name': 'User', 'role': 'student',
+        } for index in range(args.users)])
+        db.session.commit()
+
+        statements = [0]
+
+        def count_statement(*_):
+            statements[0] += 1
+
+        event.listen(db.engine, 'before_cursor_execute', count_statement)
+        payloads = registrations(args.payloads, args.users)
+
+        print('\n%d registrations against %d users' % (args.payloads, args.users))
+        print('%-32s %12s %12s' % ('validator', 'us/payload', 'statements'))
+        for name, run in [
+            ('one at a time (hand-written)', lambda: [legacy_validate_registration(p) for p in payloads]),
+            ('one at a time (schema)', lambda: [validate_registration(p) for p in payloads]),
+            ('validate_many (schema)', lambda: validate_registrations(payloads)),
+        ]:
+            statements[0] = 0
+            started = time.perf_counter()
+            results = run()
+            elapsed = time.perf_counter() - started
+            assert len(results) == len(payloads)
+            print('%-32s %12.1f %12d' % (name, elapsed / len(payloads) * 1e6, statements[0]))
+
+
+if __name__ == '__main__':
+    main()
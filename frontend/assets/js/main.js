@@ -61,19 +61,8 @@ function fetchCurrentUser() {
     
     if (!token) return;
     
-    fetch(`${API_URL}/auth/me`, {
-        method: 'GET',
-        headers: {
-            'Authorization': `Bearer ${token}`,
-            'Content-Type': 'application/json'
-        }
-    })
-    .then(response => {
-        if (!response.ok) {
-            throw new Error('Failed to fetch user info');
-        }
-        return response.json();
-    })
+    // apiCall renews an expired token and logs out if that fails
+    apiCall('/auth/me')
     .then(data => {
         currentUser = data.user;
         localStorage.setItem('user', JSON.stringify(currentUser));
@@ -81,10 +70,6 @@ function fetchCurrentUser() {
     })
     .catch(error => {
         console.error('Error fetching user info:', error);
-        // Handle token expiration
-        if (error.message.includes('401')) {
-            logout();
-        }
     });
 }
 
@@ -213,11 +198,66 @@ function addEventListeners() {
  * Logout user and redirect to login page
  */
 function logout() {
+    const refreshToken = localStorage.getItem('refresh_token');
+    
+    // Revoke the refresh token on the server; the page can leave meanwhile
+    if (refreshToken) {
+        fetch(`${API_URL}/auth/logout`, {
+            method: 'POST',
+            headers: { 'Authorization': `Bearer ${refreshToken}` },
+            keepalive: true
+        }).catch(() => {});
+    }
+    
     localStorage.removeItem('token');
+    localStorage.removeItem('refresh_token');
     localStorage.removeItem('user');
     window.location.href = '/login.html';
 }
 
+// Pending refresh request, shared by calls that fail at the same time
+let refreshPromise = null;
+
+/**
+ * Exchange the stored refresh token for a new access token
+ * @returns {Promise<string>} The new access token
+ */
+function refreshAccessToken() {
+    if (refreshPromise) return refreshPromise;
+    
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (!refreshToken) {
+        return Promise.reject(new Error('No refresh token found'));
+    }
+    
+    refreshPromise = fetch(`${API_URL}/auth/refresh`, {
+        method: 'POST',
+        headers: { 'Authorization': `Bearer ${refreshToken}` }
+    })
+    .then(response => {
+        if (!response.ok) {
+            // Another tab may have rotated the token first
+            const latestRefreshToken = localStorage.getItem('refresh_token');
+            if (latestRefreshToken && latestRefreshToken !== refreshToken) {
+                return localStorage.getItem('token');
+            }
+            throw new Error('Session expired');
+        }
+        
+        return response.json().then(data => {
+            localStorage.setItem('token', data.access_token);
+            localStorage.setItem('refresh_token', data.refresh_token);
+            localStorage.setItem('user', JSON.stringify(data.user));
+            return data.access_token;
+        });
+    })
+    .finally(() => {
+        refreshPromise = null;
+    });
+    
+    return refreshPromise;
+}
+
 /**
  * Helper function to format dates
  * @param {string} dateString - ISO date string
@@ -234,6 +274,10 @@ function formatDate(dateString) {
     });
 }
 
+// GET calls made in the same task, sent together to /batch
+const MAX_BATCH_REQUESTS = 20;
+let pendingGets = [];
+
 /**
  * Helper function to make authenticated API calls
  * @param {string} endpoint - API endpoint
@@ -242,6 +286,56 @@ function formatDate(dateString) {
  * @returns {Promise} Fetch promise
  */
 function apiCall(endpoint, method = 'GET', data = null) {
+    if (method !== 'GET') {
+        return sendRequest(endpoint, method, data);
+    }
+    
+    // Page loads fire several GETs at once; collect them for one round trip
+    return new Promise((resolve, reject) => {
+        pendingGets.push({ endpoint, resolve, reject });
+        if (pendingGets.length === 1) {
+            setTimeout(flushPendingGets, 0);
+        }
+    });
+}
+
+/**
+ * Send the collected GET calls, batched when there is more than one
+ */
+function flushPendingGets() {
+    const calls = pendingGets;
+    pendingGets = [];
+    
+    for (let start = 0; start < calls.length; start += MAX_BATCH_REQUESTS) {
+        const chunk = calls.slice(start, start + MAX_BATCH_REQUESTS);
+        if (chunk.length === 1) {
+            sendRequest(chunk[0].endpoint).then(chunk[0].resolve, chunk[0].reject);
+            continue;
+        }
+        
+        const requests = chunk.map(call => ({ path: `${API_URL}${call.endpoint}` }));
+        sendRequest('/batch', 'POST', { requests })
+            .then(data => {
+                data.responses.forEach((response, index) => {
+                    if (response.status >= 200 && response.status < 300) {
+                        chunk[index].resolve(response.body);
+                    } else {
+                        chunk[index].reject(new Error((response.body && response.body.error) || 'API request failed'));
+                    }
+                });
+            })
+            .catch(error => chunk.forEach(call => call.reject(error)));
+    }
+}
+
+/**
+ * Make one authenticated request, renewing an expired token once
+ * @param {string} endpoint - API endpoint
+ * @param {string} method - HTTP method
+ * @param {object} data - Request data
+ * @returns {Promise} Fetch promise
+ */
+function sendRequest(endpoint, method = 'GET', data = null) {
     const token = localStorage.getItem('token');
     
     if (!token) {
@@ -250,19 +344,31 @@ function apiCall(endpoint, method = 'GET', data = null) {
     }
     
     const url = `${API_URL}${endpoint}`;
-    const options = {
-        method: method,
-        headers: {
-            'Authorization': `Bearer ${token}`,
-            'Content-Type': 'application/json'
+    const buildOptions = accessToken => {
+        const options = {
+            method: method,
+            headers: {
+                'Authorization': `Bearer ${accessToken}`,
+                'Content-Type': 'application/json'
+            }
+        };
+        
+        if (data && (method === 'POST' || method === 'PUT')) {
+            options.body = JSON.stringify(data);
         }
+        
+        return options;
     };
     
-    if (data && (method === 'POST' || method === 'PUT')) {
-        options.body = JSON.stringify(data);
-    }
-    
-    return fetch(url, options)
+    return fetch(url, buildOptions(token))
+        .then(response => {
+            if (response.status !== 401) return response;
+            
+            // Access token expired: renew it once and retry
+            return refreshAccessToken()
+                .then(newToken => fetch(url, buildOptions(newToken)))
+                .catch(() => response);
+        })
         .then(response => {
             if (response.status === 401) {
                 // Token expired or invalid
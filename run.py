@@ -1,12 +1,131 @@
 # run.py
+"""
+Serve the application.
+
+    python run.py            # prefork production server (gunicorn)
+    python run.py --dev      # Flask debug server with the reloader
+
+The production server preloads the app in the master so route modules and
+mappers are built once and shared copy-on-write by every worker. Workers
+run several threads each, are recycled after a number of requests to bound
+memory growth, and get ``--graceful-timeout`` seconds to finish in-flight
+requests (such as uploads) on shutdown.
+
+Signals to the master:
+    TERM / INT   graceful shutdown
+    HUP          start fresh workers and retire the old ones gracefully
+    USR2, then   re-exec the master to pick up new code, then retire the
+    WINCH, QUIT  old master and its workers
+"""
+import argparse
+import glob
+import multiprocessing
 import os
 import sys
 
 # Add the project root directory to Python's path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from backend.app import create_app
+from backend.app import create_app, preload_app
+
+
+def default_workers():
+    """One worker process per core."""
+    return multiprocessing.cpu_count()
+
+
+def default_threads():
+    """Threads per worker; requests mostly wait on the database, so a few per core."""
+    return max(2, min(8, 2 * multiprocessing.cpu_count()))
+
+
+def clear_metrics_dir(server):
+    """Drop metric files left by a previous run of the server."""
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, '*.db')):
+            os.remove(path)
+
+
+def worker_exited(server, worker):
+    """Stop reporting live gauges for a worker that has gone away."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def server_options(args):
+    """
+    Build the gunicorn settings for the command line arguments
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        dict: gunicorn settings
+    """
+    return {
+        'bind': args.bind,
+        'workers': args.workers,
+        'worker_class': 'gthread',
+        'threads': args.threads,
+        'preload_app': True,
+        'max_requests': args.max_requests,
+        'max_requests_jitter': args.max_requests // 10,
+        'timeout': args.timeout,
+        'graceful_timeout': args.graceful_timeout,
+        'keepalive': 5,
+        'accesslog': '-',
+        'on_starting': clear_metrics_dir,
+        'child_exit': worker_exited,
+    }
+
+
+def serve(options):
+    """Run the prefork server with the app preloaded in the master."""
+    from gunicorn.app.base import BaseApplication
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return preload_app(create_app())
+
+    Application().run()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the teaching practice API')
+    parser.add_argument('--dev', action='store_true', help='run the Flask debug server instead')
+    parser.add_argument('--bind', default=os.environ.get('BIND', '0.0.0.0:8000'),
+                        help='address to listen on')
+    parser.add_argument('--workers', type=int,
+                        default=int(os.environ.get('WEB_CONCURRENCY', default_workers())),
+                        help='worker processes (default: one per core)')
+    parser.add_argument('--threads', type=int,
+                        default=int(os.environ.get('SERVER_THREADS', default_threads())),
+                        help='threads per worker')
+    parser.add_argument('--max-requests', type=int,
+                        default=int(os.environ.get('SERVER_MAX_REQUESTS', 1000)),
+                        help='recycle a worker after this many requests, 0 to disable')
+    parser.add_argument('--timeout', type=int, default=int(os.environ.get('SERVER_TIMEOUT', 120)),
+                        help='seconds before a silent worker is killed')
+    parser.add_argument('--graceful-timeout', type=int,
+                        default=int(os.environ.get('SERVER_GRACEFUL_TIMEOUT', 60)),
+                        help='seconds workers get to finish requests on shutdown or reload')
+    args = parser.parse_args(argv)
+
+    if args.dev:
+        app = create_app()
+        app.run(debug=True)
+        return
+
+    os.environ.setdefault('FLASK_ENV', 'production')
+    serve(server_options(args))
+
 
 if __name__ == '__main__':
-    app = create_app()
-    app.run(debug=True)
\ No newline at end of file
+    main()
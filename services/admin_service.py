@@ -1,6 +1,43 @@
 from backend.models import User, School
-import re
-from datetime import datetime
+from backend.utils.validators import (EMAIL_PATTERN, PHONE_PATTERN, Check, Date, IntegerRange, NotEmpty,
+                                      NumberRange, OneOf, Pattern, Required, Schema, Unique, to_datetime)
+
+USER_UPDATE_SCHEMA = Schema(
+    Pattern('email', EMAIL_PATTERN, 'Invalid email format'),
+    NotEmpty('first_name', 'First name cannot be empty'),
+    NotEmpty('last_name', 'Last name cannot be empty'),
+)
+
+# Checked on creation and on update; a null capacity means no limit
+SCHOOL_LIMITS = (
+    IntegerRange('capacity', 0, 10000, type_message='capacity must be a whole number or null',
+                 strict=True, nullable=True),
+    NumberRange('latitude', -90, 90),
+    NumberRange('longitude', -180, 180),
+)
+
+SCHOOL_SCHEMA = Schema(
+    Required('name', 'address', 'city', 'state'),
+    Unique('name', School.name, 'School with this name already exists'),
+    Pattern('contact_email', EMAIL_PATTERN, 'Invalid contact email format'),
+    Pattern('contact_phone', PHONE_PATTERN, 'Invalid phone number format'),
+    *SCHOOL_LIMITS,
+)
+
+# Fields an update leaves out keep their stored values
+SCHOOL_UPDATE_SCHEMA = Schema(
+    *SCHOOL_LIMITS,
+)
+
+TEACHING_SESSION_SCHEMA = Schema(
+    Required('title', 'start_date', 'end_date'),
+    Date('start_date', 'Invalid start date format, use YYYY-MM-DD'),
+    Date('end_date', 'Invalid end date format, use YYYY-MM-DD'),
+    Check(lambda data: to_datetime(data['end_date']) > to_datetime(data['start_date']),
+          'End date must be after start date'),
+    OneOf('status', ['upcoming', 'ongoing', 'completed'], 'Status must be one of: {choices}'),
+)
+
 
 def validate_user_update(data):
     """
@@ -12,22 +49,7 @@ def validate_user_update(data):
     Returns:
         dict: Validation result with error flag and message
     """
-    if not data:
-        return {'error': True, 'message': 'No data provided'}
-    
-    # Email validation
-    if 'email' in data and data['email']:
-        if not re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', data['email']):
-            return {'error': True, 'message': 'Invalid email format'}
-    
-    # Empty fields validation
-    if 'first_name' in data and not data['first_name']:
-        return {'error': True, 'message': 'First name cannot be empty'}
-    
-    if 'last_name' in data and not data['last_name']:
-        return {'error': True, 'message': 'Last name cannot be empty'}
-    
-    return {'error': False, 'message': 'Data is valid'}
+    return USER_UPDATE_SCHEMA.validate(data)
 
 
 def validate_school(data):
@@ -40,29 +62,33 @@ def validate_school(data):
     Returns:
         dict: Validation result with error flag and message
     """
-    if not data:
-        return {'error': True, 'message': 'No data provided'}
-    
-    required_fields = ['name', 'address', 'city', 'state']
-    for field in required_fields:
-        if field not in data or not data[field]:
-            return {'error': True, 'message': f'{field} is required'}
+    return SCHOOL_SCHEMA.validate(data)
+
+
+def validate_school_update(data):
+    """
+    Validate school update data
     
-    # Name validation (check if exists)
-    if School.query.filter_by(name=data['name']).first():
-        return {'error': True, 'message': 'School with this name already exists'}
+    Args:
+        data (dict): School update data
     
-    # Email validation if provided
-    if 'contact_email' in data and data['contact_email']:
-        if not re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', data['contact_email']):
-            return {'error': True, 'message': 'Invalid contact email format'}
+    Returns:
+        dict: Validation result with error flag and message
+    """
+    return SCHOOL_UPDATE_SCHEMA.validate(data)
+
+
+def validate_schools(items):
+    """
+    Validate several schools, checking names with a single query
     
-    # Phone validation if provided
-    if 'contact_phone' in data and data['contact_phone']:
-        if not re.match(r'^\+?[0-9]{10,15}$', data['contact_phone']):
-            return {'error': True, 'message': 'Invalid phone number format'}
+    Args:
+        items (list): School data for each school
     
-    return {'error': False, 'message': 'Data is valid'}
+    Returns:
+        list: Validation result for each item, in order
+    """
+    return SCHOOL_SCHEMA.validate_many(items)
 
 
 def validate_teaching_session(data):
@@ -75,39 +101,4 @@ def validate_teaching_session(data):
     Returns:
         dict: Validation result with error flag and message
     """
-    if not data:
-        return {'error': True, 'message': 'No data provided'}
-    
-    required_fields = ['title', 'start_date', 'end_date']
-    for field in required_fields:
-        if field not in data or not data[field]:
-            return {'error': True, 'message': f'{field} is required'}
-    
-    # Convert string dates to datetime if needed
-    if isinstance(data['start_date'], str):
-        try:
-            start_date = datetime.strptime(data['start_date'], '%Y-%m-%d')
-        except ValueError:
-            return {'error': True, 'message': 'Invalid start date format, use YYYY-MM-DD'}
-    else:
-        start_date = data['start_date']
-    
-    if isinstance(data['end_date'], str):
-        try:
-            end_date = datetime.strptime(data['end_date'], '%Y-%m-%d')
-        except ValueError:
-            return {'error': True, 'message': 'Invalid end date format, use YYYY-MM-DD'}
-    else:
-        end_date = data['end_date']
-    
-    # Date validation
-    if end_date <= start_date:
-        return {'error': True, 'message': 'End date must be after start date'}
-    
-    # Status validation if provided
-    if 'status' in data:
-        valid_statuses = ['upcoming', 'ongoing', 'completed']
-        if data['status'] not in valid_statuses:
-            return {'error': True, 'message': f'Status must be one of: {", ".join(valid_statuses)}'}
-    
-    return {'error': False, 'message': 'Data is valid'}
\ No newline at end of file
+    return TEACHING_SESSION_SCHEMA.validate(data)
@@ -1,5 +1,22 @@
 from backend.models import User
-import re
+from backend.utils.validators import (EMAIL_PATTERN, Length, OneOf, Pattern, Required, Schema,
+                                      Unique)
+
+LOGIN_SCHEMA = Schema(
+    Required('username', message='Username is required'),
+    Required('password', message='Password is required'),
+)
+
+REGISTRATION_SCHEMA = Schema(
+    Required('username', 'password', 'email', 'first_name', 'last_name', 'role'),
+    Pattern('username', r'^[a-zA-Z0-9_]{3,20}$',
+            'Username must be 3-20 characters and contain only letters, numbers, and underscores'),
+    Unique('username', User.username, 'Username already exists'),
+    Pattern('email', EMAIL_PATTERN, 'Invalid email format'),
+    Unique('email', User.email, 'Email already exists'),
+    Length('password', 'Password must be at least 6 characters long', min_length=6),
+    OneOf('role', ['admin', 'lecturer', 'student'], 'Role must be one of: {choices}'),
+)
 
 def validate_login(data):
     """
@@ -11,16 +28,7 @@ def validate_login(data):
     Returns:
         dict: Validation result with error flag and message
     """
-    if not data:
-        return {'error': True, 'message': 'No data provided'}
-    
-    if 'username' not in data or not data['username']:
-        return {'error': True, 'message': 'Username is required'}
-    
-    if 'password' not in data or not data['password']:
-        return {'error': True, 'message': 'Password is required'}
-    
-    return {'error': False, 'message': 'Data is valid'}
+    return LOGIN_SCHEMA.validate(data)
 
 def validate_registration(data):
     """
@@ -32,37 +40,16 @@ def validate_registration(data):
     Returns:
         dict: Validation result with error flag and message
     """
-    if not data:
-        return {'error': True, 'message': 'No data provided'}
-    
-    required_fields = ['username', 'password', 'email', 'first_name', 'last_name', 'role']
-    for field in required_fields:
-        if field not in data or not data[field]:
-            return {'error': True, 'message': f'{field} is required'}
-    
-    # Username validation
-    if not re.match(r'^[a-zA-Z0-9_]{3,20}$', data['username']):
-        return {'error': True, 'message': 'Username must be 3-20 characters and contain only letters, numbers, and underscores'}
-    
-    # Check if username already exists
-    if User.query.filter_by(username=data['username']).first():
-        return {'error': True, 'message': 'Username already exists'}
-    
-    # Email validation
-    if not re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', data['email']):
-        return {'error': True, 'message': 'Invalid email format'}
-    
-    # Check if email already exists
-    if User.query.filter_by(email=data['email']).first():
-        return {'error': True, 'message': 'Email already exists'}
+    return REGISTRATION_SCHEMA.validate(data)
+
+def validate_registrations(items):
+    """
+    Validate several registrations, checking uniqueness with one query per field
     
-    # Password validation
-    if len(data['password']) < 6:
-        return {'error': True, 'message': 'Password must be at least 6 characters long'}
+    Args:
+        items (list): Registration data for each user
     
-    # Role validation
-    valid_roles = ['admin', 'lecturer', 'student']
-    if data['role'] not in valid_roles:
-        return {'error': True, 'message': f'Role must be one of: {", ".join(valid_roles)}'}
-        
-    return {'error': False, 'message': 'Data is valid'}
\ No newline at end of file
+    Returns:
+        list: Validation result for each item, in order
+    """
+    return REGISTRATION_SCHEMA.validate_many(items)
@@ -1,4 +1,23 @@
-from datetime import datetime
+from backend.utils.validators import Date, IntegerRange, OneOf, Required, Schema
+
+RATING_FIELDS = ['teaching_skills', 'classroom_management', 'lesson_preparation', 'professionalism']
+
+VALID_GRADES = ['A+', 'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D+', 'D', 'F']
+
+EVALUATION_SCHEMA = Schema(
+    Required('student_id', 'visit_date', *RATING_FIELDS, 'overall_grade', allow_empty=True),
+    Date('visit_date', 'Invalid visit date format, use YYYY-MM-DD'),
+    # Rating validation (1-10 scale)
+    *[IntegerRange(field, 1, 10) for field in RATING_FIELDS],
+    OneOf('overall_grade', VALID_GRADES, 'Overall grade must be one of: {choices}'),
+)
+
+# Fields an update leaves out keep their stored values
+EVALUATION_UPDATE_SCHEMA = Schema(
+    Date('visit_date', 'Invalid visit date format, use YYYY-MM-DD'),
+    *[IntegerRange(field, 1, 10) for field in RATING_FIELDS],
+    OneOf('overall_grade', VALID_GRADES, 'Overall grade must be one of: {choices}'),
+)
 
 def validate_evaluation(data):
     """
@@ -10,43 +29,28 @@ def validate_evaluation(data):
     Returns:
         dict: Validation result with error flag and message
     """
-    if not data:
-        return {'error': True, 'message': 'No data provided'}
-    
-    required_fields = [
-        'student_id', 
-        'visit_date', 
-        'teaching_skills', 
-        'classroom_management', 
-        'lesson_preparation', 
-        'professionalism', 
-        'overall_grade'
-    ]
-    
-    for field in required_fields:
-        if field not in data:
-            return {'error': True, 'message': f'{field} is required'}
+    return EVALUATION_SCHEMA.validate(data)
+
+def validate_evaluation_update(data):
+    """
+    Validate changes to an evaluation
     
-    # Convert string date to datetime if needed
-    if isinstance(data['visit_date'], str):
-        try:
-            visit_date = datetime.strptime(data['visit_date'], '%Y-%m-%d')
-        except ValueError:
-            return {'error': True, 'message': 'Invalid visit date format, use YYYY-MM-DD'}
+    Args:
+        data (dict): Evaluation update data
     
-    # Rating validation (1-10 scale)
-    rating_fields = ['teaching_skills', 'classroom_management', 'lesson_preparation', 'professionalism']
-    for field in rating_fields:
-        try:
-            rating = int(data[field])
-            if rating < 1 or rating > 10:
-                return {'error': True, 'message': f'{field} must be between 1 and 10'}
-        except (ValueError, TypeError):
-            return {'error': True, 'message': f'{field} must be a number'}
+    Returns:
+        dict: Validation result with error flag and message
+    """
+    return EVALUATION_UPDATE_SCHEMA.validate(data)
+
+def validate_evaluations(items):
+    """
+    Validate a batch of evaluations
     
-    # Grade validation
-    valid_grades = ['A+', 'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D+', 'D', 'F']
-    if data['overall_grade'] not in valid_grades:
-        return {'error': True, 'message': f'Overall grade must be one of: {", ".join(valid_grades)}'}
+    Args:
+        items (list): Evaluation data for each student
     
-    return {'error': False, 'message': 'Data is valid'}
\ No newline at end of file
+    Returns:
+        list: Validation result for each item, in order
+    """
+    return EVALUATION_SCHEMA.validate_many(items)
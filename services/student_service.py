@@ -1,3 +1,13 @@
+from backend.utils.validators import Length, OneOf, Required, Schema
+
+REPORT_SCHEMA = Schema(
+    Required('title', 'content', 'report_type'),
+    Length('title', 'Title must be between 5 and 100 characters', min_length=5, max_length=100),
+    Length('content', 'Content must be at least 10 characters', min_length=10),
+    OneOf('report_type', ['daily', 'weekly', 'lesson_plan', 'reflection', 'final'],
+          'Report type must be one of: {choices}'),
+)
+
 def validate_report(data):
     """
     Validate report data submitted by students
@@ -8,25 +18,4 @@ def validate_report(data):
     Returns:
         dict: Validation result with error flag and message
     """
-    if not data:
-        return {'error': True, 'message': 'No data provided'}
-    
-    required_fields = ['title', 'content', 'report_type']
-    for field in required_fields:
-        if field not in data or not data[field]:
-            return {'error': True, 'message': f'{field} is required'}
-    
-    # Title length validation
-    if len(data['title']) < 5 or len(data['title']) > 100:
-        return {'error': True, 'message': 'Title must be between 5 and 100 characters'}
-    
-    # Content length validation
-    if len(data['content']) < 10:
-        return {'error': True, 'message': 'Content must be at least 10 characters'}
-    
-    # Report type validation
-    valid_types = ['daily', 'weekly', 'lesson_plan', 'reflection', 'final']
-    if data['report_type'] not in valid_types:
-        return {'error': True, 'message': f'Report type must be one of: {", ".join(valid_types)}'}
-    
-    return {'error': False, 'message': 'Data is valid'}
\ No newline at end of file
+    return REPORT_SCHEMA.validate(data)
@@ -0,0 +1,58 @@
+"""
+Shared fixtures for request-level tests.
+
+``app`` is a fresh app from ``TestingConfig`` on a SQLite file per test, with
+the background and caching extensions off. Its query inspector fails any
+request that runs more than ``QUERY_BUDGET`` statements. ``add_user`` stores
+a user and ``auth`` builds the Authorization header for one.
+"""
+import pytest
+from flask_jwt_extended import create_access_token
+
+from backend.app import create_app, db
+from backend.config import TestingConfig
+
+
+@pytest.fixture
+def app(tmp_path):
+    config = {key: getattr(TestingConfig, key) for key in dir(TestingConfig) if key.isupper()}
+    return create_app(dict(config, **{
+        'SECRET_KEY': 'test',
+        'JWT_SECRET_KEY': 'test',
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "test.db"}',
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'PREVIEWS_ENABLED': False,
+        'METRICS_ENABLED': False,
+        'RESPONSE_CACHE_ENABLED': False,
+        'LOGIN_RATE_LIMIT_ENABLED': False,
+        'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+        'ARCHIVE_FOLDER': str(tmp_path / 'archive'),
+    }))
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def add_user(app):
+    def add_user(username, role='student', password='password123', is_active=True):
+        from backend.models import User
+
+        with app.app_context():
+            user = User(username=username, email=f'{username}@example.com', first_name=username.title(),
+                        last_name='Test', role=role, is_active=is_active)
+            user.set_password(password)
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+    return add_user
+
+
+@pytest.fixture
+def auth(app):
+    def auth(user_id):
+        with app.app_context():
+            return {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
+    return auth
@@ -0,0 +1,97 @@
+"""Login, refresh token rotation and revocation."""
+import pytest
+
+
+@pytest.fixture
+def login(client, add_user):
+    add_user('student', password='password123')
+
+    def login(password='password123'):
+        response = client.post('/api/auth/login', json={'username': 'student', 'password': password})
+        assert response.status_code == 200
+        return response.get_json()
+    return login
+
+
+def refresh(client, refresh_token):
+    return client.post('/api/auth/refresh', headers={'Authorization': f'Bearer {refresh_token}'})
+
+
+def test_refresh_rotates_the_token(client, login):
+    tokens = login()
+    response = refresh(client, tokens['refresh_token'])
+    assert response.status_code == 200
+    rotated = response.get_json()
+    assert rotated['refresh_token'] != tokens['refresh_token']
+    assert refresh(client, rotated['refresh_token']).status_code == 200
+
+
+def test_reuse_inside_grace_period_keeps_the_family(client, login):
+    tokens = login()
+    rotated = refresh(client, tokens['refresh_token']).get_json()
+
+    # A second tab refreshing with the same token at the same time
+    response = refresh(client, tokens['refresh_token'])
+    assert response.status_code == 401
+    assert response.get_json()['error'] == 'Refresh token already used'
+    assert refresh(client, rotated['refresh_token']).status_code == 200
+
+
+def test_reuse_after_grace_period_revokes_the_family(app, client, login):
+    app.config['REFRESH_TOKEN_REUSE_GRACE_SECONDS'] = -1
+    tokens = login()
+    rotated = refresh(client, tokens['refresh_token']).get_json()
+
+    response = refresh(client, tokens['refresh_token'])
+    assert response.status_code == 401
+    assert response.get_json()['error'] == 'Refresh token reuse detected. Please log in again'
+    assert refresh(client, rotated['refresh_token']).status_code == 401
+
+    # Other logins of the same user are not affected
+    assert refresh(client, login()['refresh_token']).status_code == 200
+
+
+def test_refresh_after_logout(client, login):
+    tokens = login()
+    rotated = refresh(client, tokens['refresh_token']).get_json()
+
+    response = client.post('/api/auth/logout', headers={'Authorization': f'Bearer {rotated["refresh_token"]}'})
+    assert response.status_code == 200
+    response = refresh(client, rotated['refresh_token'])
+    assert response.status_code == 401
+    assert response.get_json()['error'] == 'Refresh token has been revoked'
+
+
+def test_refresh_after_deactivation(client, login, add_user, auth):
+    tokens = login()
+    admin = auth(add_user('admin', role='admin'))
+    student_id = tokens['user']['id']
+
+    assert client.delete(f'/api/admin/users/{student_id}', headers=admin).status_code == 200
+    assert refresh(client, tokens['refresh_token']).status_code == 401
+
+
+def test_refresh_after_deactivation_through_update(client, login, add_user, auth):
+    tokens = login()
+    admin = auth(add_user('admin', role='admin'))
+    student_id = tokens['user']['id']
+
+    response = client.put(f'/api/admin/users/{student_id}', headers=admin, json={'is_active': False})
+    assert response.status_code == 200
+    assert refresh(client, tokens['refresh_token']).status_code == 401
+
+
+def test_password_change_signs_out_other_logins(client, login):
+    other = login()
+    current = login()
+
+    response = client.put('/api/auth/change-password',
+                          headers={'Authorization': f'Bearer {current["access_token"]}'},
+                          json={'current_password': 'password123', 'new_password': 'new-password456'})
+    assert response.status_code == 200
+    replacement = response.get_json()
+
+    assert refresh(client, other['refresh_token']).status_code == 401
+    assert refresh(client, current['refresh_token']).status_code == 401
+    assert refresh(client, replacement['refresh_token']).status_code == 200
+    assert login('new-password456')['access_token']
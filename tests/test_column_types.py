@@ -0,0 +1,92 @@
+"""CompressedText storage format."""
+import importlib.util
+import os
+
+import pytest
+
+from backend.app import MIGRATIONS_DIR, db
+from backend.models import Report
+from backend.utils import column_types
+from backend.utils.column_types import MARKER, RAW, ZLIB, ZSTD, compress_text, decompress_text
+
+LONG = 'Taught fractions to form two with paper strips. ' * 60
+TEXTS = ['', 'short report', 'Ọjọ́ kìíní: ẹ̀kọ́ ìṣirò', LONG, '\x00z not zlib', '\x00' + LONG, 'x' * 1023]
+
+
+def migration():
+    """The compress_report_content migration module, loaded from its file."""
+    path = os.path.join(MIGRATIONS_DIR, 'versions', 'b6e2d8f0a4c1_compress_report_content.py')
+    spec = importlib.util.spec_from_file_location('compress_report_content', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_round_trip(text):
+    assert decompress_text(compress_text(text)) == text
+    assert decompress_text(memoryview(compress_text(text))) == text
+
+
+def test_long_text_is_compressed():
+    stored = compress_text(LONG)
+    assert stored.startswith(ZLIB)
+    assert len(stored) < len(LONG)
+
+
+def test_short_text_is_stored_as_utf8():
+    assert compress_text('short report') == b'short report'
+
+
+def test_text_that_does_not_shrink_stays_plain():
+    # Level 0 only adds zlib framing
+    assert compress_text(LONG, level=0) == LONG.encode('utf-8')
+
+
+def test_text_starting_with_the_marker_is_escaped():
+    stored = compress_text('\x00z not zlib')
+    assert stored == RAW + b'\x00z not zlib'
+    assert decompress_text(stored) == '\x00z not zlib'
+
+
+def test_rows_written_before_compression():
+    # Text columns converted in place hold plain UTF-8, and a driver may hand back str
+    assert decompress_text('legacy report') == 'legacy report'
+    assert decompress_text('Ọjọ́'.encode('utf-8')) == 'Ọjọ́'
+
+
+@pytest.mark.skipif(column_types.zstandard is None, reason='zstandard is not installed')
+def test_zstd_round_trip():
+    stored = compress_text(LONG, codec='zstd')
+    assert stored.startswith(ZSTD)
+    assert decompress_text(stored) == LONG
+
+
+def test_zstd_falls_back_to_zlib_without_the_package(monkeypatch):
+    monkeypatch.setattr(column_types, 'zstandard', None)
+    assert compress_text(LONG, codec='zstd').startswith(ZLIB)
+    with pytest.raises(RuntimeError):
+        decompress_text(ZSTD + b'anything')
+
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_migration_writes_what_the_column_reads(text):
+    module = migration()
+    assert module.MARKER == MARKER
+    assert module.compress_text(text) == compress_text(text)
+    assert module.decompress_text(module.compress_text(text)) == text
+
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_report_content_through_the_database(app, add_user, text):
+    student_id = add_user('student')
+    with app.app_context():
+        report = Report(student_id=student_id, title='Week one', content=text, report_type='weekly')
+        db.session.add(report)
+        db.session.commit()
+        report_id = report.id
+        db.session.remove()
+
+        stored = db.session.execute(db.text('SELECT content FROM report WHERE id = :id'), {'id': report_id}).scalar()
+        assert bytes(stored) == compress_text(text)
+        assert db.session.get(Report, report_id).content == text
@@ -0,0 +1,67 @@
+"""Evaluation submission and update validation."""
+from datetime import date
+
+import pytest
+
+EVALUATION = {'teaching_skills': 7, 'classroom_management': 8, 'lesson_preparation': 6,
+              'professionalism': 9, 'overall_grade': 'B+', 'comments': 'Good lesson'}
+
+
+@pytest.fixture
+def lecturer(client, add_user, auth):
+    admin, lecturer_id, student_id = add_user('admin', role='admin'), add_user('lecturer', role='lecturer'), \
+        add_user('student')
+    response = client.post('/api/admin/assign-lecturer', headers=auth(admin),
+                           json={'lecturer_id': lecturer_id, 'student_id': student_id})
+    assert response.status_code == 200
+    return auth(lecturer_id), student_id
+
+
+@pytest.fixture
+def evaluation_id(client, lecturer):
+    headers, student_id = lecturer
+    response = client.post('/api/lecturer/evaluations', headers=headers,
+                           json=dict(EVALUATION, student_id=student_id, visit_date=date.today().isoformat()))
+    assert response.status_code == 201
+    return response.get_json()['evaluation']['id']
+
+
+@pytest.mark.parametrize('body', [[1, 2], 'text', None])
+def test_batch_rejects_non_object_body(client, lecturer, body):
+    headers, _ = lecturer
+    response = client.post('/api/lecturer/evaluations/batch', headers=headers, json=body)
+    assert response.status_code == 400
+
+
+def test_batch_reports_bad_dates(client, lecturer):
+    headers, student_id = lecturer
+    items = [dict(EVALUATION, student_id=student_id, visit_date=visit_date)
+             for visit_date in (date.today().isoformat(), '19-10-2026', 20261019)]
+    response = client.post('/api/lecturer/evaluations/batch', headers=headers,
+                           json={'evaluations': items, 'mode': 'partial'})
+    assert response.status_code == 207
+    assert [result['status'] for result in response.get_json()['results']] == ['created', 'error', 'error']
+
+
+@pytest.mark.parametrize('visit_date', ['2026-13-01', 'yesterday', 20261019, None])
+def test_update_rejects_bad_visit_date(client, lecturer, evaluation_id, visit_date):
+    headers, _ = lecturer
+    response = client.put(f'/api/lecturer/evaluations/{evaluation_id}', headers=headers,
+                          json={'visit_date': visit_date})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid visit date format, use YYYY-MM-DD'
+
+
+@pytest.mark.parametrize('change', [{'teaching_skills': 11}, {'overall_grade': 'Z'}])
+def test_update_rejects_bad_scores(client, lecturer, evaluation_id, change):
+    headers, _ = lecturer
+    response = client.put(f'/api/lecturer/evaluations/{evaluation_id}', headers=headers, json=change)
+    assert response.status_code == 400
+
+
+def test_update_visit_date(client, lecturer, evaluation_id):
+    headers, _ = lecturer
+    response = client.put(f'/api/lecturer/evaluations/{evaluation_id}', headers=headers,
+                          json={'visit_date': date.today().isoformat(), 'teaching_skills': 10})
+    assert response.status_code == 200
+    assert response.get_json()['evaluation']['teaching_skills'] == 10
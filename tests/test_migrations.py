@@ -0,0 +1,133 @@
+"""
+Migration tests.
+
+Each test builds a SQLite database at the revision before a migration,
+inserts rows the way the older schema held them, and upgrades.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+import sqlalchemy as sa
+from flask_migrate import downgrade, upgrade
+
+from backend.app import MIGRATIONS_DIR, create_app, db
+
+BEFORE_SESSIONS = 'd2b8f4c6a0e1'
+SESSION_PARTITIONING = 'e7f1a3b5c9d2'
+BEFORE_COMPRESSION = 'f3c9a7e1b5d4'
+COMPRESSION = 'b6e2d8f0a4c1'
+
+
+def migrated_app(tmp_path, revision):
+    app = create_app({
+        'SECRET_KEY': 'test',
+        'JWT_SECRET_KEY': 'test',
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "test.db"}',
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'AUTO_CREATE_TABLES': False,
+        'PREVIEWS_ENABLED': False,
+        'METRICS_ENABLED': False,
+        'UPLOAD_FOLDER': str(tmp_path),
+    })
+    with app.app_context():
+        upgrade(directory=MIGRATIONS_DIR, revision=revision)
+        yield app
+
+
+@pytest.fixture
+def app(tmp_path):
+    yield from migrated_app(tmp_path, BEFORE_SESSIONS)
+
+
+@pytest.fixture
+def text_content_app(tmp_path):
+    yield from migrated_app(tmp_path, BEFORE_COMPRESSION)
+
+
+def execute(statement, **params):
+    db.session.execute(sa.text(statement), params)
+    db.session.commit()
+
+
+def scalar(statement):
+    return db.session.execute(sa.text(statement)).scalar()
+
+
+def add_records(report_date, visit_date):
+    execute("INSERT INTO user (id, username, email, password_hash, first_name, last_name, role, is_active) "
+            "VALUES (1, 'student', 's@example.com', 'x', 'S', 'T', 'student', 1), "
+            "(2, 'lecturer', 'l@example.com', 'x', 'L', 'T', 'lecturer', 1)")
+    execute("INSERT INTO report (student_id, title, content, report_type, submission_date, status) "
+            "VALUES (1, 'Daily report', 'blob', 'daily', :date, 'submitted')", date=report_date)
+    execute("INSERT INTO evaluation (lecturer_id, student_id, visit_date, teaching_skills, overall_grade) "
+            "VALUES (2, 1, :date, 7, 'B')", date=visit_date)
+    execute('INSERT INTO lecturer_student (lecturer_id, student_id) VALUES (2, 1)')
+
+
+def add_session(start, end, status):
+    execute('INSERT INTO teaching_practice_session (title, start_date, end_date, status) '
+            'VALUES (:title, :start, :end, :status)', title=f'{status} session', start=start, end=end,
+            status=status)
+
+
+def unassigned_counts():
+    return [scalar(f'SELECT COUNT(*) FROM {table} WHERE session_id IS NULL')
+            for table in ('report', 'evaluation', 'lecturer_student')]
+
+
+def test_records_outside_every_session_go_to_the_active_session(app):
+    now = datetime.utcnow()
+    add_session(now - timedelta(days=10), now + timedelta(days=10), 'ongoing')
+    add_records(now - timedelta(days=400), now - timedelta(days=300))
+
+    upgrade(directory=MIGRATIONS_DIR, revision=SESSION_PARTITIONING)
+
+    assert unassigned_counts() == [0, 0, 0]
+    assert scalar('SELECT DISTINCT session_id FROM report') == 1
+
+
+def test_session_is_created_when_none_exists(app):
+    now = datetime.utcnow()
+    add_records(now - timedelta(days=5), now - timedelta(days=4))
+
+    upgrade(directory=MIGRATIONS_DIR, revision=SESSION_PARTITIONING)
+
+    assert unassigned_counts() == [0, 0, 0]
+    assert scalar('SELECT COUNT(*) FROM teaching_practice_session') == 1
+
+
+def test_session_is_created_when_only_upcoming_sessions_exist(app):
+    now = datetime.utcnow()
+    add_session(now + timedelta(days=30), now + timedelta(days=60), 'upcoming')
+    add_records(now - timedelta(days=5), now - timedelta(days=4))
+
+    upgrade(directory=MIGRATIONS_DIR, revision=SESSION_PARTITIONING)
+
+    assert unassigned_counts() == [0, 0, 0]
+    assert scalar('SELECT COUNT(*) FROM teaching_practice_session') == 2
+
+
+REPORT_TEXTS = ['Short daily report', '\x00z starts like a compressed value',
+                'Taught fractions with paper strips. ' * 80]
+
+
+def test_report_content_is_compressed_and_restored(text_content_app):
+    from backend.utils.column_types import ZLIB, decompress_text
+
+    execute("INSERT INTO user (id, username, email, password_hash, first_name, last_name, role, is_active) "
+            "VALUES (1, 'student', 's@example.com', 'x', 'S', 'T', 'student', 1)")
+    for index, text in enumerate(REPORT_TEXTS):
+        execute("INSERT INTO report (id, student_id, title, content, report_type, submission_date, status) "
+                "VALUES (:id, 1, 'Report', :content, 'daily', :date, 'submitted')",
+                id=index + 1, content=text, date=datetime(2026, 1, 1))
+
+    upgrade(directory=MIGRATIONS_DIR, revision=COMPRESSION)
+
+    stored = [bytes(value) for value in
+              db.session.execute(sa.text('SELECT content FROM report ORDER BY id')).scalars()]
+    assert [decompress_text(value) for value in stored] == REPORT_TEXTS
+    assert stored[2].startswith(ZLIB)
+
+    downgrade(directory=MIGRATIONS_DIR, revision=BEFORE_COMPRESSION)
+
+    assert list(db.session.execute(sa.text('SELECT content FROM report ORDER BY id')).scalars()) == REPORT_TEXTS
@@ -0,0 +1,157 @@
+"""Bulk placement: the solver and the preview and apply endpoints."""
+import itertools
+import random
+from collections import Counter
+
+import pytest
+
+from backend.app import db
+from backend.models import School, TeachingPracticeSession
+from backend.utils.placement import ELSEWHERE, SAME_CITY, SAME_STATE, plan_placements
+
+
+@pytest.fixture
+def admin(add_user, auth):
+    return auth(add_user('admin', role='admin'))
+
+
+@pytest.fixture
+def cohort(app, add_user):
+    students = [add_user(f'student{index}') for index in range(3)]
+    with app.app_context():
+        db.session.add_all([School(name='Unity College', address='a', city='Lagos', state='Lagos', capacity=2),
+                            School(name='Hill School', address='b', city='Jos', state='Plateau', capacity=2)])
+        db.session.commit()
+    return students
+
+
+def session_count(app):
+    with app.app_context():
+        return TeachingPracticeSession.query.count()
+
+
+def test_preview_on_fresh_install_creates_no_session(app, client, admin, cohort):
+    response = client.post('/api/admin/placements/preview', headers=admin, json={})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['session_id'] is None
+    assert body['placed'] == 3
+    assert session_count(app) == 0
+
+
+def test_apply_on_fresh_install_creates_the_session(app, client, admin, cohort):
+    response = client.post('/api/admin/placements', headers=admin, json={})
+    assert response.status_code == 200
+    assert response.get_json()['placed'] == 3
+    assert session_count(app) == 1
+
+
+def test_preview_unknown_session(client, admin, cohort):
+    response = client.post('/api/admin/placements/preview', headers=admin, json={'session_id': 99})
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize('path', ['/api/admin/placements/preview', '/api/admin/placements'])
+@pytest.mark.parametrize('body', [[1, 2], 'text', 7])
+def test_non_object_body(client, admin, path, body):
+    response = client.post(path, headers=admin, json=body)
+    assert response.status_code == 400
+
+
+# The solver, against an exhaustive search on small instances
+
+CITIES = [('Ikeja', 'Lagos'), ('Epe', 'Lagos'), ('Jos', 'Plateau')]
+PREFERENCES = CITIES + [('Badagry', 'Lagos'), (None, None), (None, 'Plateau')]
+
+
+def placement_cost(student, school):
+    """Cost of a placement as the module documents it, None if not allowed."""
+    _, city, state, same_state_only = student
+    _, school_city, school_state, _ = school
+    if state is None:
+        return 0
+    if state.casefold() == school_state.casefold():
+        if city is None or city.casefold() == school_city.casefold():
+            return SAME_CITY
+        return SAME_STATE
+    return None if same_state_only else ELSEWHERE
+
+
+def best_outcome(students, schools):
+    """Most students placed, then least cost, by trying every assignment."""
+    best = (0, 0)
+    for choice in itertools.product([None] + schools, repeat=len(students)):
+        used = Counter(school[0] for school in choice if school is not None)
+        if any(school[3] is not None and used[school[0]] > school[3] for school in schools):
+            continue
+        costs = [placement_cost(student, school) for student, school in zip(students, choice) if school]
+        if None in costs:
+            continue
+        if len(costs) > best[0] or (len(costs) == best[0] and sum(costs) < best[1]):
+            best = (len(costs), sum(costs))
+    return best
+
+
+def random_instance(rng):
+    students = [(index, *rng.choice(PREFERENCES), rng.random() < 0.4) for index in range(rng.randint(0, 5))]
+    schools = [(100 + index, *rng.choice(CITIES), rng.choice([None, 0, 1, 2])) for index in range(rng.randint(0, 3))]
+    return students, schools
+
+
+@pytest.mark.parametrize('seed', range(150))
+def test_plan_is_optimal_and_feasible(seed):
+    students, schools = random_instance(random.Random(seed))
+    plan = plan_placements(students, schools)
+    by_student = {student[0]: student for student in students}
+    by_school = {school[0]: school for school in schools}
+
+    # As many students placed, as cheaply, as the exhaustive search finds
+    assert (len(plan['placements']), plan['cost']) == best_outcome(students, schools)
+
+    # The reported cost is that of the placements, each of them allowed
+    costs = [placement_cost(by_student[student_id], by_school[school_id])
+             for student_id, school_id, _ in plan['placements']]
+    assert None not in costs
+    assert sum(costs) == plan['cost']
+
+    # No school over its free seats
+    used = Counter(school_id for _, school_id, _ in plan['placements'])
+    assert all(by_school[school_id][3] is None or count <= by_school[school_id][3]
+               for school_id, count in used.items())
+
+    # Every student is either placed once or listed as unplaced
+    placed = [student_id for student_id, _, _ in plan['placements']]
+    assert len(placed) == len(set(placed))
+    assert sorted(placed + plan['unplaced']) == sorted(by_student)
+
+
+def test_same_state_only_students_stay_unplaced_rather_than_move():
+    students = [(1, 'Ikeja', 'Lagos', True), (2, 'Ikeja', 'Lagos', False)]
+    schools = [(10, 'Jos', 'Plateau', None)]
+    plan = plan_placements(students, schools)
+    assert plan['placements'] == [(2, 10, 'elsewhere')]
+    assert plan['unplaced'] == [1]
+
+
+def test_city_preference_wins_scarce_seats():
+    students = [(1, 'Ikeja', 'Lagos', False), (2, None, None, False), (3, 'Jos', 'Plateau', False)]
+    schools = [(10, 'Ikeja', 'Lagos', 1), (11, 'Jos', 'Plateau', 1), (12, 'Epe', 'Lagos', 1)]
+    plan = plan_placements(students, schools)
+    assert sorted(plan['placements']) == [(1, 10, 'city'), (2, 12, 'any'), (3, 11, 'city')]
+    assert plan['cost'] == 0
+    assert plan['unplaced'] == []
+
+
+def test_full_schools_leave_students_unplaced():
+    students = [(index, None, None, False) for index in range(5)]
+    schools = [(10, 'Ikeja', 'Lagos', 2), (11, 'Jos', 'Plateau', 0)]
+    plan = plan_placements(students, schools)
+    assert Counter(school_id for _, school_id, _ in plan['placements']) == {10: 2}
+    assert len(plan['unplaced']) == 3
+
+
+def test_new_placements_are_spread_over_a_city():
+    students = [(index, 'Ikeja', 'Lagos', False) for index in range(6)]
+    schools = [(10, 'Ikeja', 'Lagos', None), (11, 'ikeja ', 'lagos', None), (12, 'Ikeja', 'Lagos', 1)]
+    plan = plan_placements(students, schools)
+    assert Counter(school_id for _, school_id, _ in plan['placements']) == {10: 3, 11: 2, 12: 1}
@@ -0,0 +1,14 @@
+"""Query budget of the test app."""
+from backend.config import TestingConfig
+
+
+def test_requests_over_budget_fail(app, client, add_user, auth):
+    inspector = app.extensions['query_inspector']
+    assert inspector.budget == TestingConfig.QUERY_BUDGET
+    headers = auth(add_user('student'))
+    assert client.get('/api/auth/me', headers=headers).status_code == 200
+
+    inspector.budget = 0
+    response = client.get('/api/auth/me', headers=headers)
+    assert response.status_code == 500
+    assert response.get_json()['error'].startswith('Query budget exceeded')
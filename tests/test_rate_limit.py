@@ -0,0 +1,51 @@
+"""Login throttling."""
+from backend.utils.rate_limit import MemoryBucketStore, RateLimiter, init_login_rate_limiter
+
+
+class StoppedClockStore(MemoryBucketStore):
+    """A memory store whose buckets never refill."""
+
+    def consume(self, key, now=None):
+        return super().consume(key, now=0.0)
+
+
+def test_username_bucket_keeps_tokens_while_ip_refuses():
+    limiter = RateLimiter(StoppedClockStore(capacity=3, refill_rate=1 / 60))
+
+    for _ in range(3):
+        assert limiter.check('ip:attacker') == 0
+    for _ in range(20):
+        assert limiter.check('ip:attacker', 'user:victim') > 0
+
+    # The victim still has every attempt left
+    for _ in range(3):
+        assert limiter.check('ip:victim', 'user:victim') == 0
+
+
+def test_every_bucket_must_allow():
+    limiter = RateLimiter(StoppedClockStore(capacity=1, refill_rate=1 / 60))
+
+    assert limiter.check('ip:first', 'user:alice') == 0
+    assert limiter.check('ip:second', 'user:alice') > 0
+    assert limiter.check('ip:third', 'user:bob') == 0
+
+
+def test_missing_username_checks_ip_only():
+    limiter = RateLimiter(StoppedClockStore(capacity=1, refill_rate=1 / 60))
+
+    assert limiter.check('ip:client', None) == 0
+    assert limiter.check('ip:client', None) > 0
+
+
+def test_login_answers_429_with_retry_after(app, client, add_user):
+    app.config['LOGIN_RATE_LIMIT_ENABLED'] = True
+    init_login_rate_limiter(app)
+    add_user('student')
+    capacity = app.config['LOGIN_RATE_LIMIT_CAPACITY']
+
+    for _ in range(capacity):
+        response = client.post('/api/auth/login', json={'username': 'student', 'password': 'wrong'})
+        assert response.status_code == 401
+    response = client.post('/api/auth/login', json={'username': 'student', 'password': 'wrong'})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) > 0
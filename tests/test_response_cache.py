@@ -0,0 +1,48 @@
+"""Response cache eviction across processes."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.app import create_app, db
+from backend.models import TeachingPracticeSession
+from backend.utils.archive import archive_session
+from backend.utils.response_cache import init_response_cache
+
+
+@pytest.fixture
+def cached_app(app):
+    app.config['RESPONSE_CACHE_ENABLED'] = True
+    init_response_cache(app)
+    return app
+
+
+def test_archive_cli_empties_the_worker_caches(cached_app, client, add_user, auth):
+    # The CLI is a separate app with a store of its own
+    cli = create_app(dict(cached_app.config, RESPONSE_CACHE_ENABLED=False))
+    with cli.app_context():
+        session = TeachingPracticeSession(title='2025/2026', status='completed',
+                                          start_date=datetime.utcnow() - timedelta(days=90),
+                                          end_date=datetime.utcnow() - timedelta(days=30))
+        db.session.add(session)
+        db.session.commit()
+
+    admin = auth(add_user('admin', role='admin'))
+    assert client.get('/api/admin/dashboard', headers=admin).headers['X-Cache'] == 'MISS'
+    assert client.get('/api/admin/dashboard', headers=admin).headers['X-Cache'] == 'HIT'
+
+    with cli.app_context():
+        archive_session(TeachingPracticeSession.query.one())
+
+    assert client.get('/api/admin/dashboard', headers=admin).headers['X-Cache'] == 'MISS'
+
+
+def test_other_writes_keep_unrelated_entries(cached_app, client, add_user, auth):
+    admin = auth(add_user('admin', role='admin'))
+    student = auth(add_user('student'))
+    client.get('/api/student/dashboard', headers=student)
+    assert client.get('/api/student/dashboard', headers=student).headers['X-Cache'] == 'HIT'
+
+    client.get('/api/admin/dashboard', headers=admin)
+    add_user('another')
+    assert client.get('/api/admin/dashboard', headers=admin).headers['X-Cache'] == 'MISS'
+    assert client.get('/api/student/dashboard', headers=student).headers['X-Cache'] == 'HIT'
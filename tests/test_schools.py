@@ -0,0 +1,56 @@
+"""School create and update validation."""
+import pytest
+
+from backend.app import db
+from backend.models import School
+
+SCHOOL = {'name': 'Unity College', 'address': '1 Broad Street', 'city': 'Lagos', 'state': 'Lagos'}
+
+
+@pytest.fixture
+def admin(add_user, auth):
+    return auth(add_user('admin', role='admin'))
+
+
+@pytest.fixture
+def school_id(client, admin):
+    response = client.post('/api/admin/schools', headers=admin, json=dict(SCHOOL, capacity=4))
+    assert response.status_code == 201
+    return response.get_json()['school']['id']
+
+
+def stored_capacity(app, school_id):
+    with app.app_context():
+        return db.session.get(School, school_id).capacity
+
+
+@pytest.mark.parametrize('capacity', [2.5, True, '12', -1, 10001, [3]])
+def test_update_rejects_invalid_capacity(app, client, admin, school_id, capacity):
+    response = client.put(f'/api/admin/schools/{school_id}', headers=admin, json={'capacity': capacity})
+    assert response.status_code == 400
+    assert stored_capacity(app, school_id) == 4
+
+
+@pytest.mark.parametrize('capacity', [2.5, False, '12'])
+def test_create_rejects_invalid_capacity(client, admin, capacity):
+    response = client.post('/api/admin/schools', headers=admin, json=dict(SCHOOL, capacity=capacity))
+    assert response.status_code == 400
+
+
+def test_update_stores_integer_capacity(app, client, admin, school_id):
+    response = client.put(f'/api/admin/schools/{school_id}', headers=admin, json={'capacity': 12})
+    assert response.status_code == 200
+    assert response.get_json()['school']['capacity'] == 12
+    assert stored_capacity(app, school_id) == 12
+
+
+def test_update_clears_capacity_with_null(app, client, admin, school_id):
+    response = client.put(f'/api/admin/schools/{school_id}', headers=admin, json={'capacity': None})
+    assert response.status_code == 200
+    assert stored_capacity(app, school_id) is None
+
+
+def test_create_without_capacity_has_no_limit(app, client, admin):
+    response = client.post('/api/admin/schools', headers=admin, json=SCHOOL)
+    assert response.status_code == 201
+    assert stored_capacity(app, response.get_json()['school']['id']) is None
@@ -0,0 +1,68 @@
+"""Typeahead search index snapshots."""
+import pytest
+
+from backend.app import db, preload_app
+from backend.models import School, User
+from backend.utils.search import SearchIndex, search_index
+
+
+@pytest.fixture
+def index(app, add_user):
+    add_user('ada')
+    add_user('adams', role='lecturer')
+    with app.app_context():
+        db.session.add(School(name='Adamawa Model School', address='a', city='Yola', state='Adamawa'))
+        db.session.commit()
+    return SearchIndex()
+
+
+def labels(app, index, text, **options):
+    with app.app_context():
+        return [result['label'] for result in index.search(db.session, text, **options)]
+
+
+def test_search_ranks_and_filters(app, index):
+    assert labels(app, index, 'ada') == ['Ada Test', 'Adams Test', 'Adamawa Model School']
+    assert labels(app, index, 'ada', kind='user', role='lecturer') == ['Adams Test']
+    assert labels(app, index, 'yola') == ['Adamawa Model School']
+
+
+def test_search_does_not_wait_for_a_refresh(app, index):
+    labels(app, index, 'ada')
+    # A refresh in progress holds the lock; searches on the current snapshot go on
+    with index._lock:
+        assert labels(app, index, 'adams') == ['Adams Test']
+
+
+def test_refresh_leaves_the_previous_snapshot_alone(app, index, add_user):
+    labels(app, index, 'ada')
+    before = index._snapshot
+    entries, rows = list(before.entries['user']), dict(before.rows)
+
+    add_user('adaeze')
+    with app.app_context():
+        user = User.query.filter_by(username='ada').one()
+        user.first_name = 'Grace'
+        db.session.commit()
+    assert labels(app, index, 'adae') == ['Adaeze Test']
+    assert labels(app, index, 'grace') == ['Grace Test']
+
+    assert index._snapshot is not before
+    assert before.entries['user'] == entries and before.rows == rows
+
+
+def test_deleted_rows_leave_the_index(app, index):
+    labels(app, index, 'ada')
+    with app.app_context():
+        db.session.delete(School.query.one())
+        db.session.commit()
+    assert labels(app, index, 'adamawa') == []
+
+
+def test_preload_builds_the_index(app, add_user, monkeypatch):
+    add_user('ada')
+    fresh = SearchIndex()
+    monkeypatch.setattr(search_index, '_snapshot', fresh._snapshot)
+    preload_app(app)
+    assert search_index._snapshot.versions is not None
+    assert ('user', 1) in search_index._snapshot.rows
@@ -0,0 +1,32 @@
+"""The cursor-timing hook shared by metrics and the query inspector."""
+from prometheus_client import REGISTRY
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from backend.app import create_app
+from backend.utils import metrics, query_inspector, sql_timing
+
+
+def test_one_hook_feeds_metrics_and_the_inspector(app, client, add_user, auth, monkeypatch):
+    app.config['METRICS_ENABLED'] = True
+    metrics.init_metrics(app)
+    query_inspector.init_query_inspector(app)
+    # A second app registers its consumers again
+    create_app(dict(app.config, QUERY_INSPECTOR_ENABLED=True))
+
+    assert sql_timing._consumers.count(metrics._count_statement) == 1
+    assert sql_timing._consumers.count(query_inspector._record_statement) == 1
+    assert event.contains(Engine, 'after_cursor_execute', sql_timing._after_cursor_execute)
+
+    recorded = []
+    inspector = app.extensions['query_inspector']
+    monkeypatch.setattr(inspector, 'record', lambda *args: recorded.append(args))
+    headers = auth(add_user('student'))
+
+    labels = {'blueprint': 'auth', 'endpoint': 'auth.get_current_user'}
+    before = REGISTRY.get_sample_value('http_request_sql_statements_sum', labels) or 0
+    assert client.get('/api/auth/me', headers=headers).status_code == 200
+    counted = REGISTRY.get_sample_value('http_request_sql_statements_sum', labels) - before
+
+    assert recorded and counted == len(recorded)
+    assert all(elapsed >= 0 for _, _, elapsed in recorded)
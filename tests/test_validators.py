@@ -0,0 +1,49 @@
+"""Schema rule order and uniqueness lookups."""
+import pytest
+
+from backend.utils.validators import Unique
+from services.auth_service import REGISTRATION_SCHEMA
+
+USER = {'username': 'ada_o', 'password': 'secret1', 'email': 'ada@example.com',
+        'first_name': 'Ada', 'last_name': 'Obi', 'role': 'student'}
+
+
+@pytest.fixture
+def lookups(app, monkeypatch):
+    calls = []
+    existing = Unique.existing
+
+    def counted(rule, values):
+        calls.append((rule.field, set(values)))
+        return existing(rule, values)
+
+    monkeypatch.setattr(Unique, 'existing', counted)
+    with app.app_context():
+        yield calls
+
+
+@pytest.mark.parametrize('change', [{'email': 'not-an-email'}, {'role': 'dean'}, {'password': 'short'},
+                                    {'username': 'a'}, {'last_name': None}])
+def test_invalid_payload_queries_nothing(lookups, change):
+    result = REGISTRATION_SCHEMA.validate(dict(USER, **change))
+    assert result['error']
+    assert lookups == []
+
+
+def test_valid_payload_checks_each_unique_field(lookups):
+    assert not REGISTRATION_SCHEMA.validate(USER)['error']
+    assert sorted(field for field, _ in lookups) == ['email', 'username']
+
+
+def test_taken_username(lookups, add_user):
+    add_user('ada_o')
+    assert REGISTRATION_SCHEMA.validate(USER)['message'] == 'Username already exists'
+
+
+def test_batch_looks_up_only_payloads_that_pass(lookups):
+    items = [USER, dict(USER, username='bad name', email='bad@example.com'), dict(USER, username='obi')]
+    results = REGISTRATION_SCHEMA.validate_many(items)
+
+    assert [result['error'] for result in results] == [False, True, True]
+    assert results[2]['message'] == 'Email already exists'
+    assert dict(lookups) == {'username': {'ada_o', 'obi'}, 'email': {'ada@example.com'}}
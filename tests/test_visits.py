@@ -0,0 +1,52 @@
+"""Visit planning: routes and days."""
+import itertools
+import random
+from types import SimpleNamespace
+
+from backend.utils import visits
+from backend.utils.visits import plan_visits
+
+
+def day_sizes(plan):
+    return [sum(len(student_ids) for _, student_ids in day['stops']) for day in plan]
+
+
+def test_days_fill_up_in_order():
+    school = (1, 'Jos', 'Plateau', None, None, list(range(13)))
+    assert day_sizes(plan_visits([school], per_day=6)) == [6, 6, 1]
+
+
+def test_school_is_split_only_to_save_a_day():
+    schools = [(1, 'Jos', 'Plateau', None, None, [1, 2, 3]),
+               (2, 'Ikeja', 'Lagos', None, None, [4, 5, 6])]
+    plan = plan_visits(schools, per_day=4)
+    assert day_sizes(plan) == [3, 3]
+    assert [day['distance_km'] for day in plan] == [0, 0]
+
+    plan = plan_visits(schools, per_day=6)
+    assert day_sizes(plan) == [6]
+
+
+def test_every_student_is_visited_once():
+    rng = random.Random(7)
+    schools = [(index, rng.choice(['Jos', 'Epe']), 'Lagos', None, None,
+                list(range(index * 10, index * 10 + rng.randint(1, 4)))) for index in range(12)]
+    plan = plan_visits(schools, per_day=5)
+    seen = [student_id for day in plan for _, student_ids in day['stops'] for student_id in student_ids]
+    assert sorted(seen) == sorted(student_id for school in schools for student_id in school[5])
+    assert all(size <= 5 for size in day_sizes(plan))
+
+
+def test_deadline_is_checked_within_a_pass(monkeypatch):
+    # A clock that moves 10 ms each time it is read
+    ticks = itertools.count()
+    monkeypatch.setattr(visits, 'time', SimpleNamespace(monotonic=lambda: next(ticks) / 100))
+    monkeypatch.setattr(visits, 'IMPROVE_SECONDS', 0.5)
+    rng = random.Random(1)
+    points = [(rng.random(), rng.random()) for _ in range(200)]
+    matrix = [[abs(ax - bx) + abs(ay - by) for bx, by in points] for ax, ay in points]
+
+    route = visits._route(matrix)
+    # Read once for the deadline, then before each i until 0.5 s have passed
+    assert next(ticks) == 51
+    assert sorted(route) == list(range(200))